@@ -0,0 +1,11 @@
+"""
+Benchmarks
+Offline performance harnesses for the bot. Each module runs against a
+throwaway database with fake Discord objects, so no token or network access
+is needed, and can write a JSON report to compare against a baseline.
+
+Usage:
+    python -m benchmarks.events --events 5000 --users 500
+    python -m benchmarks.dao --size 10k
+    python -m benchmarks.render --concurrency 1,4,16
+"""
@@ -0,0 +1,563 @@
+"""
+DAO micro-benchmarks.
+
+Seeds databases through the real setup and migrations, bulk-loads members
+and engagement history at several sizes, then times every public Database
+method against a copy of each. Seeded databases are cached by size and
+schema version, so only the first run at a size pays for seeding.
+
+Usage:
+    python -m benchmarks.dao --size 10k --json dao.json
+    python -m benchmarks.dao --size 10k --size 100k --baseline dao.json
+    python -m benchmarks.dao --members 2000 --rows 50000 --only "rank|top_users"
+"""
+
+import argparse
+import contextlib
+import inspect
+import io
+import logging
+import os
+import random
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+from collections import namedtuple
+from typing import Dict, List, Tuple
+from benchmarks import report as reports
+from benchmarks.events import CHANNEL_ID_BASE, GUILD_ID_BASE, USER_ID_BASE
+
+# Size name -> (members, engagement_log rows)
+SIZES = {
+    "10k": (10_000, 1_000_000),
+    "100k": (100_000, 10_000_000),
+    "1m": (1_000_000, 50_000_000),
+}
+GUILD_ID = GUILD_ID_BASE
+CHANNELS = 10
+# Channel ids outside the seeded range, for the add/remove cases
+SPARE_CHANNEL_ID = CHANNEL_ID_BASE + 1_000_000
+# Share (in %) of each activity type in the seeded log; points come from config
+ACTIVITY_MIX = [
+    ("message", 70),
+    ("reaction", 20),
+    ("image", 6),
+    ("share", 3),
+    ("invite", 1),
+]
+SEED_CHUNK_ROWS = 1_000_000
+SEED_NOTIFICATIONS = 1_000
+SEED_EXCLUDED = 5
+SEED_ADMINS = 3
+# Writes that touch every member or many rows only run a few times
+SLOW_CASE_ITERATIONS = 3
+SLOW_CASES = {"reset_all_points", "compact_engagement", "incremental_vacuum"}
+
+# row_id is the id of a seeded notification_outbox (and usually milestones_log) row
+Sample = namedtuple(
+    "Sample", "n guild user other channel message points milestone row_id"
+)
+
+# Method name -> arguments for one call, built from a Sample before timing
+# starts. Reads come first and writes that wipe data last, since everything
+# runs against the same copy of the seeded database.
+CASES = [
+    ("get_milestone_ladder", lambda dao, s: (s.guild,)),
+    ("activity_type_id", lambda dao, s: ("reaction",)),
+    ("get_config", lambda dao, s: (s.guild, "points_per_message")),
+    ("get_all_configs", lambda dao, s: (s.guild,)),
+    ("get_leaderboard", lambda dao, s: (s.guild, 10)),
+    ("get_top_users", lambda dao, s: (s.guild, 10)),
+    ("get_user_rank", lambda dao, s: (s.guild, s.user)),
+    ("get_total_members_count", lambda dao, s: (s.guild,)),
+    ("get_member_info", lambda dao, s: (s.guild, s.user)),
+    ("get_user_points", lambda dao, s: (s.guild, s.user)),
+    ("get_user_level", lambda dao, s: (s.guild, s.user)),
+    ("user_exists", lambda dao, s: (s.guild, s.user)),
+    ("get_current_streak", lambda dao, s: (s.guild, s.user)),
+    ("get_longest_streak", lambda dao, s: (s.guild, s.user)),
+    ("get_streak", lambda dao, s: (s.guild, s.user)),
+    ("get_daily_points", lambda dao, s: (s.guild, s.user)),
+    ("get_activity_counts", lambda dao, s: (s.guild, s.user)),
+    ("can_earn_points", lambda dao, s: (s.guild, s.user, 5)),
+    ("is_reaction_known", lambda dao, s: (s.user, s.message)),
+    ("has_user_reacted_to_message", lambda dao, s: (s.guild, s.user, s.message)),
+    ("has_invited_before", lambda dao, s: (s.guild, s.user, s.other)),
+    ("get_next_milestone", lambda dao, s: (s.guild, s.user)),
+    ("get_next_milestone_by_points", lambda dao, s: (s.guild, s.points)),
+    ("get_previous_milestone", lambda dao, s: (s.guild, s.user)),
+    ("get_active_milestones", lambda dao, s: (s.guild,)),
+    ("get_milestone_message", lambda dao, s: (s.guild, s.milestone)),
+    ("get_milestone_details", lambda dao, s: (s.guild, s.milestone)),
+    ("get_milestone_role", lambda dao, s: (s.guild, s.milestone)),
+    ("get_user_current_role_milestone", lambda dao, s: (s.guild, s.user)),
+    ("get_user_milestone_role_name", lambda dao, s: (s.guild, s.user)),
+    ("get_all_role_milestones", lambda dao, s: (s.guild,)),
+    ("get_admin_pending_milestones", lambda dao, s: ()),
+    ("get_unrewarded_milestones", lambda dao, s: (s.guild,)),
+    ("is_admin", lambda dao, s: (s.guild, s.user)),
+    ("is_global_admin", lambda dao, s: (s.user,)),
+    ("get_all_admin_ids", lambda dao, s: (s.guild,)),
+    ("is_bot_channel", lambda dao, s: (s.guild, s.channel)),
+    ("is_tracked_channel", lambda dao, s: (s.guild, s.channel)),
+    ("get_tracked_channels", lambda dao, s: (s.guild,)),
+    ("get_excluded_leaderboard_users", lambda dao, s: (s.guild,)),
+    ("get_voice_channel_display", lambda dao, s: (s.guild,)),
+    ("get_campaign_multiplier", lambda dao, s: (s.guild, s.channel)),
+    ("is_campaign_channel", lambda dao, s: (s.guild, s.channel)),
+    ("get_active_campaigns", lambda dao, s: (s.guild,)),
+    ("get_all_campaigns", lambda dao, s: (s.guild,)),
+    ("get_expired_engagement", lambda dao, s: (180, 500)),
+    ("get_due_notifications", lambda dao, s: (50,)),
+    ("get_pending_notifications_count", lambda dao, s: ()),
+    ("holds_lease", lambda dao, s: ("benchmark",)),
+    # Writes
+    ("ensure_guild", lambda dao, s: (s.guild,)),
+    ("set_config", lambda dao, s: (s.guild, "benchmark_key", str(s.n))),
+    ("update_config", lambda dao, s: (s.guild, "benchmark_key", str(s.n))),
+    ("add_member", lambda dao, s: (s.guild, USER_ID_BASE + 10**9 + s.n)),
+    ("add_points_to_member", lambda dao, s: (s.guild, s.user, 5)),
+    ("increment_user_points", lambda dao, s: (s.guild, s.user, 5)),
+    ("set_user_points", lambda dao, s: (s.guild, s.user, s.points)),
+    ("update_user_level", lambda dao, s: (s.guild, s.user, s.points)),
+    ("update_streak", lambda dao, s: (s.guild, s.user)),
+    (
+        "log_engagement",
+        lambda dao, s: (s.guild, s.user, "message", s.message, s.channel, 5),
+    ),
+    (
+        "award_engagement_once",
+        lambda dao, s: (s.guild, s.user, "reaction", s.message, s.channel, 1),
+    ),
+    (
+        "record_milestone",
+        lambda dao, s: (
+            s.guild,
+            s.user,
+            s.milestone,
+            f"B{s.n:04d}",
+            [("user_dm", "benchmark")],
+        ),
+    ),
+    ("mark_milestone_user_notified", lambda dao, s: (s.guild, s.user, s.milestone)),
+    ("mark_milestone_admin_notified", lambda dao, s: (s.guild, s.user, s.milestone)),
+    ("mark_milestones_admin_notified_by_ids", lambda dao, s: ([s.row_id],)),
+    ("mark_reward_given", lambda dao, s: (s.guild, f"B{s.n:04d}")),
+    ("add_milestone", lambda dao, s: (s.guild, 10**9 + s.n, "benchmark")),
+    ("update_milestone_message", lambda dao, s: (s.guild, 10**9 + s.n, "updated")),
+    ("update_milestone_status", lambda dao, s: (s.guild, 10**9 + s.n, "inactive")),
+    ("update_milestone_role", lambda dao, s: (s.guild, 10**9 + s.n, "Benchmark")),
+    ("update_milestone_reward", lambda dao, s: (s.guild, 10**9 + s.n, "reward")),
+    ("add_admin", lambda dao, s: (s.guild, s.user)),
+    ("remove_admin", lambda dao, s: (s.guild, s.user)),
+    ("track_channel", lambda dao, s: (s.guild, SPARE_CHANNEL_ID + s.n)),
+    ("untrack_channel", lambda dao, s: (s.guild, SPARE_CHANNEL_ID + s.n)),
+    ("add_excluded_leaderboard_user", lambda dao, s: (s.guild, s.user)),
+    ("remove_excluded_leaderboard_user", lambda dao, s: (s.guild, s.user)),
+    (
+        "save_voice_channel_display",
+        lambda dao, s: (s.guild, [SPARE_CHANNEL_ID + i for i in range(3)]),
+    ),
+    ("delete_voice_channel_display", lambda dao, s: (s.guild,)),
+    (
+        "add_campaign_channel",
+        lambda dao, s: (
+            s.guild,
+            SPARE_CHANNEL_ID + s.n,
+            "benchmark",
+            2.0,
+            "2000-01-01",
+            "2999-12-31",
+        ),
+    ),
+    (
+        "update_campaign_status",
+        lambda dao, s: (s.guild, SPARE_CHANNEL_ID + s.n, "inactive"),
+    ),
+    ("delete_campaign_channel", lambda dao, s: (s.guild, SPARE_CHANNEL_ID + s.n)),
+    ("acquire_lease", lambda dao, s: ("benchmark", "benchmark", 60)),
+    ("release_lease", lambda dao, s: ("benchmark", "benchmark")),
+    ("mark_notification_sent", lambda dao, s: (s.row_id,)),
+    ("mark_notification_failed", lambda dao, s: (s.row_id, "benchmark")),
+    ("reschedule_notification", lambda dao, s: (s.row_id, 60, "benchmark")),
+    ("reset_user_points", lambda dao, s: (s.guild, s.user)),
+    ("compact_engagement", lambda dao, s: (dao.get_expired_engagement(180, 500),)),
+    ("incremental_vacuum", lambda dao, s: (100,)),
+    ("reset_all_points", lambda dao, s: (s.guild,)),
+]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Database methods")
+    parser.add_argument(
+        "--size",
+        action="append",
+        choices=sorted(SIZES),
+        help="Seeded size to run (repeatable, default 10k)",
+    )
+    parser.add_argument("--members", type=int, help="Custom member count")
+    parser.add_argument("--rows", type=int, help="Custom engagement_log row count")
+    parser.add_argument(
+        "--days", type=int, default=365, help="Days of history in the seeded log"
+    )
+    parser.add_argument("--iterations", type=int, default=20, help="Calls per method")
+    parser.add_argument("--only", help="Regex selecting the methods to run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--seed-dir",
+        default=os.path.join(tempfile.gettempdir(), "bench_seeds"),
+        help="Where seeded databases are cached",
+    )
+    parser.add_argument(
+        "--reseed", action="store_true", help="Rebuild cached seeded databases"
+    )
+    parser.add_argument("--json", help="Write the report as JSON")
+    parser.add_argument("--baseline", help="Compare against a JSON report")
+    return parser.parse_args(argv)
+
+
+def schema_version() -> str:
+    from src.core.migration_manager import MigrationManager
+
+    return MigrationManager(":memory:").migrations[-1][0]
+
+
+def seed_database(path: str, members: int, rows: int, days: int):
+    """Create a migrated database and bulk-load a synthetic guild into it."""
+    import src.core.config as config
+    from src.core import setup_db
+    from src.core.database import Database
+    from src.core.migration_manager import MigrationManager
+    from src.core.reaction_index import DISCORD_EPOCH_MS
+
+    config.DATABASE_NAME = path
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup_db.setup(logging.getLogger(__name__))
+        if not MigrationManager(path).run_migrations():
+            raise RuntimeError("Database migrations failed")
+    dao = Database(path)
+    dao.ensure_guild(GUILD_ID)
+
+    conn = sqlite3.connect(path)
+    try:
+        cur = conn.cursor()
+        cur.execute("PRAGMA synchronous = OFF")
+        cur.execute("PRAGMA cache_size = -262144")
+
+        # Loading without secondary indexes and rebuilding them is much faster
+        cur.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name IN ('engagement_log', 'milestones_log') AND sql IS NOT NULL"
+        )
+        indexes = cur.fetchall()
+        for name, _ in indexes:
+            cur.execute(f"DROP INDEX {name}")
+
+        # Activity type, user, channel and object id are hashed from the row
+        # number so the data is the same on every machine. User picks are
+        # skewed towards low ids, like real activity.
+        type_case, points_case, lower = [], [], 0
+        for name, share in ACTIVITY_MIX:
+            points = int(dao.get_config(config.GLOBAL_GUILD_ID, f"points_per_{name}"))
+            upper = lower + share
+            type_case.append(
+                f"WHEN h % 100 < {upper} THEN {config.ACTIVITY_TYPES[name]}"
+            )
+            points_case.append(f"WHEN h % 100 < {upper} THEN {points}")
+            lower = upper
+        now_ms = int(time.time() * 1000)
+        span_ms = days * 86_400_000
+        for start in range(0, rows, SEED_CHUNK_ROWS):
+            end = min(rows, start + SEED_CHUNK_ROWS)
+            cur.execute(
+                f"""
+                INSERT INTO engagement_log (guild_id, discord_id, activity_type_id,
+                    activity_object_id, channel_id, point_value, timestamp)
+                WITH RECURSIVE seq(i) AS (
+                    SELECT ? UNION ALL SELECT i + 1 FROM seq WHERE i < ?
+                ),
+                hashed AS (
+                    SELECT i,
+                           (i * 2654435761) % 4294967296 AS h,
+                           (i * 2246822519 + 3266489917) % 4294967296 AS g,
+                           ? + i * ? / ? AS ts_ms
+                    FROM seq
+                )
+                SELECT ?, ? + (h / 100 % ?) * (g % ?) / ?,
+                       CASE {' '.join(type_case)} END,
+                       ((ts_ms - {DISCORD_EPOCH_MS}) << 22) | (i % 4194304),
+                       ? + g / 1000 % {CHANNELS},
+                       CASE {' '.join(points_case)} END,
+                       ts_ms / 1000
+                FROM hashed
+                """,
+                (
+                    start,
+                    end - 1,
+                    now_ms - span_ms,
+                    span_ms,
+                    rows,
+                    GUILD_ID,
+                    USER_ID_BASE,
+                    members,
+                    members,
+                    members,
+                    CHANNEL_ID_BASE,
+                ),
+            )
+            conn.commit()
+            print(f"  engagement_log: {end:,}/{rows:,} rows")
+
+        cur.execute(
+            """
+            INSERT INTO members (guild_id, discord_id, current_streak, longest_streak,
+                last_activity_date)
+            WITH RECURSIVE seq(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM seq WHERE i < ?)
+            SELECT ?, ? + i, i % 30, i % 30 + i % 7, date('now', '-' || (i % 3) || ' days')
+            FROM seq
+            """,
+            (members - 1, GUILD_ID, USER_ID_BASE),
+        )
+        cur.execute(
+            """
+            UPDATE members SET total_points = t.points
+            FROM (
+                SELECT discord_id, SUM(point_value) AS points
+                FROM engagement_log GROUP BY discord_id
+            ) t
+            WHERE members.guild_id = ? AND members.discord_id = t.discord_id
+            """,
+            (GUILD_ID,),
+        )
+        cur.execute(
+            """
+            UPDATE members SET level = COALESCE((
+                SELECT MAX(value) FROM milestones
+                WHERE guild_id = members.guild_id AND status = 'active'
+                AND value <= members.total_points
+            ), 0)
+            WHERE guild_id = ?
+            """,
+            (GUILD_ID,),
+        )
+
+        # Every reached milestone was recorded; a few still await the admin
+        cur.execute(
+            """
+            INSERT INTO milestones_log (guild_id, discord_id, milestone, reached_at,
+                user_notified, admin_notified, reward_status, reward_code)
+            SELECT m.guild_id, m.discord_id, ms.value,
+                   CAST(strftime('%s', 'now') AS INTEGER) - m.discord_id % ?,
+                   1, m.discord_id % 1000 != 0,
+                   CASE WHEN m.discord_id % 10 = 0 THEN 'pending' ELSE 'given' END,
+                   printf('R%05d', m.discord_id % 100000)
+            FROM members m
+            JOIN milestones ms ON ms.guild_id = m.guild_id AND ms.status = 'active'
+                AND ms.value <= m.total_points
+            WHERE m.guild_id = ?
+            """,
+            (days * 86400, GUILD_ID),
+        )
+
+        for _, sql in indexes:
+            cur.execute(sql)
+
+        cur.executemany(
+            "INSERT INTO tracked_channels (channel_id, guild_id) VALUES (?, ?)",
+            [(CHANNEL_ID_BASE + c, GUILD_ID) for c in range(CHANNELS)],
+        )
+        cur.execute(
+            """
+            INSERT INTO campaign_channels (guild_id, channel_id, multiplier,
+                campaign_name, start_date, end_date)
+            VALUES (?, ?, 2.0, 'seeded', date('now'), date('now', '+30 days'))
+            """,
+            (GUILD_ID, CHANNEL_ID_BASE),
+        )
+        cur.executemany(
+            "INSERT INTO excluded_leaderboard (guild_id, discord_id) VALUES (?, ?)",
+            [(GUILD_ID, USER_ID_BASE + i) for i in range(SEED_EXCLUDED)],
+        )
+        cur.executemany(
+            "INSERT OR IGNORE INTO admin_ids (guild_id, discord_id) VALUES (?, ?)",
+            [(GUILD_ID, USER_ID_BASE + i) for i in range(SEED_ADMINS)],
+        )
+        cur.executemany(
+            """
+            INSERT INTO notification_outbox (guild_id, kind, discord_id, milestone, message)
+            VALUES (?, 'user_dm', ?, 1000, 'seeded')
+            """,
+            [(GUILD_ID, USER_ID_BASE + i) for i in range(SEED_NOTIFICATIONS)],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def seeded_database(args, members: int, rows: int) -> str:
+    """Path of a cached seeded database, creating it if needed."""
+    os.makedirs(args.seed_dir, exist_ok=True)
+    path = os.path.join(
+        args.seed_dir,
+        f"dao_{members}m_{rows}r_{args.days}d_v{schema_version()}.db",
+    )
+    if args.reseed or not os.path.exists(path):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        print(f"Seeding {members:,} members and {rows:,} engagement rows...")
+        started = time.perf_counter()
+        partial = path + ".partial"
+        seed_database(partial, members, rows, args.days)
+        reports.db_size(partial)
+        os.replace(partial, path)
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(partial + suffix):
+                os.remove(partial + suffix)
+        print(f"Seeded {path} in {time.perf_counter() - started:.1f}s")
+    return path
+
+
+def reset_caches():
+    """Drop process-wide caches so each method starts cold."""
+    from src.core.dashboard_cache import snapshot_cache
+    from src.core.milestone_ladder import ladder_cache
+    from src.core.reaction_index import reaction_index
+
+    ladder_cache.invalidate()
+    snapshot_cache.invalidate_all()
+    reaction_index.loaded = False
+
+
+def make_samples(dao, members: int, count: int, seed: int) -> List[Sample]:
+    from benchmarks.fakes import snowflake
+
+    rng = random.Random(seed)
+    milestones = [row[0] for row in dao.get_active_milestones(GUILD_ID)]
+    samples = []
+    for n in range(count):
+        user = USER_ID_BASE + rng.randrange(members)
+        samples.append(
+            Sample(
+                n=n,
+                guild=GUILD_ID,
+                user=user,
+                other=USER_ID_BASE + rng.randrange(members),
+                channel=CHANNEL_ID_BASE + rng.randrange(CHANNELS),
+                # A message from the last few days, inside the reaction index window
+                message=snowflake(time.time() - rng.uniform(0, 3 * 86400)),
+                points=dao.get_user_points(GUILD_ID, user),
+                milestone=rng.choice(milestones),
+                row_id=1 + rng.randrange(SEED_NOTIFICATIONS),
+            )
+        )
+    return samples
+
+
+def run_size(args, members: int, rows: int) -> Tuple[Dict, Dict]:
+    from src.core.database import Database
+
+    seed_path = seeded_database(args, members, rows)
+    work_dir = tempfile.mkdtemp(prefix="bench_dao_")
+    path = os.path.join(work_dir, "database.db")
+    shutil.copyfile(seed_path, path)
+    try:
+        dao = Database(path)
+        samples = make_samples(dao, members, args.iterations + 1, args.seed)
+        only = re.compile(args.only) if args.only else None
+        results = {}
+        for name, make_args in CASES:
+            if only and not only.search(name):
+                continue
+            method = getattr(dao, name)
+            iterations = (
+                min(args.iterations, SLOW_CASE_ITERATIONS)
+                if name in SLOW_CASES
+                else args.iterations
+            )
+            reset_caches()
+            call_args = make_args(dao, samples[0])
+            started = time.perf_counter()
+            method(*call_args)
+            cold = time.perf_counter() - started
+
+            latencies = []
+            for sample in samples[1 : iterations + 1]:
+                call_args = make_args(dao, sample)
+                started = time.perf_counter()
+                method(*call_args)
+                latencies.append(time.perf_counter() - started)
+            results[name] = {
+                "cold_ms": round(cold * 1000, 3),
+                **reports.summarize(latencies),
+            }
+            print(
+                f"  {name:<38} p50 {results[name]['p50_ms']:>10.3f} ms"
+                f"  p99 {results[name]['p99_ms']:>10.3f} ms"
+                f"  cold {results[name]['cold_ms']:>10.3f} ms"
+            )
+        seeded = {
+            "members": members,
+            "engagement_rows": rows,
+            "days": args.days,
+            "db_bytes": reports.db_size(seed_path),
+        }
+        return seeded, results
+    finally:
+        reset_caches()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def uncovered_methods() -> List[str]:
+    """Public Database methods that have no benchmark case."""
+    from src.core.database import Database
+
+    covered = {name for name, _ in CASES}
+    return [
+        name
+        for name, _ in inspect.getmembers(Database, inspect.isfunction)
+        if not name.startswith("_") and name not in covered
+    ]
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.members or args.rows:
+        sizes = {
+            "custom": (args.members or SIZES["10k"][0], args.rows or SIZES["10k"][1])
+        }
+    else:
+        sizes = {name: SIZES[name] for name in (args.size or ["10k"])}
+
+    report = {
+        "benchmark": "dao",
+        "environment": reports.environment(),
+        "profile": {
+            "iterations": args.iterations,
+            "seed": args.seed,
+            "only": args.only,
+            "schema_version": schema_version(),
+        },
+        "seeded": {},
+        "results": {},
+    }
+    for label, (members, rows) in sizes.items():
+        print(f"[{label}] {members:,} members, {rows:,} engagement rows")
+        report["seeded"][label], report["results"][label] = run_size(
+            args, members, rows
+        )
+
+    missing = uncovered_methods()
+    if missing:
+        report["not_benchmarked"] = missing
+        print(f"⚠️ Database methods without a benchmark case: {', '.join(missing)}")
+    if args.json:
+        reports.write_report(args.json, report)
+    if args.baseline:
+        reports.compare(report, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+End-to-end event benchmark.
+
+Replays a synthetic workload through main.py's on_message, on_reaction_add
+and on_member_join handlers against a fresh database, with the real role
+manager and voice channel display behind a stubbed HTTP layer. Reports
+throughput, per-event handler latency and database growth.
+
+Usage:
+    python -m benchmarks.events --events 5000 --users 500 --json base.json
+    python -m benchmarks.events --trace trace.jsonl --baseline base.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, List
+from benchmarks import report as reports
+from benchmarks import workload
+
+GUILD_ID_BASE = 900_000_000_000_000_000
+USER_ID_BASE = 100_000_000_000_000_000
+CHANNEL_ID_BASE = 500_000_000_000_000_000
+CAMPAIGN_MULTIPLIER = 2.0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the gateway event path")
+    parser.add_argument("--events", type=int, default=5000, help="Events to replay")
+    parser.add_argument("--users", type=int, default=500, help="Members per guild")
+    parser.add_argument("--guilds", type=int, default=1, help="Number of guilds")
+    parser.add_argument("--channels", type=int, default=10, help="Channels per guild")
+    parser.add_argument(
+        "--tracked-ratio", type=float, default=0.8, help="Share of tracked channels"
+    )
+    parser.add_argument(
+        "--campaign-ratio",
+        type=float,
+        default=0.1,
+        help="Share of channels running a campaign (counted as tracked)",
+    )
+    parser.add_argument(
+        "--mix",
+        default="message=0.7,reaction=0.25,join=0.05",
+        help="Event type weights",
+    )
+    parser.add_argument(
+        "--message-kinds",
+        default="text=0.8,url=0.1,image=0.1",
+        help="Message content weights",
+    )
+    parser.add_argument(
+        "--skew", type=float, default=1.5, help="User activity skew (1 = uniform)"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=0,
+        help="Events per second, dispatched concurrently like the gateway "
+        "(0 = back to back)",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--http-latency-ms", type=float, default=0, help="Simulated REST latency"
+    )
+    parser.add_argument(
+        "--no-voice-display",
+        action="store_true",
+        help="Leave the voice channel display disabled",
+    )
+    parser.add_argument("--trace", help="Replay events from a saved trace")
+    parser.add_argument("--save-trace", help="Save the generated events as JSONL")
+    parser.add_argument("--db", help="Database file (default: a temporary file)")
+    parser.add_argument("--json", help="Write the report as JSON")
+    parser.add_argument("--baseline", help="Compare against a JSON report")
+    parser.add_argument("--log-level", default="WARNING")
+    return parser.parse_args(argv)
+
+
+def build_workload(args):
+    if args.trace:
+        return workload.load_trace(args.trace)
+    world = {
+        "guilds": args.guilds,
+        "users": args.users,
+        "channels": args.channels,
+        "channel_kinds": workload.channel_kinds(
+            args.channels, args.tracked_ratio, args.campaign_ratio
+        ),
+    }
+    events = workload.generate_events(
+        world,
+        args.events,
+        args.seed,
+        workload.parse_mix(args.mix),
+        workload.parse_mix(args.message_kinds),
+        args.skew,
+    )
+    if args.save_trace:
+        workload.save_trace(args.save_trace, world, events)
+    return world, events
+
+
+class EventReplayer:
+    """Turns workload events into fake Discord objects and calls the handlers."""
+
+    def __init__(self, main, world: Dict, voice_display: bool, http_latency: float):
+        from benchmarks.fakes import FakeGuild, FakeRole, StubHTTP, StubInviteTracker
+        from benchmarks.fakes import FakeUser
+
+        self.main = main
+        self.http = StubHTTP(http_latency)
+        self.world = world
+        self.guilds: List = []
+        self.messages: Dict = {}
+        dao = main.dao
+
+        for g in range(world["guilds"]):
+            guild = FakeGuild(GUILD_ID_BASE + g, f"guild{g}", self.http)
+            dao.ensure_guild(guild.id)
+            for u in range(world["users"]):
+                guild.add_member(USER_ID_BASE + u)
+            for c, kind in enumerate(world["channel_kinds"]):
+                channel = guild.add_channel(
+                    CHANNEL_ID_BASE + g * world["channels"] + c, f"channel{c}"
+                )
+                if kind == "campaign":
+                    dao.add_campaign_channel(
+                        guild.id,
+                        channel.id,
+                        f"campaign{c}",
+                        CAMPAIGN_MULTIPLIER,
+                        date.today().isoformat(),
+                        (date.today() + timedelta(days=30)).isoformat(),
+                    )
+                elif kind == "tracked":
+                    dao.track_channel(guild.id, channel.id)
+            guild.roles = [
+                FakeRole(guild.id + i + 1, role_name)
+                for i, (_, role_name) in enumerate(
+                    dao.get_all_role_milestones(guild.id)
+                )
+            ]
+            if voice_display:
+                dao.set_config(guild.id, "voice_channel_display_enabled", "true")
+            self.guilds.append(guild)
+
+        from src.core.role_manager import RoleManager
+        from src.core.voice_channel_display import VoiceChannelDisplay
+
+        bot = main.bot
+        # Handlers compare message authors with the logged-in bot user
+        bot._connection.user = FakeUser(1, "bench-bot", bot=True)
+        bot.role_manager = RoleManager(bot)
+        bot.voice_channel_display = VoiceChannelDisplay(bot)
+        # Only the per-event refresh is measured; the periodic one needs a login
+        bot.voice_channel_display.cog_unload()
+        bot.invite_tracker = StubInviteTracker(self.http)
+
+    def prepare(self, event: Dict):
+        """Build a zero-argument coroutine function that handles an event."""
+        from benchmarks.fakes import FakeAttachment, FakeMessage, FakeReaction
+        from benchmarks.fakes import snowflake
+
+        guild = self.guilds[event["guild"]]
+        user_id = USER_ID_BASE + event["user"]
+
+        if event["type"] == "join":
+            member = guild.add_member(user_id)
+            if event["inviter"] is not None:
+                self.main.bot.invite_tracker.inviters[user_id] = guild.get_member(
+                    USER_ID_BASE + event["inviter"]
+                )
+            return lambda: self.main.on_member_join(member)
+
+        author = guild.get_member(user_id) or guild.add_member(user_id)
+        channel = guild.get_channel(
+            CHANNEL_ID_BASE + event["guild"] * self.world["channels"] + event["channel"]
+        )
+        if event["type"] == "reaction":
+            message = self.messages.get(event["message"])
+            if message is None:
+                message = FakeMessage(snowflake(time.time()), author, channel)
+            reaction = FakeReaction(message)
+            return lambda: self.main.on_reaction_add(reaction, author)
+
+        kind = event["kind"]
+        message = FakeMessage(
+            snowflake(time.time()),
+            author,
+            channel,
+            content="see https://example.com/post" if kind == "url" else "hello",
+            attachments=[FakeAttachment("image/png")] if kind == "image" else None,
+        )
+        self.messages[event["message"]] = message
+        return lambda: self.main.on_message(message)
+
+
+async def replay(replayer: EventReplayer, events: List[Dict], rate: float):
+    latencies: Dict[str, List[float]] = {}
+    errors: Counter = Counter()
+
+    async def dispatch(event: Dict, handler, due: float):
+        try:
+            await handler()
+        except Exception as e:
+            errors[f"{event['type']}: {type(e).__name__}: {e}"] += 1
+        latencies.setdefault(event["type"], []).append(time.perf_counter() - due)
+
+    start = time.perf_counter()
+    if rate > 0:
+        # Open loop: events arrive on schedule, however far behind handlers are
+        tasks = []
+        for i, event in enumerate(events):
+            due = start + i / rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            handler = replayer.prepare(event)
+            tasks.append(asyncio.create_task(dispatch(event, handler, due)))
+        await asyncio.gather(*tasks)
+    else:
+        for event in events:
+            handler = replayer.prepare(event)
+            await dispatch(event, handler, time.perf_counter())
+    return time.perf_counter() - start, latencies, errors
+
+
+async def run(args, db_path: str) -> Dict:
+    # Importing main sets up the database schema and the bot object
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+        from src.core.migration_manager import run_migrations
+
+        if not run_migrations():
+            raise RuntimeError("Database migrations failed")
+    logging.getLogger().setLevel(args.log_level.upper())
+
+    world, events = build_workload(args)
+    replayer = EventReplayer(
+        main, world, not args.no_voice_display, args.http_latency_ms / 1000
+    )
+    size_before = reports.db_size(db_path)
+    elapsed, latencies, errors = await replay(replayer, events, args.rate)
+    size_after = reports.db_size(db_path)
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    results = {
+        "events": len(events),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_eps": round(len(events) / elapsed, 1) if elapsed else 0,
+        "latency": {
+            "all": reports.summarize(all_latencies),
+            **{
+                event_type: reports.summarize(values)
+                for event_type, values in sorted(latencies.items())
+            },
+        },
+        "db_bytes": {
+            "before": size_before,
+            "after": size_after,
+            "growth": size_after - size_before,
+            "growth_per_1k_events": round(
+                (size_after - size_before) / max(1, len(events)) * 1000
+            ),
+        },
+        "errors": sum(errors.values()),
+    }
+    return {
+        "benchmark": "events",
+        "environment": reports.environment(),
+        "profile": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("json", "baseline", "save_trace", "log_level")
+        },
+        "world": {k: v for k, v in world.items() if k != "channel_kinds"},
+        "results": results,
+        "http_calls": dict(replayer.http.calls),
+        "error_samples": dict(errors.most_common(5)),
+    }
+
+
+def print_report(report: Dict):
+    results = report["results"]
+    print(
+        f"Replayed {results['events']} events in {results['elapsed_s']:.2f}s "
+        f"({results['throughput_eps']:,.1f} events/s)"
+    )
+    print(f"{'handler':<10} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in results["latency"].items():
+        if stats["count"]:
+            print(
+                f"{name:<10} {stats['count']:>7} {stats['p50_ms']:>9.3f} "
+                f"{stats['p95_ms']:>9.3f} {stats['p99_ms']:>9.3f}"
+            )
+    size = results["db_bytes"]
+    print(
+        f"Database: {size['before']:,} -> {size['after']:,} bytes "
+        f"({size['growth_per_1k_events']:,} bytes per 1000 events)"
+    )
+    print(f"Stubbed REST calls: {report['http_calls'] or 'none'}")
+    if results["errors"]:
+        print(f"⚠️ {results['errors']} handler errors: {report['error_samples']}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    work_dir = tempfile.mkdtemp(prefix="bench_")
+    db_path = args.db or os.path.join(work_dir, "database.db")
+    # Must be set before src.core.config is first imported
+    os.environ["DATABASE_NAME"] = db_path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    report = asyncio.run(run(args, db_path))
+    print_report(report)
+    if args.json:
+        reports.write_report(args.json, report)
+    if args.baseline:
+        reports.compare(report, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Fake Discord objects for the benchmarks.
+
+They carry just the attributes the event handlers, role manager and voice
+channel display read. Anything that would call Discord's REST API goes
+through StubHTTP instead, which only counts calls (and can simulate latency).
+"""
+
+import asyncio
+import itertools
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+from src.core.reaction_index import DISCORD_EPOCH_MS
+
+_sequence = itertools.count()
+
+
+def snowflake(timestamp: float) -> int:
+    """A unique Discord-style id created at the given unix time."""
+    return ((int(timestamp * 1000) - DISCORD_EPOCH_MS) << 22) | (
+        next(_sequence) & 0x3FFFFF
+    )
+
+
+class StubHTTP:
+    """Stands in for Discord's REST API."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Counter = Counter()
+
+    async def request(self, route: str):
+        self.calls[route] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+class FakeRole:
+    def __init__(self, role_id: int, name: str):
+        self.id = role_id
+        self.name = name
+
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str, bot: bool = False):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeMember(FakeUser):
+    def __init__(self, user_id: int, name: str, guild: "FakeGuild"):
+        super().__init__(user_id, name)
+        self.guild = guild
+        self.roles: List[FakeRole] = []
+
+    async def add_roles(self, *roles: FakeRole, reason: Optional[str] = None):
+        await self.guild.http.request("add_roles")
+        self.roles.extend(role for role in roles if role not in self.roles)
+
+    async def remove_roles(self, *roles: FakeRole, reason: Optional[str] = None):
+        await self.guild.http.request("remove_roles")
+        self.roles = [role for role in self.roles if role not in roles]
+
+
+class FakeChannel:
+    def __init__(
+        self,
+        channel_id: int,
+        name: str,
+        guild: "FakeGuild",
+        category: Optional["FakeCategory"] = None,
+    ):
+        self.id = channel_id
+        self.name = name
+        self.guild = guild
+        self.category = category
+
+    async def edit(self, *, name: Optional[str] = None, reason: Optional[str] = None):
+        await self.guild.http.request("edit_channel")
+        if name is not None:
+            self.name = name
+
+
+class FakeCategory(FakeChannel):
+    def __init__(self, channel_id: int, name: str, guild: "FakeGuild"):
+        super().__init__(channel_id, name, guild)
+        self.position = 0
+        self.voice_channels: List[FakeChannel] = []
+
+    async def edit(self, *, position: Optional[int] = None, **kwargs):
+        await self.guild.http.request("edit_channel")
+        if position is not None:
+            self.position = position
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, name: str, http: StubHTTP):
+        self.id = guild_id
+        self.name = name
+        self.http = http
+        self.members: Dict[int, FakeMember] = {}
+        self.channels: Dict[int, FakeChannel] = {}
+        self.categories: List[FakeCategory] = []
+        self.roles: List[FakeRole] = []
+        self.default_role = FakeRole(guild_id, "@everyone")
+
+    def get_member(self, user_id: int) -> Optional[FakeMember]:
+        return self.members.get(user_id)
+
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        return self.channels.get(channel_id)
+
+    def add_member(self, user_id: int) -> FakeMember:
+        member = self.members[user_id] = FakeMember(user_id, f"user{user_id}", self)
+        return member
+
+    def add_channel(self, channel_id: int, name: str) -> FakeChannel:
+        channel = self.channels[channel_id] = FakeChannel(channel_id, name, self)
+        return channel
+
+    async def create_category(self, *, name: str, **kwargs) -> FakeCategory:
+        await self.http.request("create_channel")
+        category = FakeCategory(snowflake(time.time()), name, self)
+        self.categories.append(category)
+        self.channels[category.id] = category
+        return category
+
+    async def create_voice_channel(
+        self, *, name: str, category: FakeCategory, **kwargs
+    ) -> FakeChannel:
+        await self.http.request("create_channel")
+        channel = FakeChannel(snowflake(time.time()), name, self)
+        channel.category = category
+        category.voice_channels.append(channel)
+        self.channels[channel.id] = channel
+        return channel
+
+
+class FakeAttachment:
+    def __init__(self, content_type: str):
+        self.content_type = content_type
+
+
+class FakeMessage:
+    def __init__(
+        self,
+        message_id: int,
+        author: FakeMember,
+        channel: FakeChannel,
+        content: str = "",
+        attachments: Optional[List[FakeAttachment]] = None,
+    ):
+        self.id = message_id
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild
+        self.content = content
+        self.attachments = attachments or []
+        # Read by commands.Context when the bot looks for a command prefix
+        self._state = None
+
+
+class FakeReaction:
+    def __init__(self, message: FakeMessage, emoji: str = "👍"):
+        self.message = message
+        self.emoji = emoji
+
+
+class StubInviteTracker:
+    """Attributes joins from the inviter recorded in the workload.
+
+    The real tracker batches joins behind a delay and fetches invites over
+    REST; here attribution is immediate and costs one stubbed request.
+    """
+
+    def __init__(self, http: StubHTTP):
+        self.http = http
+        self.inviters: Dict[int, Optional[FakeMember]] = {}
+
+    async def attribute_join(self, member: FakeMember) -> Optional[FakeMember]:
+        await self.http.request("fetch_invites")
+        return self.inviters.pop(member.id, None)
@@ -0,0 +1,470 @@
+"""
+Render benchmarks for the dashboard, mystats and leaderboard images.
+
+Renders each template from fixed fixture data and times the resulting HTML
+through one or more engines:
+
+- launch: the cogs' own _render_*_to_image paths, which start a browser
+  for every image
+- shared-browser: one browser kept open for the whole run, with a new page
+  per image (what a browser pool would do)
+
+Web fonts are dropped, avatars are inline images and Chart.js is replaced
+by a stub (or a local copy given with --chartjs), so runs are offline and
+repeatable. Needs Playwright with Chromium installed.
+
+Usage:
+    python -m benchmarks.render --json render.json
+    python -m benchmarks.render --targets mystats --concurrency 1,8 --baseline render.json
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, List, Optional
+from benchmarks import report as reports
+
+try:
+    import psutil
+except ImportError:  # process_tree_rss falls back to /proc
+    psutil = None
+
+BROWSER_ARGS = ["--no-sandbox", "--disable-dev-shm-usage"]
+RSS_SAMPLE_INTERVAL = 0.05
+# 1x1 grey PNG, scaled by the avatar CSS
+AVATAR_URL = (
+    "data:image/png;base64,"
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAADElEQVR4nGNoaGgAAAMEAYFL09IQAAAAAElFTkSuQmCC"
+)
+FONT_LINK = re.compile(r"<link[^>]*fonts\.(?:googleapis|gstatic)\.com[^>]*>")
+CHARTJS_SCRIPT = re.compile(
+    r'<script src="https://cdn\.jsdelivr\.net/npm/chart\.js"></script>'
+)
+CHARTJS_STUB = "<script>window.Chart = function () {};</script>"
+
+# A template's offline HTML, the cog coroutine that renders it to a PNG and
+# the element that coroutine crops to (None for the full page)
+Target = namedtuple("Target", "name html render selector")
+
+
+def fixture_user() -> Dict:
+    return {
+        "discord_id": 100_000_000_000_000_042,
+        "total_points": 12_480,
+        "level": 3,
+        "current_streak": 5,
+        "longest_streak": 12,
+        "name": "BenchmarkTrader",
+        "avatar_url": AVATAR_URL,
+        "role": "Pit Novice",
+        "join_date": "Jan 12, 2024",
+        "rank": 42,
+    }
+
+
+def fixture_progress() -> Dict:
+    return {
+        "level_percentage": 49,
+        "daily_percentage": 75,
+        "next_level_points": 15_000,
+        "daily_limit": 100,
+        "next_reward": "Next reward: 15% discount at 15,000 points",
+        "current_level": 3,
+    }
+
+
+def fixture_dashboard() -> Dict:
+    """Template data shaped like DashboardCommands._get_user_dashboard_data."""
+    weekly = {
+        "messages": [45, 52, 38, 67, 89, 23, 41],
+        "reactions": [12, 18, 15, 22, 31, 8, 14],
+        "attachments": [3, 5, 2, 8, 12, 1, 4],
+        "invites": [0, 1, 0, 2, 0, 1, 0],
+    }
+    return {
+        "user": fixture_user(),
+        "stats": {
+            "messages": 1820,
+            "reactions": 890,
+            "attachments": 156,
+            "referrals": 12,
+            "referral_points": 2400,
+            "daily_points": 75,
+            "streak": 5,
+            "total_users": 2300,
+        },
+        "server": {"name": "Benchmark Server", "icon_url": AVATAR_URL},
+        "leaderboard": [
+            (1, "Alpha", 98_200),
+            (2, "Bravo", 87_050),
+            (3, "Charlie", 64_310),
+        ],
+        "progress": fixture_progress(),
+        "activity_data": weekly,
+        "activity_labels": ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"],
+        "timestamp": "January 01, 2025 at 12:00 PM",
+    }
+
+
+def fixture_mystats() -> Dict:
+    """Template data shaped like DashboardCommands._get_user_mystats_data."""
+    return {
+        "user": fixture_user(),
+        "server": {"name": "Benchmark Server", "icon_url": AVATAR_URL},
+        "progress": fixture_progress(),
+        "timestamp": "January 01, 2025 at 12:00 PM",
+    }
+
+
+def fixture_leaderboard() -> Dict:
+    """Template data shaped like SlashLeaderboardCommands._get_leaderboard_data."""
+    leaderboard = [
+        {
+            "rank": rank,
+            "discord_id": 100_000_000_000_000_000 + rank,
+            "username": f"Trader{rank:02d}",
+            "avatar_url": AVATAR_URL,
+            "messages": 5000 - rank * 310,
+            "reactions": 2400 - rank * 150,
+            "images": 300 - rank * 20,
+            "invites": 40 - rank * 3,
+            "total_xp": 100_000 - rank * 7_500,
+            "is_current_user": rank == 4,
+        }
+        for rank in range(1, 11)
+    ]
+    return {
+        "leaderboard": leaderboard,
+        "current_user": leaderboard[3],
+        "server_name": "Benchmark Server",
+        "timestamp": "January 01, 2025 at 12:00 PM",
+    }
+
+
+def offline_html(html: str, chartjs: Optional[str] = None) -> str:
+    """Strip network fetches from rendered HTML."""
+    html = FONT_LINK.sub("", html)
+    script = (
+        f'<script src="{Path(chartjs).resolve().as_uri()}"></script>'
+        if chartjs
+        else CHARTJS_STUB
+    )
+    return CHARTJS_SCRIPT.sub(lambda _: script, html)
+
+
+def build_targets(chartjs: Optional[str] = None) -> Dict[str, Target]:
+    """Render the fixtures the same way the cogs render live data."""
+    from src.commands.slash_dashboard import DashboardCommands
+    from src.commands.slash_leaderboard import SlashLeaderboardCommands
+
+    dashboard_cog = DashboardCommands(None)
+    leaderboard_cog = SlashLeaderboardCommands(None)
+
+    dashboard_html = dashboard_cog._create_complete_html(
+        dashboard_cog.env.get_template("dashboard.html").render(**fixture_dashboard())
+    )
+    mystats_html = dashboard_cog.env.get_template("mystats_standalone.html").render(
+        **fixture_mystats(), css_content=dashboard_cog.css_content
+    )
+    leaderboard_html = leaderboard_cog.env.get_template(
+        "leaderboard_standalone.html"
+    ).render(**fixture_leaderboard(), css_content=leaderboard_cog.css_content)
+
+    return {
+        "dashboard": Target(
+            "dashboard",
+            offline_html(dashboard_html, chartjs),
+            dashboard_cog._render_html_to_image,
+            None,
+        ),
+        "mystats": Target(
+            "mystats",
+            offline_html(mystats_html, chartjs),
+            dashboard_cog._render_mystats_to_image,
+            ".header-section",
+        ),
+        "leaderboard": Target(
+            "leaderboard",
+            offline_html(leaderboard_html, chartjs),
+            leaderboard_cog._render_leaderboard_to_image,
+            ".leaderboard-container",
+        ),
+    }
+
+
+class LaunchEngine:
+    """The cogs' render paths as they are: a fresh browser per image."""
+
+    async def start(self):
+        pass
+
+    async def render(self, target: Target, output_path: Path):
+        await target.render(target.html, output_path)
+
+    async def close(self):
+        pass
+
+
+class SharedBrowserEngine:
+    """One browser for the whole run; every image gets its own page."""
+
+    async def start(self):
+        from playwright.async_api import async_playwright
+
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(
+            headless=True, args=BROWSER_ARGS
+        )
+
+    async def render(self, target: Target, output_path: Path):
+        page = await self.browser.new_page()
+        try:
+            await page.set_content(target.html, wait_until="networkidle")
+            element = (
+                await page.query_selector(target.selector) if target.selector else None
+            )
+            if element:
+                await element.screenshot(path=str(output_path), type="png")
+            else:
+                await page.screenshot(path=str(output_path), full_page=True, type="png")
+        finally:
+            await page.close()
+
+    async def close(self):
+        await self.browser.close()
+        await self.playwright.stop()
+
+
+ENGINES = {"launch": LaunchEngine, "shared-browser": SharedBrowserEngine}
+
+
+def process_tree_rss() -> Optional[int]:
+    """Resident bytes of this process and all its descendants (browsers too)."""
+    if psutil:
+        root = psutil.Process()
+        total = 0
+        for process in [root, *root.children(recursive=True)]:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    if not os.path.isdir("/proc"):
+        return None
+    # Without psutil, walk /proc (Linux only)
+    parents, rss = {}, {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            parents[int(entry)] = int(fields[1])
+            rss[int(entry)] = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, IndexError, ValueError):
+            pass
+    tree, frontier = {os.getpid()}, [os.getpid()]
+    while frontier:
+        pid = frontier.pop()
+        for child, parent in parents.items():
+            if parent == pid and child not in tree:
+                tree.add(child)
+                frontier.append(child)
+    return sum(rss.get(pid, 0) for pid in tree)
+
+
+class RssSampler:
+    """Tracks the peak process tree RSS while a block of renders runs."""
+
+    async def __aenter__(self):
+        self.peak = process_tree_rss()
+        self._task = asyncio.create_task(self._sample())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        self._record()
+
+    def _record(self):
+        rss = process_tree_rss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    async def _sample(self):
+        while True:
+            await asyncio.sleep(RSS_SAMPLE_INTERVAL)
+            await asyncio.to_thread(self._record)
+
+    @property
+    def peak_mb(self) -> Optional[float]:
+        return round(self.peak / 1024 / 1024, 1) if self.peak is not None else None
+
+
+async def timed_render(engine, target: Target, output_path: Path) -> float:
+    started = time.perf_counter()
+    await engine.render(target, output_path)
+    return time.perf_counter() - started
+
+
+async def bench_target(
+    engine_name: str, target: Target, args, output_dir: Path
+) -> Dict:
+    engine = ENGINES[engine_name]()
+    prefix = output_dir / f"{target.name}_{engine_name}"
+    try:
+        # Cold: engine start-up plus the first image
+        async with RssSampler() as rss:
+            started = time.perf_counter()
+            await engine.start()
+            first_path = Path(f"{prefix}_cold.png")
+            await engine.render(target, first_path)
+            cold = time.perf_counter() - started
+        result = {
+            "cold_ms": round(cold * 1000, 3),
+            "cold_peak_rss_mb": rss.peak_mb,
+            "png_bytes": first_path.stat().st_size,
+        }
+
+        async with RssSampler() as rss:
+            latencies = [
+                await timed_render(engine, target, Path(f"{prefix}_warm{i}.png"))
+                for i in range(args.warm)
+            ]
+        result["warm"] = {**reports.summarize(latencies), "peak_rss_mb": rss.peak_mb}
+
+        result["concurrency"] = {}
+        for concurrency in args.concurrency:
+            renders = max(args.renders, concurrency)
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def render_one(i: int) -> float:
+                async with semaphore:
+                    return await timed_render(
+                        engine, target, Path(f"{prefix}_c{concurrency}_{i}.png")
+                    )
+
+            async with RssSampler() as rss:
+                started = time.perf_counter()
+                latencies = await asyncio.gather(
+                    *(render_one(i) for i in range(renders))
+                )
+                elapsed = time.perf_counter() - started
+            result["concurrency"][str(concurrency)] = {
+                "throughput_per_s": round(renders / elapsed, 2),
+                **reports.summarize(latencies),
+                "peak_rss_mb": rss.peak_mb,
+            }
+        return result
+    finally:
+        await engine.close()
+
+
+async def run(args, output_dir: Path) -> Dict:
+    targets = build_targets(args.chartjs)
+    results: Dict[str, Dict] = {}
+    for target_name in args.targets:
+        for engine_name in args.engines:
+            print(f"Rendering {target_name} with {engine_name}...")
+            result = await bench_target(
+                engine_name, targets[target_name], args, output_dir
+            )
+            results.setdefault(target_name, {})[engine_name] = result
+            print_result(result)
+    return results
+
+
+def print_result(result: Dict):
+    print(
+        f"  cold {result['cold_ms']:,.0f} ms, warm p50 {result['warm']['p50_ms']:,.0f} ms,"
+        f" png {result['png_bytes']:,} bytes"
+    )
+    for concurrency, stats in result["concurrency"].items():
+        rss = f"{stats['peak_rss_mb']:,.0f} MB" if stats["peak_rss_mb"] else "n/a"
+        print(
+            f"  x{concurrency:<3} {stats['throughput_per_s']:>7.2f} images/s,"
+            f" p95 {stats['p95_ms']:,.0f} ms, peak RSS {rss}"
+        )
+
+
+def parse_list(text: str, choices: List[str]) -> List[str]:
+    values = [value.strip() for value in text.split(",") if value.strip()]
+    unknown = [value for value in values if value not in choices]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown {', '.join(unknown)} (choose from {', '.join(choices)})"
+        )
+    return values
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dashboard image rendering")
+    targets = ["dashboard", "mystats", "leaderboard"]
+    parser.add_argument(
+        "--targets",
+        type=lambda text: parse_list(text, targets),
+        default=targets,
+        help="Comma separated templates to render",
+    )
+    parser.add_argument(
+        "--engines",
+        type=lambda text: parse_list(text, list(ENGINES)),
+        default=list(ENGINES),
+        help="Comma separated render engines",
+    )
+    parser.add_argument(
+        "--warm", type=int, default=5, help="Sequential renders after the cold one"
+    )
+    parser.add_argument(
+        "--renders", type=int, default=16, help="Renders per concurrency level"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=lambda text: [int(value) for value in text.split(",")],
+        default=[1, 4, 16],
+        help="Comma separated concurrent render counts",
+    )
+    parser.add_argument("--chartjs", help="Local Chart.js file for the dashboard")
+    parser.add_argument("--keep-images", help="Directory to keep the PNGs in")
+    parser.add_argument("--json", help="Write the report as JSON")
+    parser.add_argument("--baseline", help="Compare against a JSON report")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output_dir = Path(args.keep_images or tempfile.mkdtemp(prefix="bench_render_"))
+    output_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        results = asyncio.run(run(args, output_dir))
+    finally:
+        if not args.keep_images:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    report = {
+        "benchmark": "render",
+        "environment": reports.environment(),
+        "profile": {
+            "targets": args.targets,
+            "engines": args.engines,
+            "warm": args.warm,
+            "renders": args.renders,
+            "concurrency": args.concurrency,
+            "chartjs": bool(args.chartjs),
+        },
+        "results": results,
+    }
+    if args.json:
+        reports.write_report(args.json, report)
+    if args.baseline:
+        reports.compare(report, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
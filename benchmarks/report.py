@@ -0,0 +1,82 @@
+"""
+Benchmark reports: latency summaries, database size and baseline comparison.
+"""
+
+import json
+import os
+import platform
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+
+def summarize(latencies: List[float]) -> Dict:
+    """Count, mean and nearest-rank percentiles of latencies (seconds) in ms."""
+    if not latencies:
+        return {"count": 0}
+    values = sorted(latencies)
+
+    def percentile(p: float) -> float:
+        rank = max(0, min(len(values) - 1, int(round(p / 100 * len(values))) - 1))
+        return round(values[rank] * 1000, 3)
+
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3),
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "max_ms": round(values[-1] * 1000, 3),
+    }
+
+
+def db_size(path: str) -> int:
+    """Bytes used by a database, after folding its WAL back into the file."""
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    return sum(os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p))
+
+
+def environment() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def write_report(path: str, report: Dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def _flatten(data: Dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(report: Dict, baseline_path: str, sections: Optional[List[str]] = None):
+    """Print how each numeric result moved relative to a baseline report."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    sections = sections or ["results"]
+    current = _flatten({s: report.get(s, {}) for s in sections})
+    previous = _flatten({s: baseline.get(s, {}) for s in sections})
+
+    print(f"\nCompared with {baseline_path}:")
+    for name, value in current.items():
+        old = previous.get(name)
+        if old is None:
+            continue
+        change = f"{(value - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"  {name:<45} {old:>14,.3f} -> {value:>14,.3f}  {change}")
@@ -0,0 +1,123 @@
+"""
+Synthetic gateway workloads.
+
+A workload is a world description (guilds, users, channels) plus an ordered
+list of events. It is generated from a seed, and can be saved as JSONL and
+replayed, so runs before and after a change see exactly the same traffic.
+"""
+
+import json
+import random
+from typing import Dict, List, Tuple
+
+DEFAULT_EVENT_MIX = {"message": 0.7, "reaction": 0.25, "join": 0.05}
+DEFAULT_MESSAGE_KINDS = {"text": 0.8, "url": 0.1, "image": 0.1}
+# Reactions target one of the most recent messages
+REACTION_WINDOW = 200
+# Share of joins with no known inviter (vanity URL, expired invite, ...)
+UNATTRIBUTED_JOIN_RATE = 0.1
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parse "a=0.7,b=0.3" into a weight mapping."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def channel_kinds(
+    channels: int, tracked_ratio: float, campaign_ratio: float
+) -> List[str]:
+    """Kind of each channel: "campaign", "tracked" or "untracked"."""
+    campaign = round(channels * campaign_ratio)
+    tracked = max(0, round(channels * tracked_ratio) - campaign)
+    untracked = max(0, channels - campaign - tracked)
+    return ["campaign"] * campaign + ["tracked"] * tracked + ["untracked"] * untracked
+
+
+def generate_events(
+    world: Dict,
+    count: int,
+    seed: int,
+    event_mix: Dict[str, float],
+    message_kinds: Dict[str, float],
+    skew: float = 1.0,
+) -> List[Dict]:
+    """Generate a replayable event sequence for a world.
+
+    Users are picked as ``users * random() ** skew``, so skew > 1 concentrates
+    activity on a few heavy users. Joined members become active users.
+    """
+    rng = random.Random(seed)
+    # Per-guild user indexes; joined members are appended
+    users = [list(range(world["users"])) for _ in range(world["guilds"])]
+    next_user = world["users"]
+    recent: List[Tuple[int, int, int]] = []  # (guild, channel, message seq)
+    events = []
+    message_seq = 0
+
+    for _ in range(count):
+        event_type = rng.choices(list(event_mix), weights=list(event_mix.values()))[0]
+        guild = rng.randrange(world["guilds"])
+
+        if event_type == "reaction" and recent:
+            guild, channel, message = rng.choice(recent[-REACTION_WINDOW:])
+            events.append(
+                {
+                    "type": "reaction",
+                    "guild": guild,
+                    "user": _pick_user(rng, users[guild], skew),
+                    "channel": channel,
+                    "message": message,
+                }
+            )
+        elif event_type == "join":
+            inviter = (
+                None
+                if rng.random() < UNATTRIBUTED_JOIN_RATE
+                else _pick_user(rng, users[guild], skew)
+            )
+            events.append(
+                {"type": "join", "guild": guild, "user": next_user, "inviter": inviter}
+            )
+            users[guild].append(next_user)
+            next_user += 1
+        else:
+            channel = rng.randrange(world["channels"])
+            kind = rng.choices(
+                list(message_kinds), weights=list(message_kinds.values())
+            )[0]
+            events.append(
+                {
+                    "type": "message",
+                    "guild": guild,
+                    "user": _pick_user(rng, users[guild], skew),
+                    "channel": channel,
+                    "message": message_seq,
+                    "kind": kind,
+                }
+            )
+            recent.append((guild, channel, message_seq))
+            message_seq += 1
+    return events
+
+
+def _pick_user(rng: random.Random, members: List[int], skew: float) -> int:
+    return members[min(len(members) - 1, int(len(members) * rng.random() ** skew))]
+
+
+def save_trace(path: str, world: Dict, events: List[Dict]):
+    """Write a world header line followed by one event per line."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"world": world}) + "\n")
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+
+
+def load_trace(path: str) -> Tuple[Dict, List[Dict]]:
+    with open(path, encoding="utf-8") as f:
+        world = json.loads(f.readline())["world"]
+        events = [json.loads(line) for line in f if line.strip()]
+    return world, events
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Sharded Launcher
+Runs the bot as several processes, each owning a contiguous range of shards.
+All processes share the SQLite database (WAL mode); bot-wide jobs such as
+notification delivery are held by one process at a time through leases.
+
+Usage: python launcher.py --shards 8 --processes 2
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import List
+
+
+def shard_ranges(shard_count: int, processes: int) -> List[List[int]]:
+    """Split shard ids 0..shard_count-1 into contiguous per-process ranges."""
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    ranges, start = [], 0
+    for i in range(processes):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the bot across shard processes")
+    parser.add_argument("--shards", type=int, required=True, help="Total shard count")
+    parser.add_argument(
+        "--processes", type=int, default=1, help="Number of bot processes"
+    )
+    args = parser.parse_args()
+
+    # Migrate once up front so shard processes don't race on schema changes
+    from src.core import setup_db
+    from src.core.migration_manager import run_migrations
+    import logging
+
+    logging.basicConfig(level=logging.INFO)
+    setup_db.setup(logging.getLogger(__name__))
+    if not run_migrations():
+        sys.exit(1)
+
+    children = []
+    for i, shard_ids in enumerate(shard_ranges(args.shards, args.processes)):
+        env = dict(
+            os.environ,
+            SHARDED="true",
+            SHARD_COUNT=str(args.shards),
+            SHARD_IDS=",".join(str(s) for s in shard_ids),
+            PROCESS_ID=f"shard-process-{i}",
+        )
+        if os.getenv("METRICS_PORT"):
+            # Each process serves its own metrics on the next port up
+            env["METRICS_PORT"] = str(int(os.environ["METRICS_PORT"]) + i)
+        print(f"🚀 Starting process {i} with shards {shard_ids}")
+        children.append(subprocess.Popen([sys.executable, "main.py"], env=env))
+
+    try:
+        # Exit (and stop the rest) as soon as any process dies
+        while all(child.poll() is None for child in children):
+            time.sleep(5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for child in children:
+            if child.poll() is None:
+                child.terminate()
+        for child in children:
+            child.wait()
+
+
+if __name__ == "__main__":
+    main()
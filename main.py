@@ -12,7 +12,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from src.core.database import Database
-import src.utils.utils as utils
+from src.core import metrics, tracing
 import src.core.config as config
 import src.core.setup_db as setup_db
 
@@ -36,9 +36,24 @@ intents.message_content = True
 intents.reactions = True
 intents.invites = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Counts Discord API requests and 429s for the metrics endpoint
+http_trace = metrics.http_trace() if config.METRICS_PORT else None
+if config.TRACE_EXPORTER:
+    # Discord API requests made while handling a traced event become spans
+    http_trace = tracing.http_trace(http_trace)
+
+if config.SHARDED:
+    # Without SHARD_IDS this process runs every shard; the launcher splits them up
+    bot = commands.AutoShardedBot(
+        command_prefix="!",
+        intents=intents,
+        shard_count=config.SHARD_COUNT,
+        shard_ids=config.SHARD_IDS,
+        http_trace=http_trace,
+    )
+else:
+    bot = commands.Bot(command_prefix="!", intents=intents, http_trace=http_trace)
 dao = Database()
-invites = {}
 
 URL_REGEX = re.compile(r"https?://\S+")
 
@@ -47,13 +62,17 @@ URL_REGEX = re.compile(r"https?://\S+")
 async def on_ready():
     logger.info(f"✅ {bot.user} is ready!")
     logger.info(f"📊 Connected to {len(bot.guilds)} guild(s)")
+    if config.SHARDED:
+        logger.info(f"🧩 Running shards {sorted(bot.shards)} of {bot.shard_count}")
 
     # Run database migration
     try:
         from src.core.migration_manager import run_migrations
 
         logger.info("🔄 Running database migrations...")
-        success = run_migrations()
+        # Data from before per-guild partitioning belongs to the only guild
+        default_guild_id = bot.guilds[0].id if len(bot.guilds) == 1 else None
+        success = run_migrations(default_guild_id)
         if success:
             logger.info("✅ Database migrations completed successfully!")
         else:
@@ -61,6 +80,9 @@ async def on_ready():
     except Exception as e:
         logger.error(f"❌ Error during migration: {e}")
 
+    for guild in bot.guilds:
+        dao.ensure_guild(guild.id)
+
     # Load Cogs
     extensions = [
         "src.commands.slash_points",
@@ -79,6 +101,14 @@ async def on_ready():
         "src.commands.slash_dashboard",
         "src.core.role_manager",
         "src.core.voice_channel_display",
+        "src.core.invite_tracker",
+        "src.core.dm_resolver",
+        "src.core.notification_dispatcher",
+        "src.core.milestone_digest",
+        "src.core.engagement_retention",
+        "src.core.backup_service",
+        "src.core.metrics_server",
+        "src.core.trace_exporter",
     ]
 
     for ext in extensions:
@@ -100,12 +130,10 @@ async def on_ready():
     except Exception as e:
         logger.error(f"❌ Failed to sync slash commands: {e}")
 
-    # Start invite cache update
-    if not update_invite_cache.is_running():
-        update_invite_cache.start()
-
     # Auto-assign roles for all guilds after everything is loaded
-    auto_assign_roles = dao.get_config("auto_assign_roles_on_startup")
+    auto_assign_roles = dao.get_config(
+        config.GLOBAL_GUILD_ID, "auto_assign_roles_on_startup"
+    )
     if auto_assign_roles != "false":  # Default to true unless explicitly set to false
         logger.info("🔄 Starting automatic role assignment for all guilds...")
         for guild in bot.guilds:
@@ -127,91 +155,55 @@ async def on_ready():
 
 def is_admin():
     async def predicate(ctx):
-        return dao.is_admin(str(ctx.author.id))
+        return ctx.guild is not None and dao.is_admin(ctx.guild.id, ctx.author.id)
 
     return check(predicate)
 
 
-async def check_and_notify_milestone(discord_id: str):
-    milestone = dao.get_next_milestone(discord_id)
+@tracing.traced("check_and_notify_milestone")
+async def check_and_notify_milestone(
+    guild_id: int, discord_id: int, points: int = None
+):
+    milestone = dao.get_next_milestone(guild_id, discord_id, points)
     if milestone:
         reward_code = "".join(
             random.choices(string.ascii_uppercase + string.digits, k=5)
         )
-        dao.record_milestone(discord_id, milestone, reward_code)
 
-        # Update user's level to the milestone value
-        dao.update_user_level(discord_id, milestone)
-
-        # Try to notify the user via DM
-        user = await bot.fetch_user(int(discord_id))
-        try:
-            msg = (
-                dao.get_milestone_message(milestone)
-                or f"🎉 Congrats! You've reached a milestone of {milestone} points!"
-            )
-            await user.send(msg)
-            logger.info(
-                f"[MILESTONE] {user} reached {milestone} points and was notified."
-            )
-            dao.mark_milestone_user_notified(discord_id, milestone)
-        except discord.Forbidden:
-            logger.info(f"[DM ERROR] Couldn't DM {user} - DMs disabled")
-        except Exception as e:
-            logger.info(f"[DM ERROR] Couldn't DM {user}: {e}")
+        user_msg = (
+            dao.get_milestone_message(guild_id, milestone)
+            or f"🎉 Congrats! You've reached a milestone of {milestone} points!"
+        )
 
-        # Try to notify admins
-        try:
-            channel_id = dao.get_config("notification_channel_id")
-            if channel_id:
-                admin_channel = bot.get_channel(int(channel_id))
-                if admin_channel:
-                    # Get milestone details for role information
-                    milestone_details = dao.get_milestone_details(milestone)
-                    role_info = ""
-                    if milestone_details and milestone_details.get("role_name"):
-                        role_info = f"\nRole: {milestone_details['role_name']}"
-
-                    await admin_channel.send(
-                        f"📢 **Milestone Reached**\nUser: <@{discord_id}>\nMilestone: {milestone}{role_info}\nReward Code: `{reward_code}`"
-                    )
-                    dao.mark_milestone_admin_notified(discord_id, milestone)
-                else:
-                    logger.warning(
-                        f"[ADMIN CHANNEL ERROR] Admin channel {channel_id} not found or inaccessible"
-                    )
-            else:
-                logger.warning("[ADMIN CHANNEL ERROR] No admin channel configured")
-        except Exception as e:
-            logger.warning(f"[ADMIN CHANNEL ERROR] {e}")
+        # Record the milestone and queue the user DM; the notification
+        # dispatcher delivers it and admins get it in the next milestone digest
+        dao.record_milestone(
+            guild_id,
+            discord_id,
+            milestone,
+            reward_code,
+            notifications=[("user_dm", user_msg)],
+        )
+        logger.info(f"[MILESTONE] {discord_id} reached {milestone} points (queued)")
 
-            # Fallback: Try to DM the first admin (but don't crash if it fails)
-            try:
-                admin_ids = dao.get_all_admin_ids()
-                if admin_ids:
-                    admin_user = await bot.fetch_user(int(admin_ids[0]))
-                    await admin_user.send(
-                        f"⚠️ **Milestone Reached but No Admin Channel Configured**\n\n"
-                        f"User: <@{discord_id}>\nMilestone: {milestone}\nReward Code: `{reward_code}`\n\n"
-                        f"Please set a proper admin notification channel using:\n"
-                        f"`!setconfig notification_channel_id <channel_id>`"
-                    )
-            except discord.Forbidden:
-                logger.warning(f"[ADMIN DM ERROR] Couldn't DM admin - DMs disabled")
-            except Exception as e:
-                logger.warning(f"[ADMIN DM ERROR] Couldn't DM admin: {e}")
+        # Update user's level to the milestone value
+        dao.update_user_level(guild_id, discord_id, milestone)
 
 
 # 1. Track messages
 @bot.event
+@tracing.traced_event("on_message")
 async def on_message(message):
+    metrics.events_processed.inc("message")
     if message.author.bot:
         return
 
-    if dao.is_tracked_channel(str(message.channel.id)):
-        user_id = str(message.author.id)
-        channel_id = str(message.channel.id)
-        message_id = str(message.id)
+    if message.guild and dao.is_tracked_channel(message.guild.id, message.channel.id):
+        guild_id = message.guild.id
+        user_id = message.author.id
+        channel_id = message.channel.id
+        message_id = message.id
+        tracing.tracer.annotate(guild_id=guild_id, user_id=user_id)
 
         logged = False  # flag to prevent double logging
 
@@ -221,70 +213,79 @@ async def on_message(message):
                 if attachment.content_type and attachment.content_type.startswith(
                     "image/"
                 ):
-                    image_points = int(dao.get_config("points_per_image") or 10)
+                    image_points = int(
+                        dao.get_config(guild_id, "points_per_image") or 10
+                    )
 
                     # Apply campaign multiplier if channel is a campaign channel
-                    campaign_multiplier = dao.get_campaign_multiplier(channel_id)
+                    campaign_multiplier = dao.get_campaign_multiplier(
+                        guild_id, channel_id
+                    )
                     if campaign_multiplier > 1.0:
                         image_points = int(image_points * campaign_multiplier)
                         logger.info(
                             f"[CAMPAIGN] {message.author} earned {image_points} points (base: {int(image_points/campaign_multiplier)}, multiplier: {campaign_multiplier}x)"
                         )
 
-                    if dao.can_earn_points(user_id, image_points):
-                        dao.add_points_to_member(user_id, image_points)
+                    if dao.can_earn_points(guild_id, user_id, image_points):
+                        dao.add_points_to_member(guild_id, user_id, image_points)
                         dao.log_engagement(
-                            user_id, "image", message_id, channel_id, image_points
+                            guild_id,
+                            user_id,
+                            "image",
+                            message_id,
+                            channel_id,
+                            image_points,
                         )
                         logged = True
                     break  # log once per message
 
         # 2. Track shared URL
         elif URL_REGEX.search(message.content):
-            share_points = int(dao.get_config("points_per_share") or 50)
+            share_points = int(dao.get_config(guild_id, "points_per_share") or 50)
 
             # Apply campaign multiplier if channel is a campaign channel
-            campaign_multiplier = dao.get_campaign_multiplier(channel_id)
+            campaign_multiplier = dao.get_campaign_multiplier(guild_id, channel_id)
             if campaign_multiplier > 1.0:
                 share_points = int(share_points * campaign_multiplier)
                 logger.info(
                     f"[CAMPAIGN] {message.author} earned {share_points} points (base: {int(share_points/campaign_multiplier)}, multiplier: {campaign_multiplier}x)"
                 )
 
-            if dao.can_earn_points(user_id, share_points):
-                dao.add_points_to_member(user_id, share_points)
+            if dao.can_earn_points(guild_id, user_id, share_points):
+                dao.add_points_to_member(guild_id, user_id, share_points)
                 dao.log_engagement(
-                    user_id, "share", message_id, channel_id, share_points
+                    guild_id, user_id, "share", message_id, channel_id, share_points
                 )
                 logged = True
 
         # 3. Fallback to regular message if no image or URL
         if not logged:
-            message_points = int(dao.get_config("points_per_message") or 5)
+            message_points = int(dao.get_config(guild_id, "points_per_message") or 5)
 
             # Apply campaign multiplier if channel is a campaign channel
-            campaign_multiplier = dao.get_campaign_multiplier(channel_id)
+            campaign_multiplier = dao.get_campaign_multiplier(guild_id, channel_id)
             if campaign_multiplier > 1.0:
                 message_points = int(message_points * campaign_multiplier)
                 logger.info(
                     f"[CAMPAIGN] {message.author} earned {message_points} points (base: {int(message_points/campaign_multiplier)}, multiplier: {campaign_multiplier}x)"
                 )
 
-            if dao.can_earn_points(user_id, message_points):
-                dao.add_points_to_member(user_id, message_points)
+            if dao.can_earn_points(guild_id, user_id, message_points):
+                dao.add_points_to_member(guild_id, user_id, message_points)
                 dao.log_engagement(
-                    user_id, "message", message_id, channel_id, message_points
+                    guild_id, user_id, "message", message_id, channel_id, message_points
                 )
 
         # Update user's level based on new points
-        current_points = dao.get_user_points(user_id)
-        dao.update_user_level(user_id, current_points)
+        current_points = dao.get_user_points(guild_id, user_id)
+        dao.update_user_level(guild_id, user_id, current_points)
 
         # Update streak tracking
-        dao.update_streak(user_id)
+        dao.update_streak(guild_id, user_id)
 
         # Check for milestone
-        await check_and_notify_milestone(user_id)
+        await check_and_notify_milestone(guild_id, user_id, current_points)
 
         # Check for role assignment/downgrading
         if hasattr(bot, "role_manager"):
@@ -299,42 +300,50 @@ async def on_message(message):
 
 # 2. Track reactions
 @bot.event
+@tracing.traced_event("on_reaction_add")
 async def on_reaction_add(reaction, user):
+    metrics.events_processed.inc("reaction_add")
     if user.bot:
         return
 
-    user_id = str(user.id)
-    message_id = str(reaction.message.id)
-    channel_id = str(reaction.message.channel.id)
+    if reaction.message.guild is None:
+        return
+
+    guild_id = reaction.message.guild.id
+    user_id = user.id
+    message_id = reaction.message.id
+    channel_id = reaction.message.channel.id
+    tracing.tracer.annotate(guild_id=guild_id, user_id=user_id)
 
-    if dao.is_tracked_channel(channel_id):
-        if not dao.has_user_reacted_to_message(user_id, message_id):
-            POINT_VALUE = int(dao.get_config("points_per_reaction") or 5)
+    if dao.is_tracked_channel(guild_id, channel_id):
+        # Known repeat reactions are skipped from memory; the unique insert below decides the rest
+        if not dao.is_reaction_known(user_id, message_id):
+            POINT_VALUE = int(dao.get_config(guild_id, "points_per_reaction") or 5)
 
             # Apply campaign multiplier if channel is a campaign channel
-            campaign_multiplier = dao.get_campaign_multiplier(channel_id)
+            campaign_multiplier = dao.get_campaign_multiplier(guild_id, channel_id)
             if campaign_multiplier > 1.0:
                 POINT_VALUE = int(POINT_VALUE * campaign_multiplier)
                 logger.info(
                     f"[CAMPAIGN] {user} earned {POINT_VALUE} points for reaction (base: {int(POINT_VALUE/campaign_multiplier)}, multiplier: {campaign_multiplier}x)"
                 )
 
-            if dao.can_earn_points(user_id, POINT_VALUE):
-                dao.add_points_to_member(user_id, POINT_VALUE)
-                dao.log_engagement(
-                    user_id, "reaction", message_id, channel_id, POINT_VALUE
-                )
+            if dao.can_earn_points(
+                guild_id, user_id, POINT_VALUE
+            ) and dao.award_engagement_once(
+                guild_id, user_id, "reaction", message_id, channel_id, POINT_VALUE
+            ):
                 logger.info(f"[INFO] Reaction logged and points awarded to {user.name}")
 
                 # Update user's level based on new points
-                current_points = dao.get_user_points(user_id)
-                dao.update_user_level(user_id, current_points)
+                current_points = dao.get_user_points(guild_id, user_id)
+                dao.update_user_level(guild_id, user_id, current_points)
 
                 # Update streak tracking
-                dao.update_streak(user_id)
+                dao.update_streak(guild_id, user_id)
 
                 # Check for milestone
-                await check_and_notify_milestone(user_id)
+                await check_and_notify_milestone(guild_id, user_id, current_points)
 
                 # Check for role assignment/downgrading
                 if hasattr(bot, "role_manager"):
@@ -349,68 +358,67 @@ async def on_reaction_add(reaction, user):
                     )
 
 
+@bot.event
+async def on_guild_join(guild):
+    dao.ensure_guild(guild.id)
+
+
 # 3. Track invites (when new member joins)
 @bot.event
+@tracing.traced_event("on_member_join")
 async def on_member_join(member):
+    metrics.events_processed.inc("member_join")
     try:
-        guild_id = member.guild.id
-        invites_before = invites.get(guild_id, [])
-        invites_after = await member.guild.invites()
+        if not hasattr(bot, "invite_tracker"):
+            return
+        inviter = await bot.invite_tracker.attribute_join(member)
 
-        for old_invite in invites_before:
-            new_invite = utils.find_invite_by_code(invites_after, old_invite.code)
-
-            if new_invite and new_invite.uses > old_invite.uses:
-                inviter = old_invite.inviter
-                inviter_id = str(inviter.id)
-                invitee_id = str(member.id)
-                invite_key = f"invite_{invitee_id}"
+        if inviter:
+            guild_id = member.guild.id
+            inviter_id = inviter.id
+            invitee_id = member.id
 
+            POINT_VALUE = int(dao.get_config(guild_id, "points_per_invite") or 1000)
+            if dao.can_earn_points(guild_id, inviter_id, POINT_VALUE):
                 # Only award points if this inviter hasn't already invited this member
-                if not dao.has_invited_before(inviter_id, invitee_id):
-                    POINT_VALUE = int(dao.get_config("points_per_invite") or 1000)
-                    if dao.can_earn_points(inviter_id, POINT_VALUE):
-                        dao.add_points_to_member(inviter_id, POINT_VALUE)
-                        dao.log_engagement(
-                            inviter_id, "invite", invite_key, "N/A", POINT_VALUE
-                        )
-                        logger.info(
-                            f"[INFO] {inviter} earned {POINT_VALUE} points for inviting {member}"
-                        )
+                if dao.award_engagement_once(
+                    guild_id, inviter_id, "invite", invitee_id, None, POINT_VALUE
+                ):
+                    logger.info(
+                        f"[INFO] {inviter} earned {POINT_VALUE} points for inviting {member}"
+                    )
 
-                        # Update user's level based on new points
-                        current_points = dao.get_user_points(inviter_id)
-                        dao.update_user_level(inviter_id, current_points)
+                    # Update user's level based on new points
+                    current_points = dao.get_user_points(guild_id, inviter_id)
+                    dao.update_user_level(guild_id, inviter_id, current_points)
 
-                        # Update streak tracking
-                        dao.update_streak(inviter_id)
+                    # Update streak tracking
+                    dao.update_streak(guild_id, inviter_id)
 
-                        # Check for milestone
-                        await check_and_notify_milestone(inviter_id)
+                    # Check for milestone
+                    await check_and_notify_milestone(
+                        guild_id, inviter_id, current_points
+                    )
 
-                        # Check for role assignment/downgrading
-                        if hasattr(bot, "role_manager"):
-                            await bot.role_manager.check_and_assign_roles(
-                                inviter_id, member.guild
-                            )
+                    # Check for role assignment/downgrading
+                    if hasattr(bot, "role_manager"):
+                        await bot.role_manager.check_and_assign_roles(
+                            inviter_id, member.guild
+                        )
 
-                        # Update voice channel display
-                        if hasattr(bot, "voice_channel_display"):
-                            await bot.voice_channel_display.update_channel_name(
-                                member.guild
-                            )
-                    else:
-                        logger.info(
-                            f"[SKIP] {inviter} has reached daily points limit — no points awarded for invite."
+                    # Update voice channel display
+                    if hasattr(bot, "voice_channel_display"):
+                        await bot.voice_channel_display.update_channel_name(
+                            member.guild
                         )
                 else:
                     logger.info(
                         f"[SKIP] {inviter} already invited {member} before — no points awarded."
                     )
-
-                break  # Stop after matching the invite
-
-        invites[guild_id] = invites_after  # Refresh cache after join
+            else:
+                logger.info(
+                    f"[SKIP] {inviter} has reached daily points limit — no points awarded for invite."
+                )
 
     except Exception as e:
         logger.info(f"[ERROR] on_member_join: {e}")
@@ -422,14 +430,6 @@ async def on_command_error(ctx, error):
         pass
 
 
-@tasks.loop(seconds=30)
-async def update_invite_cache():
-    for guild in bot.guilds:
-        try:
-            invites[guild.id] = await guild.invites()
-        except Exception as e:
-            logger.info(f"Invite cache update failed for {guild.name}: {e}")
-
-
 # Run bot
-bot.run(config.BOT_TOKEN)
+if __name__ == "__main__":
+    bot.run(config.BOT_TOKEN)
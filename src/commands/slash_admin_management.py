@@ -12,16 +12,17 @@ class SlashAdminManagementCommands(commands.Cog):
         self.bot = bot
 
     @app_commands.command(name="ttp-listadmins", description="View current admins")
+    @app_commands.guild_only()
     async def listadmins(self, interaction: discord.Interaction):
         """View current admins"""
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        admin_ids = dao.get_all_admin_ids()
+        admin_ids = dao.get_all_admin_ids(interaction.guild.id)
 
         if not admin_ids:
             await interaction.response.send_message(
@@ -36,58 +37,67 @@ class SlashAdminManagementCommands(commands.Cog):
         )
 
         for admin_id in admin_ids:
-            member = interaction.guild.get_member(int(admin_id))
+            member = interaction.guild.get_member(admin_id)
             member_name = member.mention if member else f"User {admin_id}"
             embed.add_field(name="Admin", value=member_name, inline=True)
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command(name="ttp-addadmin", description="Add a new admin")
+    @app_commands.guild_only()
     @app_commands.describe(user="The user to add as admin")
     async def addadmin(self, interaction: discord.Interaction, user: discord.Member):
         """Add a new admin"""
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        user_id = str(user.id)
+        guild_id = interaction.guild.id
+        user_id = user.id
 
         # Check if user is already an admin
-        if dao.is_admin(user_id):
+        if dao.is_admin(guild_id, user_id):
             await interaction.response.send_message(
                 f"❌ {user.mention} is already an admin", ephemeral=True
             )
             return
 
-        dao.add_admin(user_id)
+        dao.add_admin(guild_id, user_id)
         await interaction.response.send_message(
             f"✅ Added {user.mention} as admin", ephemeral=True
         )
 
     @app_commands.command(name="ttp-removeadmin", description="Remove an admin")
+    @app_commands.guild_only()
     @app_commands.describe(user="The user to remove as admin")
     async def removeadmin(self, interaction: discord.Interaction, user: discord.Member):
         """Remove an admin"""
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        user_id = str(user.id)
+        guild_id = interaction.guild.id
+        user_id = user.id
 
         # Check if user is actually an admin
-        if not dao.is_admin(user_id):
+        if not dao.is_admin(guild_id, user_id):
             await interaction.response.send_message(
                 f"❌ {user.mention} is not an admin", ephemeral=True
             )
             return
 
-        dao.remove_admin(user_id)
+        if not dao.remove_admin(guild_id, user_id):
+            await interaction.response.send_message(
+                f"❌ {user.mention} is a bot-wide admin and can't be removed here",
+                ephemeral=True,
+            )
+            return
         await interaction.response.send_message(
             f"✅ Removed {user.mention} as admin", ephemeral=True
         )
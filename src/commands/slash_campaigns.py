@@ -14,6 +14,7 @@ class SlashCampaignCommands(commands.Cog):
     @app_commands.command(
         name="ttp-createcampaign", description="Create a new campaign"
     )
+    @app_commands.guild_only()
     @app_commands.describe(
         channel="The channel for the campaign",
         name="Name of the campaign",
@@ -31,8 +32,9 @@ class SlashCampaignCommands(commands.Cog):
         end_date: str,
     ):
         """Create a new campaign"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(guild_id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
@@ -58,8 +60,10 @@ class SlashCampaignCommands(commands.Cog):
                 )
                 return
 
-            channel_id = str(channel.id)
-            dao.add_campaign_channel(channel_id, name, multiplier, start_date, end_date)
+            channel_id = channel.id
+            dao.add_campaign_channel(
+                guild_id, channel_id, name, multiplier, start_date, end_date
+            )
             await interaction.response.send_message(
                 f"✅ Campaign '{name}' created for {channel.mention} with {multiplier}x multiplier",
                 ephemeral=True,
@@ -74,16 +78,17 @@ class SlashCampaignCommands(commands.Cog):
             )
 
     @app_commands.command(name="ttp-listcampaigns", description="Show all campaigns")
+    @app_commands.guild_only()
     async def listcampaigns(self, interaction: discord.Interaction):
         """Show all campaigns"""
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        campaigns = dao.get_all_campaigns()
+        campaigns = dao.get_all_campaigns(interaction.guild.id)
 
         if not campaigns:
             await interaction.response.send_message(
@@ -98,7 +103,7 @@ class SlashCampaignCommands(commands.Cog):
         )
 
         for channel_id, name, multiplier, start_date, end_date, status in campaigns:
-            channel = interaction.guild.get_channel(int(channel_id))
+            channel = interaction.guild.get_channel(channel_id)
             channel_name = channel.mention if channel else f"<#{channel_id}> (Unknown)"
 
             # Determine status emoji
@@ -116,23 +121,24 @@ class SlashCampaignCommands(commands.Cog):
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command(name="ttp-deletecampaign", description="Delete a campaign")
+    @app_commands.guild_only()
     @app_commands.describe(channel="The channel of the campaign to delete")
     async def deletecampaign(
         self, interaction: discord.Interaction, channel: discord.TextChannel
     ):
         """Delete a campaign"""
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
         try:
-            channel_id = str(channel.id)
+            channel_id = channel.id
 
             # Delete the campaign and check if it was successful
-            if dao.delete_campaign_channel(channel_id):
+            if dao.delete_campaign_channel(interaction.guild.id, channel_id):
                 await interaction.response.send_message(
                     f"✅ Campaign deleted for {channel.mention}", ephemeral=True
                 )
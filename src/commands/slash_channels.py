@@ -14,28 +14,30 @@ class SlashChannelCommands(commands.Cog):
     @app_commands.command(
         name="ttp-trackchannel", description="Start tracking a channel"
     )
+    @app_commands.guild_only()
     @app_commands.describe(channel="The channel to start tracking")
     async def trackchannel(
         self, interaction: discord.Interaction, channel: discord.TextChannel
     ):
         """Start tracking a channel"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        channel_id = str(channel.id)
+        channel_id = channel.id
 
         # Check if channel is already being tracked
-        if dao.is_tracked_channel(channel_id):
+        if dao.is_tracked_channel(guild_id, channel_id):
             await interaction.response.send_message(
                 f"❌ {channel.mention} is already being tracked", ephemeral=True
             )
             return
 
-        dao.track_channel(channel_id)
+        dao.track_channel(guild_id, channel_id)
         await interaction.response.send_message(
             f"✅ Started tracking {channel.mention}", ephemeral=True
         )
@@ -43,28 +45,30 @@ class SlashChannelCommands(commands.Cog):
     @app_commands.command(
         name="ttp-untrackchannel", description="Stop tracking a channel"
     )
+    @app_commands.guild_only()
     @app_commands.describe(channel="The channel to stop tracking")
     async def untrackchannel(
         self, interaction: discord.Interaction, channel: discord.TextChannel
     ):
         """Stop tracking a channel"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        channel_id = str(channel.id)
+        channel_id = channel.id
 
         # Check if channel is actually being tracked
-        if not dao.is_tracked_channel(channel_id):
+        if not dao.is_tracked_channel(guild_id, channel_id):
             await interaction.response.send_message(
                 f"❌ {channel.mention} is not being tracked", ephemeral=True
             )
             return
 
-        dao.untrack_channel(channel_id)
+        dao.untrack_channel(guild_id, channel_id)
         await interaction.response.send_message(
             f"✅ Stopped tracking {channel.mention}", ephemeral=True
         )
@@ -72,16 +76,18 @@ class SlashChannelCommands(commands.Cog):
     @app_commands.command(
         name="ttp-listtrackedchannels", description="View tracked channels"
     )
+    @app_commands.guild_only()
     async def listtrackedchannels(self, interaction: discord.Interaction):
         """View tracked channels"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        tracked_channels = dao.get_tracked_channels()
+        tracked_channels = dao.get_tracked_channels(guild_id)
 
         if not tracked_channels:
             await interaction.response.send_message(
@@ -98,7 +104,7 @@ class SlashChannelCommands(commands.Cog):
         # Group all channels into a single field to avoid Discord's 25 field limit
         channel_list = []
         for channel_id in tracked_channels:
-            channel = interaction.guild.get_channel(int(channel_id))
+            channel = interaction.guild.get_channel(channel_id)
             channel_name = channel.mention if channel else f"<#{channel_id}> (Unknown)"
             channel_list.append(channel_name)
 
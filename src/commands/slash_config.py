@@ -2,6 +2,7 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from typing import Optional
+import src.core.config as config
 from src.core.database import Database
 
 dao = Database()
@@ -12,19 +13,31 @@ class SlashConfigCommands(commands.Cog):
         self.bot = bot
 
     @app_commands.command(name="ttp-setconfig", description="Update config values")
+    @app_commands.guild_only()
     @app_commands.describe(
         key="The config key to update", value="The new value for the config key"
     )
     async def setconfig(self, interaction: discord.Interaction, key: str, value: str):
         """Update config values"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        dao.set_config(key, value)
+        # Bot-wide settings apply to every server
+        if key in config.GLOBAL_CONFIG_KEYS and not dao.is_global_admin(
+            interaction.user.id
+        ):
+            await interaction.response.send_message(
+                f"❌ '{key}' is a bot-wide setting; only bot-wide admins can change it.",
+                ephemeral=True,
+            )
+            return
+
+        dao.set_config(guild_id, key, value)
         await interaction.response.send_message(
             f"✅ Config '{key}' set to '{value}'", ephemeral=True
         )
@@ -32,16 +45,18 @@ class SlashConfigCommands(commands.Cog):
     @app_commands.command(
         name="ttp-viewconfig", description="Show current config values"
     )
+    @app_commands.guild_only()
     async def viewconfig(self, interaction: discord.Interaction):
         """Show current config values"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        configs = dao.get_all_configs()
+        configs = dao.get_all_configs(guild_id)
 
         embed = discord.Embed(
             title="⚙️ Bot Configuration",
@@ -57,6 +72,7 @@ class SlashConfigCommands(commands.Cog):
     @app_commands.command(
         name="ttp-setbotchannel", description="Set the channel for general bot commands"
     )
+    @app_commands.guild_only()
     @app_commands.describe(
         channel="The channel where general commands (dashboard, leaderboard, etc.) can be used"
     )
@@ -64,15 +80,16 @@ class SlashConfigCommands(commands.Cog):
         self, interaction: discord.Interaction, channel: discord.TextChannel
     ):
         """Set the channel for general bot commands"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
         # Set the bot channel config
-        dao.set_config("bot_channel_id", str(channel.id))
+        dao.set_config(guild_id, "bot_channel_id", str(channel.id))
 
         await interaction.response.send_message(
             f"✅ Bot channel set to {channel.mention}. General commands (dashboard, leaderboard, mystats) can now only be used in this channel.",
@@ -2,6 +2,7 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import asyncio
+import io
 import logging
 import os
 import tempfile
@@ -10,7 +11,9 @@ from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 from jinja2 import Environment, FileSystemLoader
 from playwright.async_api import async_playwright
+from src.core import metrics
 from src.core.database import Database
+from src.core.dashboard_cache import snapshot_cache
 
 logger = logging.getLogger(__name__)
 
@@ -53,12 +56,14 @@ class DashboardCommands(commands.Cog):
     @app_commands.command(
         name="ttp-dashboard", description="Generate your personal dashboard"
     )
+    @app_commands.guild_only()
     async def dashboard(self, interaction: discord.Interaction):
         """Generate a personal dashboard for the user."""
+        guild_id = interaction.guild.id
         # Check if command is used in the correct channel
-        if not self.dao.is_bot_channel(str(interaction.channel.id)):
-            bot_channel_id = self.dao.get_config("bot_channel_id")
-            if bot_channel_id and interaction.guild:
+        if not self.dao.is_bot_channel(guild_id, interaction.channel.id):
+            bot_channel_id = self.dao.get_config(guild_id, "bot_channel_id")
+            if bot_channel_id:
                 bot_channel = interaction.guild.get_channel(int(bot_channel_id))
                 channel_mention = (
                     bot_channel.mention if bot_channel else f"<#{bot_channel_id}>"
@@ -72,24 +77,22 @@ class DashboardCommands(commands.Cog):
         await interaction.response.defer(ephemeral=False)
 
         try:
-            user_id = str(interaction.user.id)
+            user_id = interaction.user.id
 
-            # Check if guild is available
-            if not interaction.guild:
-                await interaction.followup.send(
-                    "❌ This command can only be used in a server.",
-                    ephemeral=False,
-                )
-                return
-
-            # Generate fresh dashboard data
-            user_data = await self._get_user_dashboard_data(interaction)
+            # Serve the cached snapshot if nothing relevant changed
+            snapshot = self._get_cached_dashboard(guild_id, user_id)
+            if snapshot:
+                _, png = snapshot
+            else:
+                # Generate fresh dashboard data
+                user_data = await self._get_user_dashboard_data(interaction)
 
-            # Generate image and upload
-            image_path = await self._generate_dashboard_async(user_data, user_id)
+                # Generate image, keep its bytes and delete local file
+                image_path = await self._generate_dashboard_async(user_data, user_id)
+                png = self._read_and_cleanup(image_path)
+                snapshot_cache.put(guild_id, user_id, user_data, png)
 
-            # Send the image and delete local file
-            await self._send_and_cleanup(interaction, image_path)
+            await self._send_image_bytes(interaction, png)
 
         except Exception as e:
             logger.error(f"Error generating dashboard for {interaction.user.id}: {e}")
@@ -101,12 +104,14 @@ class DashboardCommands(commands.Cog):
     @app_commands.command(
         name="ttp-mystats", description="Generate your quick stats snapshot"
     )
+    @app_commands.guild_only()
     async def mystats(self, interaction: discord.Interaction):
         """Generate a quick stats snapshot for the user."""
+        guild_id = interaction.guild.id
         # Check if command is used in the correct channel
-        if not self.dao.is_bot_channel(str(interaction.channel.id)):
-            bot_channel_id = self.dao.get_config("bot_channel_id")
-            if bot_channel_id and interaction.guild:
+        if not self.dao.is_bot_channel(guild_id, interaction.channel.id):
+            bot_channel_id = self.dao.get_config(guild_id, "bot_channel_id")
+            if bot_channel_id:
                 bot_channel = interaction.guild.get_channel(int(bot_channel_id))
                 channel_mention = (
                     bot_channel.mention if bot_channel else f"<#{bot_channel_id}>"
@@ -120,15 +125,7 @@ class DashboardCommands(commands.Cog):
         await interaction.response.defer(ephemeral=False)
 
         try:
-            user_id = str(interaction.user.id)
-
-            # Check if guild is available
-            if not interaction.guild:
-                await interaction.followup.send(
-                    "❌ This command can only be used in a server.",
-                    ephemeral=False,
-                )
-                return
+            user_id = interaction.user.id
 
             # Generate fresh mystats data
             user_data = await self._get_user_mystats_data(interaction)
@@ -158,6 +155,29 @@ class DashboardCommands(commands.Cog):
             # Always delete the local file
             self._delete_local_file(image_path)
 
+    async def _send_image_bytes(self, interaction: discord.Interaction, png: bytes):
+        """Send an in-memory dashboard image."""
+        file = discord.File(io.BytesIO(png), filename="dashboard.png")
+        await interaction.followup.send(file=file, ephemeral=False)
+
+    def _read_and_cleanup(self, image_path: str) -> bytes:
+        """Read a generated image into memory and delete the local file."""
+        try:
+            with open(image_path, "rb") as f:
+                return f.read()
+        finally:
+            self._delete_local_file(image_path)
+
+    def _get_cached_dashboard(
+        self, guild_id: int, user_id: int
+    ) -> Optional[Tuple[Dict, bytes]]:
+        """Return the user's cached dashboard snapshot, if still valid."""
+        if snapshot_cache.needs_top3_check(guild_id):
+            snapshot_cache.update_top3(
+                guild_id, self.dao.get_leaderboard(guild_id, limit=3)
+            )
+        return snapshot_cache.get(guild_id, user_id)
+
     def _delete_local_file(self, file_path: str):
         """Delete local file safely."""
         try:
@@ -169,19 +189,20 @@ class DashboardCommands(commands.Cog):
 
     async def _get_user_dashboard_data(self, interaction: discord.Interaction) -> Dict:
         """Get all data needed for dashboard generation."""
-        user_id = str(interaction.user.id)
+        guild_id = interaction.guild.id
+        user_id = interaction.user.id
 
         # Get or create user
         user_info = self._get_or_create_user(interaction)
 
         # Get user stats
-        stats = self._get_user_stats(user_id)
+        stats = self._get_user_stats(guild_id, user_id)
 
         # Add streak data
-        stats["streak"] = self.dao.get_current_streak(user_id)
+        stats["streak"] = self.dao.get_current_streak(guild_id, user_id)
 
         # Add total users count
-        stats["total_users"] = self.dao.get_total_members_count()
+        stats["total_users"] = self.dao.get_total_members_count(guild_id)
 
         # Get server info
         server_info = self._get_server_info(interaction)
@@ -190,7 +211,7 @@ class DashboardCommands(commands.Cog):
         leaderboard = self._get_formatted_leaderboard(interaction)
 
         # Calculate progress
-        progress = self._calculate_progress(user_info)
+        progress = self._calculate_progress(guild_id, user_info)
 
         # Get activity data for chart
         activity_data = self._get_activity_data(stats)
@@ -209,33 +230,35 @@ class DashboardCommands(commands.Cog):
 
     def _get_or_create_user(self, interaction: discord.Interaction) -> Dict:
         """Get user info or create if doesn't exist."""
-        user_id = str(interaction.user.id)
-        user_info = self.dao.get_member_info(user_id)
+        guild_id = interaction.guild.id
+        user_id = interaction.user.id
+        user_info = self.dao.get_member_info(guild_id, user_id)
 
         if not user_info:
             # Create new user
-            self.dao.add_member(user_id)
-            user_info = self.dao.get_member_info(user_id)
+            self.dao.add_member(guild_id, user_id)
+            user_info = self.dao.get_member_info(guild_id, user_id)
 
         # Add Discord user info
         user_info["name"] = interaction.user.display_name
         user_info["avatar_url"] = (
             str(interaction.user.avatar.url) if interaction.user.avatar else None
         )
-        user_info["role"] = self._get_user_role_name(interaction.user)
+        user_info["role"] = self._get_user_role_name(guild_id, interaction.user)
         user_info["join_date"] = self._format_join_date(interaction.user.joined_at)
-        user_info["rank"] = self.dao.get_user_rank(user_id)
+        user_info["rank"] = self.dao.get_user_rank(guild_id, user_id)
 
         # Calculate current level (sequential number)
         current_points = user_info.get("total_points", 0)
-        user_info["level"] = self._calculate_current_level(current_points)
+        user_info["level"] = self._calculate_current_level(guild_id, current_points)
 
         return user_info
 
     def _get_user_info(self, interaction: discord.Interaction) -> Dict:
         """Get user information."""
-        user_id = str(interaction.user.id)
-        user_info = self.dao.get_member_info(user_id)
+        guild_id = interaction.guild.id
+        user_id = interaction.user.id
+        user_info = self.dao.get_member_info(guild_id, user_id)
 
         if not user_info:
             return {
@@ -250,7 +273,7 @@ class DashboardCommands(commands.Cog):
                     if interaction.user.avatar
                     else None
                 ),
-                "role": self._get_user_role_name(interaction.user),
+                "role": self._get_user_role_name(guild_id, interaction.user),
                 "join_date": self._format_join_date(interaction.user.joined_at),
                 "rank": 0,
             }
@@ -260,9 +283,9 @@ class DashboardCommands(commands.Cog):
         user_info["avatar_url"] = (
             str(interaction.user.avatar.url) if interaction.user.avatar else None
         )
-        user_info["role"] = self._get_user_role_name(interaction.user)
+        user_info["role"] = self._get_user_role_name(guild_id, interaction.user)
         user_info["join_date"] = self._format_join_date(interaction.user.joined_at)
-        user_info["rank"] = self.dao.get_user_rank(user_id)
+        user_info["rank"] = self.dao.get_user_rank(guild_id, user_id)
 
         return user_info
 
@@ -279,26 +302,26 @@ class DashboardCommands(commands.Cog):
         self, interaction: discord.Interaction
     ) -> List[Tuple]:
         """Get formatted leaderboard data."""
-        raw_leaderboard = self.dao.get_leaderboard(limit=3)
+        raw_leaderboard = self.dao.get_leaderboard(interaction.guild.id, limit=3)
         leaderboard = []
-        current_user_id = str(interaction.user.id)
+        current_user_id = interaction.user.id
 
         for rank, (discord_id, points) in enumerate(raw_leaderboard, 1):
-            user = interaction.guild.get_member(int(discord_id))
-            name = user.display_name if user else f"User#{discord_id[-4:]}"
+            user = interaction.guild.get_member(discord_id)
+            name = user.display_name if user else f"User#{str(discord_id)[-4:]}"
             leaderboard.append((rank, name, points))
 
         return leaderboard
 
-    def _calculate_progress(self, user_info: Dict) -> Dict:
+    def _calculate_progress(self, guild_id: int, user_info: Dict) -> Dict:
         """Calculate user progress data."""
         current_points = user_info.get("total_points", 0)
 
         # Get next milestone by points (for dashboard display)
-        next_milestone = self.dao.get_next_milestone_by_points(current_points)
+        next_milestone = self.dao.get_next_milestone_by_points(guild_id, current_points)
 
         # Calculate current level (sequential number)
-        current_level = self._calculate_current_level(current_points)
+        current_level = self._calculate_current_level(guild_id, current_points)
 
         # Check if user is at max level
         if next_milestone is None:
@@ -317,7 +340,9 @@ class DashboardCommands(commands.Cog):
         next_level_points = next_milestone
 
         # Calculate level percentage
-        prev_milestone = self._get_previous_milestone_by_points(current_points)
+        prev_milestone = self._get_previous_milestone_by_points(
+            guild_id, current_points
+        )
         prev_points = prev_milestone if prev_milestone else 0
         level_percentage = min(
             100,
@@ -330,7 +355,9 @@ class DashboardCommands(commands.Cog):
 
         # Get next reward info only if not at max level
         next_reward = (
-            self._get_next_reward_info(current_points) if next_milestone else None
+            self._get_next_reward_info(guild_id, current_points)
+            if next_milestone
+            else None
         )
 
         return {
@@ -344,30 +371,19 @@ class DashboardCommands(commands.Cog):
             "current_level": current_level,
         }
 
-    def _calculate_current_level(self, current_points: int) -> int:
+    def _calculate_current_level(self, guild_id: int, current_points: int) -> int:
         """Calculate current level as sequential number."""
         try:
-            with self.dao._connect() as conn:
-                cur = conn.cursor()
-                cur.execute(
-                    "SELECT COUNT(*) FROM milestones WHERE status = 'active' AND value <= ?",
-                    (current_points,),
-                )
-                return cur.fetchone()[0]
+            return self.dao.get_milestone_ladder(guild_id).count_reached(current_points)
         except:
             return 1
 
-    def _get_previous_milestone_by_points(self, current_points: int) -> Optional[int]:
+    def _get_previous_milestone_by_points(
+        self, guild_id: int, current_points: int
+    ) -> Optional[int]:
         """Get the previous milestone based on current points."""
         try:
-            with self.dao._connect() as conn:
-                cur = conn.cursor()
-                cur.execute(
-                    "SELECT value FROM milestones WHERE status = 'active' AND value <= ? ORDER BY value DESC LIMIT 1",
-                    (current_points,),
-                )
-                result = cur.fetchone()
-                return result[0] if result else 0
+            return self.dao.get_milestone_ladder(guild_id).level_for(current_points)
         except:
             return 0
 
@@ -394,41 +410,40 @@ class DashboardCommands(commands.Cog):
             labels.append(day.strftime("%a"))  # Mon, Tue, ...
         return labels
 
-    def _get_user_stats(self, user_id: str) -> Dict:
+    def _get_user_stats(self, guild_id: int, user_id: int) -> Dict:
         """Get comprehensive user statistics from engagement_log."""
         try:
             with self.dao._connect() as conn:
                 cur = conn.cursor()
 
-                # Activity counts
-                cur.execute(
-                    """
-                    SELECT activity_type, COUNT(*) as count
-                    FROM engagement_log 
-                    WHERE discord_id = ?
-                    GROUP BY activity_type
-                """,
-                    (user_id,),
-                )
-                activity_counts = dict(cur.fetchall())
+                # Activity counts (older history lives in the daily rollups)
+                activity_counts = self.dao.get_activity_counts(guild_id, user_id)
 
                 # Daily points
                 cur.execute(
                     """
                     SELECT COALESCE(SUM(point_value), 0) as daily_points
                     FROM engagement_log 
-                    WHERE discord_id = ? 
-                    AND timestamp >= datetime('now', '-1 day')
+                    WHERE guild_id = ? AND discord_id = ? 
+                    AND timestamp >= ?
                 """,
-                    (user_id,),
+                    (guild_id, user_id, int(time.time()) - 86400),
                 )
                 daily_points = cur.fetchone()[0]
 
                 # Weekly data
-                weekly_messages = self._get_weekly_activity(cur, user_id, "message")
-                weekly_reactions = self._get_weekly_activity(cur, user_id, "reaction")
-                weekly_attachments = self._get_weekly_activity(cur, user_id, "image")
-                weekly_invites = self._get_weekly_activity(cur, user_id, "invite")
+                weekly_messages = self._get_weekly_activity(
+                    cur, guild_id, user_id, "message"
+                )
+                weekly_reactions = self._get_weekly_activity(
+                    cur, guild_id, user_id, "reaction"
+                )
+                weekly_attachments = self._get_weekly_activity(
+                    cur, guild_id, user_id, "image"
+                )
+                weekly_invites = self._get_weekly_activity(
+                    cur, guild_id, user_id, "invite"
+                )
 
                 return {
                     "messages": activity_counts.get("message", 0),
@@ -438,7 +453,7 @@ class DashboardCommands(commands.Cog):
                     ),  # Changed from 'attachment' to 'image'
                     "referrals": activity_counts.get("invite", 0),
                     "referral_points": activity_counts.get("invite", 0)
-                    * int(self.dao.get_config("points_per_invite") or 200),
+                    * int(self.dao.get_config(guild_id, "points_per_invite") or 200),
                     "daily_points": daily_points,
                     "weekly_messages": weekly_messages,
                     "weekly_reactions": weekly_reactions,
@@ -450,23 +465,30 @@ class DashboardCommands(commands.Cog):
             logger.error(f"Error getting user stats: {e}")
             return self._get_default_stats()
 
-    def _get_weekly_activity(self, cur, user_id: str, activity_type: str) -> List[int]:
+    def _get_weekly_activity(
+        self, cur, guild_id: int, user_id: int, activity_type: str
+    ) -> List[int]:
         """Get weekly activity data for a specific type."""
         weekly_data = []
+        today_start = int(time.time()) // 86400 * 86400  # UTC midnight
         # Get last 7 days, with today as the last day
         for i in range(6, -1, -1):  # 6, 5, 4, 3, 2, 1, 0 (today is 0)
+            day_start = today_start - i * 86400
             cur.execute(
                 """
                 SELECT COUNT(*) 
                 FROM engagement_log 
-                WHERE discord_id = ? 
-                AND activity_type = ?
-                AND timestamp >= datetime('now', '-{} days', 'start of day')
-                AND timestamp < datetime('now', '-{} days', 'start of day', '+1 day')
-            """.format(
-                    i, i
+                WHERE guild_id = ? AND discord_id = ? 
+                AND activity_type_id = ?
+                AND timestamp >= ? AND timestamp < ?
+            """,
+                (
+                    guild_id,
+                    user_id,
+                    self.dao.activity_type_id(activity_type),
+                    day_start,
+                    day_start + 86400,
                 ),
-                (user_id, activity_type),
             )
             weekly_data.append(cur.fetchone()[0])
         return weekly_data
@@ -486,12 +508,12 @@ class DashboardCommands(commands.Cog):
             "weekly_invites": [0] * 7,
         }
 
-    def _get_user_role_name(self, user) -> Optional[str]:
+    def _get_user_role_name(self, guild_id: int, user) -> Optional[str]:
         """Get the user's milestone role name, if any."""
-        user_id = str(user.id)
+        user_id = user.id
 
         # Get user's milestone role name from DAO
-        milestone_role = self.dao.get_user_milestone_role_name(user_id)
+        milestone_role = self.dao.get_user_milestone_role_name(guild_id, user_id)
 
         # Check if user actually has this role in Discord
         # Only check roles if user is a Member (has roles attribute)
@@ -511,28 +533,15 @@ class DashboardCommands(commands.Cog):
         """Format the user's join date."""
         return joined_at.strftime("%b %d, %Y") if joined_at else "Unknown"
 
-    def _get_next_reward_info(self, current_points: int) -> str:
+    def _get_next_reward_info(self, guild_id: int, current_points: int) -> str:
         """Get information about the next reward."""
         try:
-            with self.dao._connect() as conn:
-                cur = conn.cursor()
-                cur.execute(
-                    """
-                    SELECT value, reward 
-                    FROM milestones 
-                    WHERE value > ? AND status = 'active'
-                    ORDER BY value ASC 
-                    LIMIT 1
-                """,
-                    (current_points,),
-                )
-
-                result = cur.fetchone()
-                return (
-                    f"Next: {result[1]}"
-                    if result and result[1]
-                    else "Next: Keep trading!"
-                )
+            result = self.dao.get_milestone_ladder(guild_id).next_after(current_points)
+            return (
+                f"Next: {result['reward']}"
+                if result and result["reward"]
+                else "Next: Keep trading!"
+            )
         except:
             return "Next: Keep trading!"
 
@@ -542,7 +551,7 @@ class DashboardCommands(commands.Cog):
 
         return datetime.now().strftime("%B %d, %Y at %I:%M %p")
 
-    async def _generate_dashboard_async(self, user_data: Dict, user_id: str) -> str:
+    async def _generate_dashboard_async(self, user_data: Dict, user_id: int) -> str:
         """Generate dashboard image asynchronously."""
         try:
             # Generate filename and render template
@@ -556,7 +565,8 @@ class DashboardCommands(commands.Cog):
             complete_html = self._create_complete_html(html_content)
 
             # Generate image
-            await self._render_html_to_image(complete_html, output_path)
+            with metrics.render_seconds.time("dashboard"):
+                await self._render_html_to_image(complete_html, output_path)
 
             return str(output_path)
 
@@ -665,7 +675,8 @@ class DashboardCommands(commands.Cog):
 
     async def _get_user_mystats_data(self, interaction: discord.Interaction) -> Dict:
         """Get data needed for mystats generation (header section only)."""
-        user_id = str(interaction.user.id)
+        guild_id = interaction.guild.id
+        user_id = interaction.user.id
 
         # Get or create user
         user_info = self._get_or_create_user(interaction)
@@ -674,7 +685,7 @@ class DashboardCommands(commands.Cog):
         server_info = self._get_server_info(interaction)
 
         # Calculate progress
-        progress = self._calculate_progress(user_info)
+        progress = self._calculate_progress(guild_id, user_info)
 
         return {
             "user": user_info,
@@ -683,7 +694,7 @@ class DashboardCommands(commands.Cog):
             "timestamp": self._get_current_timestamp(),
         }
 
-    async def _generate_mystats_async(self, user_data: Dict, user_id: str) -> str:
+    async def _generate_mystats_async(self, user_data: Dict, user_id: int) -> str:
         """Generate mystats image asynchronously with cropped output."""
         try:
             # Generate unique filename with timestamp
@@ -699,7 +710,8 @@ class DashboardCommands(commands.Cog):
             html_content = template.render(**template_data)
 
             # Generate cropped image (only the stats card, not full page)
-            await self._render_mystats_to_image(html_content, output_path)
+            with metrics.render_seconds.time("mystats"):
+                await self._render_mystats_to_image(html_content, output_path)
 
             return str(output_path)
 
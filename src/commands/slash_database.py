@@ -1,8 +1,17 @@
+import asyncio
 import discord
+import io
 from discord import app_commands
 from discord.ext import commands
-from typing import Optional
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import List, Literal, Optional
+import src.core.config as config
 from src.core.database import Database
+from src.core.db_export import export_analytics, export_snapshot, export_tables
+from src.core.query_profiler import query_profiler
 
 dao = Database()
 
@@ -12,44 +21,279 @@ class SlashDatabaseCommands(commands.Cog):
         self.bot = bot
 
     @app_commands.command(name="ttp-exportdb", description="Export the database file")
+    @app_commands.guild_only()
     async def exportdb(self, interaction: discord.Interaction):
         """Export the database file"""
+        # The file holds every server's data, so only bot-wide admins get it
+        if not dao.is_global_admin(interaction.user.id):
+            await interaction.response.send_message(
+                "❌ Only bot-wide admins can export the whole database; use /ttp-exporttables for this server's data.",
+                ephemeral=True,
+            )
+            return
+
+        # Snapshotting a large database can outlast the 3s response window
+        await interaction.response.defer(ephemeral=True)
+
+        # Create export name with timestamp
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        name = f"database_export_{timestamp}"
+        out_dir = tempfile.mkdtemp(prefix="export_")
+
+        try:
+            # Snapshot and compress off the event loop while the bot keeps writing
+            paths = await asyncio.to_thread(export_snapshot, out_dir, name)
+            await self._send_parts(
+                interaction, paths, "✅ Database exported successfully!"
+            )
+
+        except Exception as e:
+            await interaction.followup.send(
+                f"❌ Error exporting database: {e}", ephemeral=True
+            )
+        finally:
+            # Clean up the temporary files
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+    @app_commands.command(
+        name="ttp-exporttables", description="Export tables as compressed CSV or JSONL"
+    )
+    @app_commands.guild_only()
+    @app_commands.describe(
+        tables="Comma-separated table names (default: all tables)",
+        format="File format for each table",
+        since="Only rows on or after this date (YYYY-MM-DD), for log tables",
+        until="Only rows before this date (YYYY-MM-DD), for log tables",
+    )
+    async def exporttables(
+        self,
+        interaction: discord.Interaction,
+        tables: Optional[str] = None,
+        format: Literal["csv", "jsonl"] = "csv",
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ):
+        """Export selected tables for this server"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
         try:
-            import shutil
-            import os
-            from datetime import datetime
+            for date in (since, until):
+                if date:
+                    datetime.strptime(date, "%Y-%m-%d")
+        except ValueError:
+            await interaction.response.send_message(
+                "❌ Invalid date format. Use YYYY-MM-DD", ephemeral=True
+            )
+            return
 
-            # Create backup filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_filename = f"database_export_{timestamp}.db"
+        await interaction.response.defer(ephemeral=True)
 
-            # Copy database file
-            shutil.copy2("data/database.db", backup_filename)
+        table_names = (
+            [table.strip() for table in tables.split(",") if table.strip()]
+            if tables
+            else None
+        )
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        out_dir = tempfile.mkdtemp(prefix="export_")
 
-            # Send the file
-            with open(backup_filename, "rb") as f:
-                file = discord.File(f, filename=backup_filename)
-                await interaction.response.send_message(
-                    f"✅ Database exported successfully!\n📁 Filename: {backup_filename}",
-                    file=file,
-                    ephemeral=True,
-                )
+        try:
+            paths = await asyncio.to_thread(
+                export_tables,
+                out_dir,
+                f"export_{timestamp}",
+                table_names,
+                format,
+                guild_id,
+                since,
+                until,
+            )
+            await self._send_parts(
+                interaction, paths, "✅ Tables exported successfully!"
+            )
+
+        except Exception as e:
+            await interaction.followup.send(
+                f"❌ Error exporting tables: {e}", ephemeral=True
+            )
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
 
-            # Clean up the temporary file
-            os.remove(backup_filename)
+    @app_commands.command(
+        name="ttp-exportanalytics",
+        description="Export engagement history as Parquet files for analysis",
+    )
+    @app_commands.guild_only()
+    @app_commands.describe(
+        since="Only rows on or after this date (YYYY-MM-DD)",
+        until="Only rows before this date (YYYY-MM-DD)",
+    )
+    async def exportanalytics(
+        self,
+        interaction: discord.Interaction,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ):
+        """Export engagement, members and milestones as monthly Parquet files"""
+        guild_id = interaction.guild.id
+        # Check if user is admin
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
+            await interaction.response.send_message(
+                "❌ You don't have permission to use this command.", ephemeral=True
+            )
+            return
+
+        try:
+            for date in (since, until):
+                if date:
+                    datetime.strptime(date, "%Y-%m-%d")
+        except ValueError:
+            await interaction.response.send_message(
+                "❌ Invalid date format. Use YYYY-MM-DD", ephemeral=True
+            )
+            return
+
+        await interaction.response.defer(ephemeral=True)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        out_dir = tempfile.mkdtemp(prefix="export_")
+
+        try:
+            paths = await asyncio.to_thread(
+                export_analytics,
+                out_dir,
+                f"analytics_{timestamp}",
+                guild_id,
+                since,
+                until,
+            )
+            await self._send_parts(
+                interaction, paths, "✅ Analytics export created successfully!"
+            )
 
         except Exception as e:
+            await interaction.followup.send(
+                f"❌ Error exporting analytics: {e}", ephemeral=True
+            )
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+    @app_commands.command(
+        name="ttp-queryprofile",
+        description="Turn database query profiling on or off",
+    )
+    @app_commands.guild_only()
+    @app_commands.describe(
+        enabled="Profile database calls",
+        slow_ms="Log statements at least this slow (ms) with their query plan",
+        sample_rate="Share of database calls to profile, from 0 to 1",
+        reset="Clear the statistics collected so far",
+    )
+    async def queryprofile(
+        self,
+        interaction: discord.Interaction,
+        enabled: bool,
+        slow_ms: Optional[app_commands.Range[float, 0]] = None,
+        sample_rate: Optional[app_commands.Range[float, 0, 1]] = None,
+        reset: bool = False,
+    ):
+        """Turn database query profiling on or off"""
+        # Profiling covers every server's queries, so only bot-wide admins
+        if not dao.is_global_admin(interaction.user.id):
             await interaction.response.send_message(
-                f"❌ Error exporting database: {e}", ephemeral=True
+                "❌ Only bot-wide admins can use query profiling.", ephemeral=True
+            )
+            return
+
+        query_profiler.configure(enabled, slow_ms, sample_rate)
+        if reset:
+            query_profiler.reset()
+        # Saved so the setting survives restarts
+        dao.set_config(
+            config.GLOBAL_GUILD_ID, "query_profile_enabled", str(enabled).lower()
+        )
+        if slow_ms is not None:
+            dao.set_config(config.GLOBAL_GUILD_ID, "slow_query_ms", str(slow_ms))
+        if sample_rate is not None:
+            dao.set_config(
+                config.GLOBAL_GUILD_ID, "query_profile_sample_rate", str(sample_rate)
+            )
+
+        await interaction.response.send_message(
+            f"✅ Query profiling {'on' if enabled else 'off'} "
+            f"(sample rate {query_profiler.sample_rate:g}, "
+            f"slow queries >= {query_profiler.slow_query_ms:g} ms are logged)",
+            ephemeral=True,
+        )
+
+    @app_commands.command(
+        name="ttp-querystats",
+        description="Show the slowest and most frequent database queries",
+    )
+    @app_commands.guild_only()
+    @app_commands.describe(limit="Number of entries per list")
+    async def querystats(
+        self,
+        interaction: discord.Interaction,
+        limit: app_commands.Range[int, 1, 50] = 10,
+    ):
+        """Show the slowest and most frequent database queries"""
+        # Profiling covers every server's queries, so only bot-wide admins
+        if not dao.is_global_admin(interaction.user.id):
+            await interaction.response.send_message(
+                "❌ Only bot-wide admins can use query profiling.", ephemeral=True
+            )
+            return
+
+        report = query_profiler.report(limit)
+        if len(report) <= 1900:
+            await interaction.response.send_message(
+                f"```\n{report}\n```", ephemeral=True
+            )
+            return
+        await interaction.response.send_message(
+            "📊 Query profile",
+            file=discord.File(
+                io.BytesIO(report.encode("utf-8")), filename="query_stats.txt"
+            ),
+            ephemeral=True,
+        )
+
+    async def _send_parts(
+        self, interaction: discord.Interaction, paths: List[str], header: str
+    ):
+        """Upload export files one per message so each stays under the limit."""
+        await interaction.followup.send(
+            f"{header}\n📁 {len(paths)} file(s)"
+            + (
+                "\nSplit files: join the parts in order, e.g. `cat <file>.part* > <file>`"
+                if any(".part" in os.path.basename(path) for path in paths)
+                else ""
+            ),
+            ephemeral=True,
+        )
+        for path in paths:
+            await interaction.followup.send(
+                file=discord.File(path, filename=os.path.basename(path)),
+                ephemeral=True,
             )
 
 
 async def setup(bot):
+    query_profiler.configure(
+        enabled=dao.get_config(config.GLOBAL_GUILD_ID, "query_profile_enabled")
+        == "true",
+        slow_query_ms=float(
+            dao.get_config(config.GLOBAL_GUILD_ID, "slow_query_ms")
+            or config.DEFAULT_SLOW_QUERY_MS
+        ),
+        sample_rate=float(
+            dao.get_config(config.GLOBAL_GUILD_ID, "query_profile_sample_rate") or 1.0
+        ),
+    )
     await bot.add_cog(SlashDatabaseCommands(bot))
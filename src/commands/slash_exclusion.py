@@ -14,18 +14,20 @@ class SlashExclusionCommands(commands.Cog):
     @app_commands.command(
         name="ttp-excludeuser", description="Exclude a user from leaderboard"
     )
+    @app_commands.guild_only()
     @app_commands.describe(user="The user to exclude from leaderboard")
     async def excludeuser(self, interaction: discord.Interaction, user: discord.Member):
         """Exclude a user from leaderboard"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        user_id = str(user.id)
-        if dao.add_excluded_leaderboard_user(user_id):
+        user_id = user.id
+        if dao.add_excluded_leaderboard_user(guild_id, user_id):
             await interaction.response.send_message(
                 f"✅ Excluded {user.mention} from leaderboard", ephemeral=True
             )
@@ -38,18 +40,20 @@ class SlashExclusionCommands(commands.Cog):
     @app_commands.command(
         name="ttp-includeuser", description="Include a user back in leaderboard"
     )
+    @app_commands.guild_only()
     @app_commands.describe(user="The user to include back in leaderboard")
     async def includeuser(self, interaction: discord.Interaction, user: discord.Member):
         """Include a user back in leaderboard"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        user_id = str(user.id)
-        if dao.remove_excluded_leaderboard_user(user_id):
+        user_id = user.id
+        if dao.remove_excluded_leaderboard_user(guild_id, user_id):
             await interaction.response.send_message(
                 f"✅ Included {user.mention} back in leaderboard", ephemeral=True
             )
@@ -59,16 +63,18 @@ class SlashExclusionCommands(commands.Cog):
             )
 
     @app_commands.command(name="ttp-excludedusers", description="List excluded users")
+    @app_commands.guild_only()
     async def excludedusers(self, interaction: discord.Interaction):
         """List excluded users"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        excluded_users = dao.get_excluded_leaderboard_users()
+        excluded_users = dao.get_excluded_leaderboard_users(guild_id)
 
         if not excluded_users:
             await interaction.response.send_message(
@@ -83,7 +89,7 @@ class SlashExclusionCommands(commands.Cog):
         )
 
         for user_id in excluded_users:
-            member = interaction.guild.get_member(int(user_id))
+            member = interaction.guild.get_member(user_id)
             member_name = member.mention if member else f"User {user_id}"
             embed.add_field(name="Excluded User", value=member_name, inline=True)
 
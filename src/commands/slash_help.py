@@ -19,8 +19,10 @@ class SlashHelpCommands(commands.Cog):
             color=discord.Color.blurple(),
         )
 
-        # Check if user is admin
-        is_admin = dao.is_admin(str(interaction.user.id))
+        # Check if user is admin (admin commands can't be used in DMs)
+        is_admin = interaction.guild is not None and dao.is_admin(
+            interaction.guild.id, interaction.user.id
+        )
 
         # Define command categories with admin requirements
         categories = {
@@ -84,7 +86,16 @@ class SlashHelpCommands(commands.Cog):
                 "commands": ["ttp-dashboard", "ttp-mystats"],
                 "admin_only": False,
             },
-            "📁 Database": {"commands": ["ttp-exportdb"], "admin_only": True},
+            "📁 Database": {
+                "commands": [
+                    "ttp-exportdb",
+                    "ttp-exporttables",
+                    "ttp-exportanalytics",
+                    "ttp-queryprofile",
+                    "ttp-querystats",
+                ],
+                "admin_only": True,
+            },
             "🎯 Campaign Management": {
                 "commands": [
                     "ttp-createcampaign",
@@ -10,6 +10,7 @@ from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 from jinja2 import Environment, FileSystemLoader
 from playwright.async_api import async_playwright
+from src.core import metrics
 from src.core.database import Database
 
 logger = logging.getLogger(__name__)
@@ -51,12 +52,14 @@ class SlashLeaderboardCommands(commands.Cog):
     @app_commands.command(
         name="ttp-leaderboard", description="Generate the top 10 traders leaderboard"
     )
+    @app_commands.guild_only()
     async def leaderboard(self, interaction: discord.Interaction):
         """Generate a leaderboard image showing top 10 users."""
+        guild_id = interaction.guild.id
         # Check if command is used in the correct channel
-        if not self.dao.is_bot_channel(str(interaction.channel.id)):
-            bot_channel_id = self.dao.get_config("bot_channel_id")
-            if bot_channel_id and interaction.guild:
+        if not self.dao.is_bot_channel(guild_id, interaction.channel.id):
+            bot_channel_id = self.dao.get_config(guild_id, "bot_channel_id")
+            if bot_channel_id:
                 bot_channel = interaction.guild.get_channel(int(bot_channel_id))
                 channel_mention = (
                     bot_channel.mention if bot_channel else f"<#{bot_channel_id}>"
@@ -70,15 +73,7 @@ class SlashLeaderboardCommands(commands.Cog):
         await interaction.response.defer(ephemeral=False)
 
         try:
-            user_id = str(interaction.user.id)
-
-            # Check if guild is available
-            if not interaction.guild:
-                await interaction.followup.send(
-                    "❌ This command can only be used in a server.",
-                    ephemeral=False,
-                )
-                return
+            user_id = interaction.user.id
 
             # Generate fresh leaderboard data
             leaderboard_data = await self._get_leaderboard_data(interaction)
@@ -121,10 +116,11 @@ class SlashLeaderboardCommands(commands.Cog):
 
     async def _get_leaderboard_data(self, interaction: discord.Interaction) -> Dict:
         """Get data needed for leaderboard generation."""
-        user_id = str(interaction.user.id)
+        guild_id = interaction.guild.id
+        user_id = interaction.user.id
 
         # Get top 10 users from database
-        top_users = self.dao.get_top_users(limit=10)
+        top_users = self.dao.get_top_users(guild_id, limit=10)
 
         # Get current user's data to mark them in the leaderboard
         current_user_data = None
@@ -177,7 +173,7 @@ class SlashLeaderboardCommands(commands.Cog):
         return datetime.now().strftime("%B %d, %Y at %I:%M %p")
 
     async def _generate_leaderboard_async(
-        self, leaderboard_data: Dict, user_id: str
+        self, leaderboard_data: Dict, user_id: int
     ) -> str:
         """Generate leaderboard image asynchronously with cropped output."""
         try:
@@ -194,7 +190,8 @@ class SlashLeaderboardCommands(commands.Cog):
             html_content = template.render(**template_data)
 
             # Generate cropped image (only the leaderboard table, not full page)
-            await self._render_leaderboard_to_image(html_content, output_path)
+            with metrics.render_seconds.time("leaderboard"):
+                await self._render_leaderboard_to_image(html_content, output_path)
 
             return str(output_path)
 
@@ -14,16 +14,18 @@ class SlashMilestoneCommands(commands.Cog):
     @app_commands.command(
         name="ttp-listmilestones", description="Show all milestones with details"
     )
+    @app_commands.guild_only()
     async def listmilestones(self, interaction: discord.Interaction):
         """Show all milestones with details"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        milestones = dao.get_active_milestones()
+        milestones = dao.get_active_milestones(guild_id)
 
         if not milestones:
             await interaction.response.send_message(
@@ -51,6 +53,7 @@ class SlashMilestoneCommands(commands.Cog):
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command(name="ttp-addmilestone", description="Create new milestone")
+    @app_commands.guild_only()
     @app_commands.describe(
         value="The point value for the milestone",
         message="The message to display when milestone is reached",
@@ -66,8 +69,9 @@ class SlashMilestoneCommands(commands.Cog):
         role: Optional[discord.Role] = None,
     ):
         """Create new milestone with optional role assignment"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
@@ -99,7 +103,7 @@ class SlashMilestoneCommands(commands.Cog):
 
         # Create milestone with optional role
         role_name = role.name if role else None
-        dao.add_milestone(value, message, role_name=role_name, reward=reward)
+        dao.add_milestone(guild_id, value, message, role_name=role_name, reward=reward)
 
         # Build response message
         role_text = f" with role '{role.name}'" if role else ""
@@ -110,25 +114,27 @@ class SlashMilestoneCommands(commands.Cog):
     @app_commands.command(
         name="ttp-removemilestone", description="Remove (deactivate) a milestone"
     )
+    @app_commands.guild_only()
     @app_commands.describe(value="The point value of the milestone to remove")
     async def removemilestone(self, interaction: discord.Interaction, value: int):
         """Remove (deactivate) a milestone"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
         # Check if milestone exists first
-        milestone_details = dao.get_milestone_details(value)
+        milestone_details = dao.get_milestone_details(guild_id, value)
         if not milestone_details:
             await interaction.response.send_message(
                 f"❌ Milestone {value:,} does not exist.", ephemeral=True
             )
             return
 
-        if dao.update_milestone_status(value, "inactive"):
+        if dao.update_milestone_status(guild_id, value, "inactive"):
             await interaction.response.send_message(
                 f"✅ Milestone {value:,} has been removed (set to inactive).",
                 ephemeral=True,
@@ -141,6 +147,7 @@ class SlashMilestoneCommands(commands.Cog):
     @app_commands.command(
         name="ttp-setmilestonemessage", description="Set/update milestone message"
     )
+    @app_commands.guild_only()
     @app_commands.describe(
         value="The point value of the milestone",
         message="The new message for the milestone",
@@ -149,22 +156,23 @@ class SlashMilestoneCommands(commands.Cog):
         self, interaction: discord.Interaction, value: int, message: str
     ):
         """Set/update milestone message"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
         # Check if milestone exists first
-        milestone_details = dao.get_milestone_details(value)
+        milestone_details = dao.get_milestone_details(guild_id, value)
         if not milestone_details:
             await interaction.response.send_message(
                 f"❌ Milestone {value:,} does not exist.", ephemeral=True
             )
             return
 
-        if dao.update_milestone_message(value, message):
+        if dao.update_milestone_message(guild_id, value, message):
             await interaction.response.send_message(
                 f"✅ Message updated for milestone {value:,}", ephemeral=True
             )
@@ -176,6 +184,7 @@ class SlashMilestoneCommands(commands.Cog):
     @app_commands.command(
         name="ttp-setmilestonerole", description="Set role for milestone"
     )
+    @app_commands.guild_only()
     @app_commands.describe(
         milestone_value="The milestone point value",
         role="The Discord role to assign when this milestone is reached",
@@ -187,15 +196,16 @@ class SlashMilestoneCommands(commands.Cog):
         role: discord.Role,
     ):
         """Set role for milestone with Discord role picker"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
         # Check if milestone exists
-        milestone_details = dao.get_milestone_details(milestone_value)
+        milestone_details = dao.get_milestone_details(guild_id, milestone_value)
         if not milestone_details:
             await interaction.response.send_message(
                 f"❌ Milestone {milestone_value:,} does not exist.", ephemeral=True
@@ -219,11 +229,11 @@ class SlashMilestoneCommands(commands.Cog):
             return
 
         # Get current role for this milestone (if any)
-        current_role = dao.get_milestone_role(milestone_value)
+        current_role = dao.get_milestone_role(guild_id, milestone_value)
         current_role_text = f" (replacing '{current_role}')" if current_role else ""
 
         # Update the milestone with the new role
-        if dao.update_milestone_role(milestone_value, role.name):
+        if dao.update_milestone_role(guild_id, milestone_value, role.name):
             await interaction.response.send_message(
                 f"✅ Role '{role.name}' set for milestone {milestone_value:,} points{current_role_text}",
                 ephemeral=True,
@@ -237,20 +247,22 @@ class SlashMilestoneCommands(commands.Cog):
     @app_commands.command(
         name="ttp-setmilestonereward", description="Set reward for milestone"
     )
+    @app_commands.guild_only()
     @app_commands.describe(value="The milestone value", reward="The reward description")
     async def setmilestonereward(
         self, interaction: discord.Interaction, value: int, *, reward: str
     ):
         """Set reward for milestone"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
         # Check if milestone exists
-        milestone_details = dao.get_milestone_details(value)
+        milestone_details = dao.get_milestone_details(guild_id, value)
         if not milestone_details:
             await interaction.response.send_message(
                 f"❌ Milestone {value:,} does not exist.", ephemeral=True
@@ -258,7 +270,7 @@ class SlashMilestoneCommands(commands.Cog):
             return
 
         # Update the milestone with the new reward
-        if dao.update_milestone_reward(value, reward):
+        if dao.update_milestone_reward(guild_id, value, reward):
             await interaction.response.send_message(
                 f"✅ Reward set for milestone {value:,} points", ephemeral=True
             )
@@ -14,26 +14,28 @@ class SlashPointsCommands(commands.Cog):
     @app_commands.command(
         name="ttp-resetpoints", description="Reset a user's points to 0"
     )
+    @app_commands.guild_only()
     @app_commands.describe(user="The user whose points should be reset")
     async def resetpoints(self, interaction: discord.Interaction, user: discord.Member):
         """Reset a user's points to 0"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        user_id = str(user.id)
+        user_id = user.id
 
-        if not dao.user_exists(user_id):
+        if not dao.user_exists(guild_id, user_id):
             await interaction.response.send_message(
                 f"❌ User {user.display_name} does not exist in the database.",
                 ephemeral=True,
             )
             return
 
-        dao.reset_user_points(user_id)
+        dao.reset_user_points(guild_id, user_id)
         await interaction.response.send_message(
             f"✅ Points reset for {user.mention}", ephemeral=True
         )
@@ -41,21 +43,24 @@ class SlashPointsCommands(commands.Cog):
     @app_commands.command(
         name="ttp-resetallpoints", description="Reset all user points to 0"
     )
+    @app_commands.guild_only()
     async def resetallpoints(self, interaction: discord.Interaction):
         """Reset all user points to 0"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        dao.reset_all_points()
+        dao.reset_all_points(guild_id)
         await interaction.response.send_message(
             "✅ All user points have been reset.", ephemeral=True
         )
 
     @app_commands.command(name="ttp-setpoints", description="Set a user's point total")
+    @app_commands.guild_only()
     @app_commands.describe(
         user="The user whose points should be set",
         amount="The amount of points to set (1-1,000,000,000)",
@@ -64,16 +69,17 @@ class SlashPointsCommands(commands.Cog):
         self, interaction: discord.Interaction, user: discord.Member, amount: int
     ):
         """Set a user's point total"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        user_id = str(user.id)
+        user_id = user.id
 
-        if not dao.user_exists(user_id):
+        if not dao.user_exists(guild_id, user_id):
             await interaction.response.send_message(
                 f"❌ User {user.display_name} does not exist in the database.",
                 ephemeral=True,
@@ -86,10 +92,10 @@ class SlashPointsCommands(commands.Cog):
             )
             return
 
-        dao.set_user_points(user_id, amount)
+        dao.set_user_points(guild_id, user_id, amount)
 
         # Update user's level and check for role changes
-        dao.update_user_level(user_id, amount)
+        dao.update_user_level(guild_id, user_id, amount)
 
         # Check for role assignment/downgrading
         if hasattr(self.bot, "role_manager"):
@@ -106,6 +112,7 @@ class SlashPointsCommands(commands.Cog):
         )
 
     @app_commands.command(name="ttp-addpoints", description="Add points to a user")
+    @app_commands.guild_only()
     @app_commands.describe(
         user="The user to add points to",
         amount="The amount of points to add (1-1,000,000,000)",
@@ -114,16 +121,17 @@ class SlashPointsCommands(commands.Cog):
         self, interaction: discord.Interaction, user: discord.Member, amount: int
     ):
         """Add points to a user"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        user_id = str(user.id)
+        user_id = user.id
 
-        if not dao.user_exists(user_id):
+        if not dao.user_exists(guild_id, user_id):
             await interaction.response.send_message(
                 f"❌ User {user.display_name} does not exist in the database.",
                 ephemeral=True,
@@ -136,11 +144,11 @@ class SlashPointsCommands(commands.Cog):
             )
             return
 
-        dao.increment_user_points(user_id, amount)
+        dao.increment_user_points(guild_id, user_id, amount)
 
         # Update user's level and check for role changes
-        current_points = dao.get_user_points(user_id)
-        dao.update_user_level(user_id, current_points)
+        current_points = dao.get_user_points(guild_id, user_id)
+        dao.update_user_level(guild_id, user_id, current_points)
 
         # Check for milestone and role assignment
         if hasattr(self.bot, "role_manager"):
@@ -159,6 +167,7 @@ class SlashPointsCommands(commands.Cog):
     @app_commands.command(
         name="ttp-removepoints", description="Remove points from a user"
     )
+    @app_commands.guild_only()
     @app_commands.describe(
         user="The user to remove points from",
         amount="The amount of points to remove (1-1,000,000,000)",
@@ -167,16 +176,17 @@ class SlashPointsCommands(commands.Cog):
         self, interaction: discord.Interaction, user: discord.Member, amount: int
     ):
         """Remove points from a user"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        user_id = str(user.id)
+        user_id = user.id
 
-        if not dao.user_exists(user_id):
+        if not dao.user_exists(guild_id, user_id):
             await interaction.response.send_message(
                 f"❌ User {user.display_name} does not exist in the database.",
                 ephemeral=True,
@@ -189,11 +199,11 @@ class SlashPointsCommands(commands.Cog):
             )
             return
 
-        dao.increment_user_points(user_id, -amount)
+        dao.increment_user_points(guild_id, user_id, -amount)
 
         # Update user's level and check for role changes
-        current_points = dao.get_user_points(user_id)
-        dao.update_user_level(user_id, current_points)
+        current_points = dao.get_user_points(guild_id, user_id)
+        dao.update_user_level(guild_id, user_id, current_points)
 
         # Check for role assignment/downgrading
         if hasattr(self.bot, "role_manager"):
@@ -212,11 +222,13 @@ class SlashPointsCommands(commands.Cog):
     @app_commands.command(
         name="ttp-setdailylimit", description="Set daily points limit"
     )
+    @app_commands.guild_only()
     @app_commands.describe(amount="The daily points limit to set")
     async def setdailylimit(self, interaction: discord.Interaction, amount: int):
         """Set the daily points limit for all users"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
@@ -228,7 +240,7 @@ class SlashPointsCommands(commands.Cog):
             )
             return
 
-        dao.set_config("daily_points_limit", str(amount))
+        dao.set_config(guild_id, "daily_points_limit", str(amount))
         await interaction.response.send_message(
             f"✅ Daily points limit set to {amount:,}", ephemeral=True
         )
@@ -12,17 +12,19 @@ class SlashRewardCommands(commands.Cog):
         self.bot = bot
 
     @app_commands.command(name="ttp-markrewarded", description="Mark reward as sent")
+    @app_commands.guild_only()
     @app_commands.describe(reward_code="The reward code to mark as sent")
     async def markrewarded(self, interaction: discord.Interaction, reward_code: str):
         """Mark reward as sent"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        if dao.mark_reward_given(reward_code):
+        if dao.mark_reward_given(guild_id, reward_code):
             await interaction.response.send_message(
                 f"✅ Reward '{reward_code}' marked as sent.", ephemeral=True
             )
@@ -35,16 +37,18 @@ class SlashRewardCommands(commands.Cog):
     @app_commands.command(
         name="ttp-pendingrewards", description="List users awaiting rewards"
     )
+    @app_commands.guild_only()
     async def pendingrewards(self, interaction: discord.Interaction):
         """List users awaiting rewards"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
             return
 
-        pending = dao.get_pending_rewards()
+        pending = dao.get_unrewarded_milestones(guild_id)
 
         if not pending:
             await interaction.response.send_message(
@@ -58,7 +62,7 @@ class SlashRewardCommands(commands.Cog):
             color=discord.Color.orange(),
         )
 
-        for user_id, reward_code, milestone_value in pending:
+        for user_id, milestone_value, reward_code in pending:
             embed.add_field(
                 name=f"User {user_id}",
                 value=f"**Reward:** {reward_code}\n**Milestone:** {milestone_value:,} points",
@@ -70,11 +74,13 @@ class SlashRewardCommands(commands.Cog):
     @app_commands.command(
         name="ttp-markrewardedbatch", description="Mark multiple rewards as sent"
     )
+    @app_commands.guild_only()
     @app_commands.describe(codes="Space-separated reward codes to mark as sent")
     async def markrewardedbatch(self, interaction: discord.Interaction, codes: str):
         """Mark multiple rewards as sent"""
+        guild_id = interaction.guild.id
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
@@ -90,7 +96,7 @@ class SlashRewardCommands(commands.Cog):
         success = []
         failed = []
         for code in code_list:
-            if dao.mark_reward_given(code):
+            if dao.mark_reward_given(guild_id, code):
                 success.append(code)
             else:
                 failed.append(code)
@@ -14,10 +14,11 @@ class SlashRoleCommands(commands.Cog):
     @app_commands.command(
         name="ttp-assignroles", description="Assign roles to all members"
     )
+    @app_commands.guild_only()
     async def assignroles(self, interaction: discord.Interaction):
         """Assign roles to all members based on their current levels"""
         # Check if user is admin
-        if not dao.is_admin(str(interaction.user.id)):
+        if not dao.is_admin(interaction.guild.id, interaction.user.id):
             await interaction.response.send_message(
                 "❌ You don't have permission to use this command.", ephemeral=True
             )
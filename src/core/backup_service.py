@@ -0,0 +1,115 @@
+import asyncio
+import os
+import sqlite3
+from datetime import datetime
+from discord.ext import commands, tasks
+from src.core.database import Database
+import src.core.config as config
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+dao = Database()
+
+
+def backup_database(source_path: str, dest_path: str) -> str:
+    """Copy a live database into dest_path as a consistent snapshot.
+
+    Uses the SQLite online backup API in a single step. A stepped backup
+    restarts whenever another connection writes, so on a busy bot it might
+    never finish; the database is in WAL mode, so writers keep committing
+    while the copy reads. The file only appears at dest_path once the
+    snapshot is complete.
+    """
+    tmp_path = f"{dest_path}.tmp"
+    source = sqlite3.connect(source_path, timeout=config.DATABASE_BUSY_TIMEOUT)
+    try:
+        dest = sqlite3.connect(tmp_path)
+        try:
+            source.backup(dest)
+        finally:
+            dest.close()
+        os.replace(tmp_path, dest_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        source.close()
+    return dest_path
+
+
+class BackupService(commands.Cog):
+    """Takes scheduled rotating backups of the database."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        interval = float(
+            dao.get_config(config.GLOBAL_GUILD_ID, "backup_interval_hours")
+            or config.BACKUP_INTERVAL_HOURS
+        )
+        if interval > 0:
+            self.scheduled_backup.change_interval(hours=interval)
+            self.scheduled_backup.start()
+
+    def cog_unload(self):
+        """Clean up when cog is unloaded."""
+        self.scheduled_backup.cancel()
+
+    @tasks.loop(hours=config.BACKUP_INTERVAL_HOURS)
+    async def scheduled_backup(self):
+        """Periodically snapshot the database and drop old backups."""
+        # Only one shard process backs up the shared database
+        if not dao.holds_lease("database_backup"):
+            return
+        try:
+            path = await self.create_backup()
+            removed = self.rotate()
+            logger.info(
+                f"[BACKUP] Saved {path}"
+                + (f", removed {len(removed)} old backups" if removed else "")
+            )
+        except Exception as e:
+            logger.error(f"Error in scheduled_backup task: {e}")
+
+    @scheduled_backup.before_loop
+    async def before_scheduled_backup(self):
+        """Wait until bot is ready before starting the task."""
+        await self.bot.wait_until_ready()
+
+    async def create_backup(self, dest_path: Optional[str] = None) -> str:
+        """Snapshot the database on a worker thread and return the file path."""
+        if dest_path is None:
+            os.makedirs(config.BACKUP_DIR, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            dest_path = os.path.join(config.BACKUP_DIR, f"database_{timestamp}.db")
+        return await asyncio.to_thread(backup_database, config.DATABASE_NAME, dest_path)
+
+    def list_backups(self) -> List[str]:
+        """Scheduled backups, oldest first."""
+        if not os.path.isdir(config.BACKUP_DIR):
+            return []
+        return sorted(
+            os.path.join(config.BACKUP_DIR, name)
+            for name in os.listdir(config.BACKUP_DIR)
+            if name.startswith("database_") and name.endswith(".db")
+        )
+
+    def rotate(self) -> List[str]:
+        """Delete scheduled backups beyond the configured retention count."""
+        keep = int(
+            dao.get_config(config.GLOBAL_GUILD_ID, "backup_retention_count")
+            or config.BACKUP_RETENTION_COUNT
+        )
+        backups = self.list_backups()
+        expired = backups[: max(0, len(backups) - max(1, keep))]
+        for path in expired:
+            os.remove(path)
+        return expired
+
+
+async def setup(bot):
+    service = BackupService(bot)
+    await bot.add_cog(service)
+    bot.backup_service = service
+    logger.info("Backup service initialized")
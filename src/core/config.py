@@ -1,5 +1,95 @@
 import os
+import socket
 
-DATABASE_NAME = "data/database.db"
+DATABASE_NAME = os.getenv("DATABASE_NAME", "data/database.db")
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 DEFAULT_DAILY_POINTS_LIMIT = 1000
+DASHBOARD_CACHE_MAX_ENTRIES = 500
+DEFAULT_REACTION_INDEX_WINDOW_HOURS = 72
+NOTIFICATION_DISPATCH_INTERVAL = 5
+NOTIFICATION_BATCH_SIZE = 50
+NOTIFICATION_CONCURRENCY = 4
+NOTIFICATION_MAX_ATTEMPTS = 8
+NOTIFICATION_BACKOFF_BASE = 30
+NOTIFICATION_BACKOFF_MAX = 3600
+MILESTONE_DIGEST_WINDOW = 300
+MILESTONE_DIGEST_MAX_EMBED_ROWS = 50
+DM_CHANNEL_CACHE_SIZE = 1000
+DM_CHANNEL_TTL = 3600
+DM_BLOCKED_TTL = 21600
+INVITE_RECONCILE_INTERVAL = 1800
+INVITE_DELETE_GRACE = 60
+ENGAGEMENT_RETENTION_DAYS = 180
+# Daily limits and the weekly dashboard chart read raw rows from the last 7 days
+ENGAGEMENT_RETENTION_MIN_DAYS = 8
+ENGAGEMENT_RETENTION_INTERVAL = 21600
+ENGAGEMENT_RETENTION_BATCH_SIZE = 2000
+ENGAGEMENT_VACUUM_PAGES = 1000
+ENGAGEMENT_ARCHIVE_DIR = "data/archive"
+BACKUP_DIR = "data/backups"
+BACKUP_INTERVAL_HOURS = 24
+BACKUP_RETENTION_COUNT = 7
+# Stay under Discord's default attachment limit
+EXPORT_PART_BYTES = 8 * 1024 * 1024
+EXPORT_CHUNK_BYTES = 1024 * 1024
+EXPORT_FETCH_ROWS = 5000
+ANALYTICS_BATCH_ROWS = 100000
+
+# Sharding: set SHARD_COUNT (and optionally SHARD_IDS="0,1") to run an AutoShardedBot
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+SHARD_IDS = [int(s) for s in os.getenv("SHARD_IDS", "").split(",") if s.strip()] or None
+SHARDED = os.getenv("SHARDED", "false").lower() == "true" or SHARD_COUNT is not None
+PROCESS_ID = os.getenv("PROCESS_ID") or f"{socket.gethostname()}-{os.getpid()}"
+DATABASE_BUSY_TIMEOUT = 30
+# Metrics: set METRICS_PORT to serve Prometheus metrics on METRICS_HOST:METRICS_PORT/metrics
+METRICS_PORT = int(os.getenv("METRICS_PORT")) if os.getenv("METRICS_PORT") else None
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# Tracing: set TRACE_EXPORTER to "jsonl" (writes TRACE_FILE) or "otlp" (posts to
+# TRACE_OTLP_ENDPOINT) to export spans for a sample of events and all slow ones
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "").lower() or None
+TRACE_FILE = os.getenv("TRACE_FILE", "data/traces.jsonl")
+TRACE_OTLP_ENDPOINT = os.getenv(
+    "TRACE_OTLP_ENDPOINT", "http://127.0.0.1:4318/v1/traces"
+)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+# Events at least this slow are always kept (0 keeps only the sampled ones)
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "1000"))
+TRACE_EXPORT_INTERVAL = 5
+TRACE_BUFFER_MAX_SPANS = 20000
+TRACE_MAX_SPANS_PER_TRACE = 500
+# Query profiling (/ttp-queryprofile): statements at or above this are logged with their plan
+DEFAULT_SLOW_QUERY_MS = 100
+QUERY_PROFILE_MAX_STATEMENTS = 1000
+LEASE_TTL = 60
+SHARDED_CACHE_TTL = 30
+
+# Per-guild data: rows under GLOBAL_GUILD_ID hold bot-wide config and the
+# default milestones copied into new guilds
+GLOBAL_GUILD_ID = 0
+DEFAULT_GUILD_ID = (
+    int(os.environ["DEFAULT_GUILD_ID"]) if os.getenv("DEFAULT_GUILD_ID") else None
+)
+# Engagement activity types and their ids in the activity_types table
+ACTIVITY_TYPES = {
+    "message": 1,
+    "reaction": 2,
+    "image": 3,
+    "share": 4,
+    "invite": 5,
+}
+
+GLOBAL_CONFIG_KEYS = {
+    "database_version",
+    "auto_assign_roles_on_startup",
+    "voice_channel_update_interval",
+    "reaction_index_window_hours",
+    "notification_concurrency",
+    "notification_max_attempts",
+    "milestone_digest_window_seconds",
+    "engagement_retention_days",
+    "backup_interval_hours",
+    "backup_retention_count",
+    "query_profile_enabled",
+    "query_profile_sample_rate",
+    "slow_query_ms",
+}
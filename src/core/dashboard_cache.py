@@ -0,0 +1,113 @@
+"""
+Dashboard Snapshot Cache
+Keeps each user's last generated dashboard so repeat requests skip the
+database queries and the browser render entirely.
+"""
+
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+import src.core.config as config
+
+
+class DashboardSnapshotCache:
+    """Per-guild, per-user cache of dashboard data and PNG bytes.
+
+    A snapshot is dropped when its user earns points, when the top 3 of the
+    guild's leaderboard changes, or when the day rolls over. Otherwise it is
+    served as-is. With ``max_age`` set (sharded mode) snapshots also expire,
+    since points earned in another process can't invalidate them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = config.DASHBOARD_CACHE_MAX_ENTRIES,
+        max_age: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        # (guild_id, discord_id) -> (data, png)
+        self._snapshots: "OrderedDict[Tuple[int, int], Tuple[Dict, bytes]]" = (
+            OrderedDict()
+        )
+        self._stored_at: Dict[Tuple[int, int], float] = {}
+        self._top3: Dict[int, Tuple[Tuple[int, int], ...]] = {}
+        self._top3_checked: Set[int] = set()
+        self._day = datetime.now(timezone.utc).date()
+
+    def get(self, guild_id: int, discord_id: int) -> Optional[Tuple[Dict, bytes]]:
+        """Return the cached (data, png) snapshot for a user, if still valid."""
+        self._check_day_rollover()
+        key = (guild_id, discord_id)
+        snapshot = self._snapshots.get(key)
+        if (
+            snapshot is not None
+            and self.max_age
+            and time.monotonic() - self._stored_at.get(key, 0) > self.max_age
+        ):
+            self._snapshots.pop(key)
+            snapshot = None
+        if snapshot is not None:
+            self._snapshots.move_to_end(key)
+        return snapshot
+
+    def put(self, guild_id: int, discord_id: int, data: Dict, png: bytes):
+        """Store a freshly generated snapshot for a user."""
+        self._check_day_rollover()
+        key = (guild_id, discord_id)
+        self._snapshots[key] = (data, png)
+        self._stored_at[key] = time.monotonic()
+        self._snapshots.move_to_end(key)
+        while len(self._snapshots) > self.max_entries:
+            evicted, _ = self._snapshots.popitem(last=False)
+            self._stored_at.pop(evicted, None)
+
+    def invalidate_user(self, guild_id: int, discord_id: int):
+        """Drop a user's snapshot after their points changed."""
+        self._snapshots.pop((guild_id, discord_id), None)
+        # Any points change may have reshuffled the guild's top 3
+        self._top3_checked.discard(guild_id)
+
+    def invalidate_all(self, guild_id: Optional[int] = None):
+        """Drop every snapshot of a guild (e.g. after a points reset), or all."""
+        if guild_id is None:
+            self._snapshots.clear()
+            self._top3.clear()
+            self._top3_checked.clear()
+            return
+        self._drop_guild(guild_id)
+        self._top3.pop(guild_id, None)
+        self._top3_checked.discard(guild_id)
+
+    def needs_top3_check(self, guild_id: int) -> bool:
+        """True if points changed since the guild's top 3 was last compared."""
+        return guild_id not in self._top3_checked
+
+    def update_top3(self, guild_id: int, leaderboard: List[Tuple[int, int]]):
+        """Compare the current top 3 with the one snapshots were built from."""
+        top3 = tuple(leaderboard)
+        previous = self._top3.get(guild_id)
+        if previous is not None and top3 != previous:
+            self._drop_guild(guild_id)
+        self._top3[guild_id] = top3
+        self._top3_checked.add(guild_id)
+
+    def _drop_guild(self, guild_id: int):
+        for key in [key for key in self._snapshots if key[0] == guild_id]:
+            del self._snapshots[key]
+            self._stored_at.pop(key, None)
+
+    def _check_day_rollover(self):
+        """Clear all snapshots once the UTC date changes (weekly chart, daily points)."""
+        today = datetime.now(timezone.utc).date()
+        if today != self._day:
+            self._snapshots.clear()
+            self._stored_at.clear()
+            self._day = today
+
+
+# Shared by every Database instance so invalidation reaches the dashboard cog
+snapshot_cache = DashboardSnapshotCache(
+    max_age=config.SHARDED_CACHE_TTL if config.SHARDED else None
+)
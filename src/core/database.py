@@ -1,361 +1,590 @@
 import sqlite3
-from datetime import datetime
+import time
 from typing import Optional, List, Tuple, Dict
 import src.core.config as config
+from src.core import metrics, tracing
+from src.core.dashboard_cache import snapshot_cache
+from src.core.reaction_index import reaction_index
+from src.core.milestone_ladder import MilestoneLadder, ladder_cache
+from src.core.query_profiler import profile_methods, query_profiler
 
 DB_PATH = config.DATABASE_NAME
 
+# Activity type ids are inlined into queries so they match the partial indexes
+MESSAGE = config.ACTIVITY_TYPES["message"]
+REACTION = config.ACTIVITY_TYPES["reaction"]
+IMAGE = config.ACTIVITY_TYPES["image"]
+INVITE = config.ACTIVITY_TYPES["invite"]
+
 
 class Database:
     def __init__(self, db_path=DB_PATH):
         self.db_path = db_path
 
     def _connect(self):
-        return sqlite3.connect(self.db_path)
+        # Other shard processes may hold the write lock briefly
+        if query_profiler.active():
+            return query_profiler.connect(self.db_path, config.DATABASE_BUSY_TIMEOUT)
+        return sqlite3.connect(self.db_path, timeout=config.DATABASE_BUSY_TIMEOUT)
+
+    def get_milestone_ladder(self, guild_id: int) -> MilestoneLadder:
+        """Return the guild's milestone ladder, building it on first use."""
+        ladder = ladder_cache.get(guild_id)
+        if ladder is None:
+            ladder = MilestoneLadder(self.get_active_milestones(guild_id))
+            with self._connect() as conn:
+                cur = conn.cursor()
+                cur.execute(
+                    "SELECT discord_id, milestone FROM milestones_log WHERE guild_id = ?",
+                    (guild_id,),
+                )
+                ladder.load_achieved(cur.fetchall())
+            ladder_cache.set(guild_id, ladder)
+        return ladder
+
+    def activity_type_id(self, activity_type: str) -> int:
+        """Id of an activity type name, as stored in engagement tables."""
+        try:
+            return config.ACTIVITY_TYPES[activity_type]
+        except KeyError:
+            raise ValueError(f"Unknown activity type: {activity_type}")
+
+    def _points_changed(self, guild_id: int, discord_id: int):
+        """Invalidate cached views that depend on a user's points."""
+        snapshot_cache.invalidate_user(guild_id, discord_id)
+
+    def ensure_guild(self, guild_id: int):
+        """Give a guild the default milestones the first time it is seen."""
+        with self._connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                INSERT OR IGNORE INTO milestones (guild_id, value, status, message, role_name, is_level_based, reward)
+                SELECT ?, value, status, message, role_name, is_level_based, reward
+                FROM milestones
+                WHERE guild_id = ?
+                AND NOT EXISTS (SELECT 1 FROM milestones WHERE guild_id = ?)
+                """,
+                (guild_id, config.GLOBAL_GUILD_ID, guild_id),
+            )
+            conn.commit()
+            if cur.rowcount > 0:
+                ladder_cache.invalidate(guild_id)
 
-    def get_config(self, key: str) -> Optional[str]:
+    def get_config(self, guild_id: int, key: str) -> Optional[str]:
+        """Get a guild's config value, falling back to the bot-wide default."""
         with self._connect() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT value FROM config WHERE key = ?", (key,))
+            cur.execute(
+                """
+                SELECT value FROM config
+                WHERE key = ? AND guild_id IN (?, ?)
+                ORDER BY guild_id = ?
+                LIMIT 1
+                """,
+                (key, guild_id, config.GLOBAL_GUILD_ID, config.GLOBAL_GUILD_ID),
+            )
             result = cur.fetchone()
             return result[0] if result else None
 
-    def set_config(self, key: str, value: str):
+    def set_config(self, guild_id: int, key: str, value: str):
+        if key in config.GLOBAL_CONFIG_KEYS:
+            guild_id = config.GLOBAL_GUILD_ID
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", (key, value)
+                "INSERT OR REPLACE INTO config (guild_id, key, value) VALUES (?, ?, ?)",
+                (guild_id, key, value),
             )
             conn.commit()
 
-    def add_points_to_member(self, discord_id: str, points: int):
+    def add_points_to_member(self, guild_id: int, discord_id: int, points: int):
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
-                INSERT INTO members (discord_id, total_points, level, current_streak, longest_streak, last_activity_date)
-                VALUES (?, ?, 0, 0, 0, date('now', '-1 day'))
-                ON CONFLICT(discord_id) DO UPDATE SET total_points = total_points + ?
+                INSERT INTO members (guild_id, discord_id, total_points, level, current_streak, longest_streak, last_activity_date)
+                VALUES (?, ?, ?, 0, 0, 0, date('now', '-1 day'))
+                ON CONFLICT(guild_id, discord_id) DO UPDATE SET total_points = total_points + ?
                 """,
-                (discord_id, points, points),
+                (guild_id, discord_id, points, points),
             )
             conn.commit()
+        self._points_changed(guild_id, discord_id)
 
     def log_engagement(
         self,
-        discord_id: str,
+        guild_id: int,
+        discord_id: int,
         activity_type: str,
-        activity_object_id: Optional[str],
-        channel_id: Optional[str],
+        activity_object_id: Optional[int],
+        channel_id: Optional[int],
         point_value: int = 0,
     ):
+        type_id = self.activity_type_id(activity_type)
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
-                INSERT INTO engagement_log (discord_id, activity_type, activity_object_id, channel_id, point_value)
-                VALUES (?, ?, ?, ?, ?)
+                INSERT INTO engagement_log (guild_id, discord_id, activity_type_id, activity_object_id, channel_id, point_value)
+                VALUES (?, ?, ?, ?, ?, ?)
                 """,
                 (
+                    guild_id,
                     discord_id,
-                    activity_type,
+                    type_id,
                     activity_object_id,
                     channel_id,
                     point_value,
                 ),
             )
             conn.commit()
+        if activity_type == "reaction" and reaction_index.loaded:
+            reaction_index.add(discord_id, activity_object_id)
+        metrics.points_awarded.inc(activity_type, amount=point_value)
+        self._points_changed(guild_id, discord_id)
 
-    def has_user_reacted_to_message(self, discord_id: str, message_id: str) -> bool:
+    def award_engagement_once(
+        self,
+        guild_id: int,
+        discord_id: int,
+        activity_type: str,
+        activity_object_id: int,
+        channel_id: Optional[int],
+        point_value: int,
+    ) -> bool:
+        """
+        Log a deduplicated engagement (reaction/invite) and award its points.
+        The unique index decides, together with the keys of rows moved out by
+        retention; returns False if it was already logged.
+        """
+        type_id = self.activity_type_id(activity_type)
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
-                SELECT 1 FROM engagement_log
-                WHERE discord_id = ? AND activity_type = 'reaction' AND activity_object_id = ?
-            """,
-                (discord_id, message_id),
+                INSERT INTO engagement_log (guild_id, discord_id, activity_type_id, activity_object_id, channel_id, point_value)
+                SELECT ?, ?, ?, ?, ?, ?
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM engagement_keys
+                    WHERE guild_id = ? AND discord_id = ? AND activity_type_id = ? AND activity_object_id = ?
+                )
+                ON CONFLICT DO NOTHING
+                """,
+                (
+                    guild_id,
+                    discord_id,
+                    type_id,
+                    activity_object_id,
+                    channel_id,
+                    point_value,
+                    guild_id,
+                    discord_id,
+                    type_id,
+                    activity_object_id,
+                ),
             )
-            return cur.fetchone() is not None
+            if cur.rowcount == 0:
+                inserted = False
+            else:
+                inserted = True
+                cur.execute(
+                    """
+                    INSERT INTO members (guild_id, discord_id, total_points, level, current_streak, longest_streak, last_activity_date)
+                    VALUES (?, ?, ?, 0, 0, 0, date('now', '-1 day'))
+                    ON CONFLICT(guild_id, discord_id) DO UPDATE SET total_points = total_points + ?
+                    """,
+                    (guild_id, discord_id, point_value, point_value),
+                )
+            conn.commit()
+
+        if activity_type == "reaction" and reaction_index.loaded:
+            reaction_index.add(discord_id, activity_object_id)
+        if inserted:
+            metrics.points_awarded.inc(activity_type, amount=point_value)
+            self._points_changed(guild_id, discord_id)
+        return inserted
+
+    def _get_reaction_index(self):
+        """Return the shared reaction index, loading the recent window on first use."""
+        if not reaction_index.loaded:
+            window_hours = int(
+                self.get_config(config.GLOBAL_GUILD_ID, "reaction_index_window_hours")
+                or config.DEFAULT_REACTION_INDEX_WINDOW_HOURS
+            )
+            with self._connect() as conn:
+                cur = conn.cursor()
+                cur.execute(
+                    f"""
+                    SELECT discord_id, activity_object_id FROM engagement_log
+                    WHERE activity_type_id = {REACTION} AND timestamp >= ?
+                    """,
+                    (int(time.time()) - window_hours * 3600,),
+                )
+                reaction_index.load(window_hours, cur.fetchall())
+        return reaction_index
+
+    def has_user_reacted_to_message(
+        self, guild_id: int, discord_id: int, message_id: int
+    ) -> bool:
+        # Recent messages are answered from memory
+        seen = self._get_reaction_index().lookup(discord_id, message_id)
+        if seen is not None:
+            return seen
 
-    def has_invited_before(self, inviter_id: str, invitee_id: str) -> bool:
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                """
+                f"""
                 SELECT 1 FROM engagement_log
-                WHERE discord_id = ? AND activity_type = 'invite' AND activity_object_id = ?
-                """,
-                (inviter_id, f"invite_{invitee_id}"),
+                WHERE guild_id = ? AND discord_id = ? AND activity_type_id = {REACTION} AND activity_object_id = ?
+                UNION ALL
+                SELECT 1 FROM engagement_keys
+                WHERE guild_id = ? AND discord_id = ? AND activity_type_id = {REACTION} AND activity_object_id = ?
+            """,
+                (guild_id, discord_id, message_id) * 2,
             )
             return cur.fetchone() is not None
 
-    def get_next_milestone(self, discord_id: str) -> Optional[int]:
-        with self._connect() as conn:
-            cur = conn.cursor()
-            # Fetch all active milestone values
-            cur.execute(
-                "SELECT value FROM milestones WHERE status = 'active' ORDER BY value ASC"
-            )
-            milestones = [row[0] for row in cur.fetchall()]
+    def is_reaction_known(self, discord_id: int, message_id: int) -> bool:
+        """True if the in-memory index has already seen this reaction (no SQL).
 
-            # Get current points
-            points = self.get_user_points(discord_id)
+        Message ids are unique across guilds, so the index needs no guild key.
+        """
+        return bool(self._get_reaction_index().lookup(discord_id, message_id))
 
-            # Get already recorded milestones
+    def has_invited_before(
+        self, guild_id: int, inviter_id: int, invitee_id: int
+    ) -> bool:
+        with self._connect() as conn:
+            cur = conn.cursor()
             cur.execute(
-                "SELECT milestone FROM milestones_log WHERE discord_id = ?",
-                (discord_id,),
+                f"""
+                SELECT 1 FROM engagement_log
+                WHERE guild_id = ? AND discord_id = ? AND activity_type_id = {INVITE} AND activity_object_id = ?
+                UNION ALL
+                SELECT 1 FROM engagement_keys
+                WHERE guild_id = ? AND discord_id = ? AND activity_type_id = {INVITE} AND activity_object_id = ?
+                """,
+                (guild_id, inviter_id, invitee_id) * 2,
             )
-            recorded = {row[0] for row in cur.fetchall()}
+            return cur.fetchone() is not None
 
-            # Return the first unrecorded milestone the user qualifies for
-            for milestone in milestones:
-                if points >= milestone and milestone not in recorded:
-                    return milestone
+    def get_next_milestone(
+        self, guild_id: int, discord_id: int, points: Optional[int] = None
+    ) -> Optional[int]:
+        if points is None:
+            points = self.get_user_points(guild_id, discord_id)
 
-            return None
+        # Return the first unrecorded milestone the user qualifies for
+        return self.get_milestone_ladder(guild_id).first_unrecorded(discord_id, points)
 
-    def get_next_milestone_by_points(self, current_points: int) -> Optional[int]:
+    def get_next_milestone_by_points(
+        self, guild_id: int, current_points: int
+    ) -> Optional[int]:
         """Get the next milestone based on current points (for dashboard)."""
-        with self._connect() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "SELECT value FROM milestones WHERE status = 'active' AND value > ? ORDER BY value ASC LIMIT 1",
-                (current_points,),
-            )
-            result = cur.fetchone()
-            return result[0] if result else None
+        next_milestone = self.get_milestone_ladder(guild_id).next_after(current_points)
+        return next_milestone["value"] if next_milestone else None
 
-    def get_leaderboard(self, limit=10) -> List[Tuple[str, int]]:
+    def get_leaderboard(self, guild_id: int, limit=10) -> List[Tuple[int, int]]:
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
                 SELECT discord_id, total_points
                 FROM members
-                WHERE discord_id NOT IN (SELECT discord_id FROM excluded_leaderboard)
+                WHERE guild_id = ?
+                AND discord_id NOT IN (SELECT discord_id FROM excluded_leaderboard WHERE guild_id = ?)
                 ORDER BY total_points DESC
                 LIMIT ?
                 """,
-                (limit,),
+                (guild_id, guild_id, limit),
             )
             return cur.fetchall()
 
-    def get_top_users(self, limit=10) -> List[Dict]:
+    def get_top_users(self, guild_id: int, limit=10) -> List[Dict]:
         """Get top members with detailed statistics for leaderboard display."""
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                """
+                f"""
                 SELECT 
                     m.discord_id,
                     m.total_points,
-                    COALESCE(msg_count.count, 0) as messages,
-                    COALESCE(reaction_count.count, 0) as reactions,
-                    COALESCE(image_count.count, 0) as images,
-                    COALESCE(invite_count.count, 0) as invites
-                FROM members m
-                LEFT JOIN (
-                    SELECT discord_id, COUNT(*) as count
-                    FROM engagement_log
-                    WHERE activity_type = 'message'
-                    GROUP BY discord_id
-                ) msg_count ON m.discord_id = msg_count.discord_id
-                LEFT JOIN (
-                    SELECT discord_id, COUNT(*) as count
-                    FROM engagement_log
-                    WHERE activity_type = 'reaction'
-                    GROUP BY discord_id
-                ) reaction_count ON m.discord_id = reaction_count.discord_id
-                LEFT JOIN (
-                    SELECT discord_id, COUNT(*) as count
-                    FROM engagement_log
-                    WHERE activity_type = 'image'
-                    GROUP BY discord_id
-                ) image_count ON m.discord_id = image_count.discord_id
+                    COALESCE(SUM(CASE WHEN a.activity_type_id = {MESSAGE} THEN a.count END), 0) as messages,
+                    COALESCE(SUM(CASE WHEN a.activity_type_id = {REACTION} THEN a.count END), 0) as reactions,
+                    COALESCE(SUM(CASE WHEN a.activity_type_id = {IMAGE} THEN a.count END), 0) as images,
+                    COALESCE(SUM(CASE WHEN a.activity_type_id = {INVITE} THEN a.count END), 0) as invites
+                FROM (
+                    SELECT discord_id, total_points
+                    FROM members
+                    WHERE guild_id = ?
+                    AND discord_id NOT IN (SELECT discord_id FROM excluded_leaderboard WHERE guild_id = ?)
+                    ORDER BY total_points DESC
+                    LIMIT ?
+                ) m
                 LEFT JOIN (
-                    SELECT discord_id, COUNT(*) as count
+                    -- Recent activity from the log, older activity from the daily rollups
+                    SELECT discord_id, activity_type_id, COUNT(*) as count
                     FROM engagement_log
-                    WHERE activity_type = 'invite'
-                    GROUP BY discord_id
-                ) invite_count ON m.discord_id = invite_count.discord_id
-                WHERE m.discord_id NOT IN (SELECT discord_id FROM excluded_leaderboard)
+                    WHERE guild_id = ?
+                    GROUP BY discord_id, activity_type_id
+                    UNION ALL
+                    SELECT discord_id, activity_type_id, SUM(count) as count
+                    FROM engagement_daily
+                    WHERE guild_id = ?
+                    GROUP BY discord_id, activity_type_id
+                ) a ON m.discord_id = a.discord_id
+                GROUP BY m.discord_id, m.total_points
                 ORDER BY m.total_points DESC
-                LIMIT ?
                 """,
-                (limit,),
+                (guild_id, guild_id, limit, guild_id, guild_id),
             )
 
             columns = [description[0] for description in cur.description]
             return [dict(zip(columns, row)) for row in cur.fetchall()]
 
-    def record_milestone(self, discord_id: str, milestone: int, reward_code: str):
+    def record_milestone(
+        self,
+        guild_id: int,
+        discord_id: int,
+        milestone: int,
+        reward_code: str,
+        notifications: Optional[List[Tuple[str, str]]] = None,
+    ):
+        """
+        Record a reached milestone. Optional (kind, message) notifications are
+        queued in the same transaction for the background dispatcher.
+        """
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
-                INSERT INTO milestones_log (discord_id, milestone, reached_at, user_notified, admin_notified, reward_status, reward_code)
-                VALUES (?, ?, ?, 0, 0, 'pending', ?)
+                INSERT INTO milestones_log (guild_id, discord_id, milestone, reached_at, user_notified, admin_notified, reward_status, reward_code)
+                VALUES (?, ?, ?, ?, 0, 0, 'pending', ?)
                 """,
-                (discord_id, milestone, datetime.utcnow(), reward_code),
+                (guild_id, discord_id, milestone, int(time.time()), reward_code),
             )
+            for kind, message in notifications or []:
+                cur.execute(
+                    """
+                    INSERT INTO notification_outbox (guild_id, kind, discord_id, milestone, message)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (guild_id, kind, discord_id, milestone, message),
+                )
             conn.commit()
+        self.get_milestone_ladder(guild_id).mark_achieved(discord_id, milestone)
 
-    def mark_milestone_user_notified(self, discord_id: str, milestone: int):
+    def mark_milestone_user_notified(
+        self, guild_id: int, discord_id: int, milestone: int
+    ):
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
                 UPDATE milestones_log
                 SET user_notified = 1
-                WHERE discord_id = ? AND milestone = ?
+                WHERE guild_id = ? AND discord_id = ? AND milestone = ?
                 """,
-                (discord_id, milestone),
+                (guild_id, discord_id, milestone),
             )
             conn.commit()
 
-    def mark_milestone_admin_notified(self, discord_id: str, milestone: int):
+    def mark_milestone_admin_notified(
+        self, guild_id: int, discord_id: int, milestone: int
+    ):
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
                 UPDATE milestones_log
                 SET admin_notified = 1
-                WHERE discord_id = ? AND milestone = ?
+                WHERE guild_id = ? AND discord_id = ? AND milestone = ?
                 """,
-                (discord_id, milestone),
+                (guild_id, discord_id, milestone),
             )
             conn.commit()
 
-    def get_user_points(self, discord_id: str) -> int:
+    def get_admin_pending_milestones(self) -> List[Dict]:
+        """Get reached milestones admins haven't been told about yet (all guilds)."""
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
-                SELECT total_points FROM members WHERE discord_id = ?
+                SELECT id, guild_id, discord_id, milestone, reward_code, reached_at
+                FROM milestones_log
+                WHERE admin_notified = 0
+                ORDER BY id ASC
+                """
+            )
+            columns = [description[0] for description in cur.description]
+            return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    def mark_milestones_admin_notified_by_ids(self, log_ids: List[int]):
+        """Mark a batch of milestones_log rows as reported to admins."""
+        with self._connect() as conn:
+            cur = conn.cursor()
+            cur.executemany(
+                "UPDATE milestones_log SET admin_notified = 1 WHERE id = ?",
+                [(log_id,) for log_id in log_ids],
+            )
+            conn.commit()
+
+    def get_user_points(self, guild_id: int, discord_id: int) -> int:
+        with self._connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                SELECT total_points FROM members WHERE guild_id = ? AND discord_id = ?
                 """,
-                (discord_id,),
+                (guild_id, discord_id),
             )
             row = cur.fetchone()
             return row[0] if row else 0
 
-    def get_user_level(self, discord_id: str) -> int:
+    def get_user_level(self, guild_id: int, discord_id: int) -> int:
         """Get user's current level (milestone value)."""
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
-                SELECT level FROM members WHERE discord_id = ?
+                SELECT level FROM members WHERE guild_id = ? AND discord_id = ?
                 """,
-                (discord_id,),
+                (guild_id, discord_id),
             )
             row = cur.fetchone()
             return row[0] if row else 0
 
-    def update_user_level(self, discord_id: str, points: int):
+    def update_user_level(self, guild_id: int, discord_id: int, points: int):
         """Update user's level based on their points and milestone values."""
+        # Find the highest milestone the user qualifies for
+        user_level = self.get_milestone_ladder(guild_id).level_for(points)
+
         with self._connect() as conn:
             cur = conn.cursor()
 
-            # Get all milestone values in descending order
+            # Update the user's level
             cur.execute(
-                "SELECT value FROM milestones WHERE status = 'active' ORDER BY value DESC"
+                """
+                UPDATE members SET level = ? WHERE guild_id = ? AND discord_id = ?
+                """,
+                (user_level, guild_id, discord_id),
             )
-            milestones = [row[0] for row in cur.fetchall()]
-
-            # Find the highest milestone the user qualifies for
-            user_level = 0
-            for milestone in milestones:
-                if points >= milestone:
-                    user_level = milestone
-                    break
+            conn.commit()
 
-            # Update the user's level
+    def is_admin(self, guild_id: int, discord_id: int) -> bool:
+        """Admin of the guild, or a bot-wide admin (global guild)."""
+        with self._connect() as conn:
+            cur = conn.cursor()
             cur.execute(
                 """
-                UPDATE members SET level = ? WHERE discord_id = ?
+                SELECT 1 FROM admin_ids
+                WHERE guild_id IN (?, ?) AND discord_id = ? AND status = 'active'
                 """,
-                (user_level, discord_id),
+                (guild_id, config.GLOBAL_GUILD_ID, discord_id),
             )
-            conn.commit()
+            return cur.fetchone() is not None
 
-    def is_admin(self, discord_id: str) -> bool:
+    def is_global_admin(self, discord_id: int) -> bool:
+        """Bot-wide admin, allowed to change settings shared by every guild."""
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "SELECT 1 FROM admin_ids WHERE discord_id = ? AND status = 'active'",
-                (discord_id,),
+                "SELECT 1 FROM admin_ids WHERE guild_id = ? AND discord_id = ? AND status = 'active'",
+                (config.GLOBAL_GUILD_ID, discord_id),
             )
             return cur.fetchone() is not None
 
-    def reset_user_points(self, discord_id: str):
+    def reset_user_points(self, guild_id: int, discord_id: int):
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "UPDATE members SET total_points = 0 WHERE discord_id = ?",
-                (discord_id,),
+                "UPDATE members SET total_points = 0 WHERE guild_id = ? AND discord_id = ?",
+                (guild_id, discord_id),
             )
             conn.commit()
+        self._points_changed(guild_id, discord_id)
 
-    def reset_all_points(self):
+    def reset_all_points(self, guild_id: int):
         with self._connect() as conn:
             cur = conn.cursor()
-            cur.execute("UPDATE members SET total_points = 0")
-            cur.execute("DELETE from milestones_log")
+            cur.execute(
+                "UPDATE members SET total_points = 0 WHERE guild_id = ?", (guild_id,)
+            )
+            cur.execute("DELETE from milestones_log WHERE guild_id = ?", (guild_id,))
             conn.commit()
+        ladder = ladder_cache.get(guild_id)
+        if ladder is not None:
+            ladder.clear_achieved()
+        snapshot_cache.invalidate_all(guild_id)
 
-    def set_user_points(self, discord_id: str, amount: int):
+    def set_user_points(self, guild_id: int, discord_id: int, amount: int):
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
-                INSERT INTO members (discord_id, total_points, level, current_streak, longest_streak, last_activity_date)
-                VALUES (?, ?, 0, 0, 0, date('now', '-1 day'))
-                ON CONFLICT(discord_id) DO UPDATE SET total_points = ?
+                INSERT INTO members (guild_id, discord_id, total_points, level, current_streak, longest_streak, last_activity_date)
+                VALUES (?, ?, ?, 0, 0, 0, date('now', '-1 day'))
+                ON CONFLICT(guild_id, discord_id) DO UPDATE SET total_points = ?
                 """,
-                (discord_id, amount, amount),
+                (guild_id, discord_id, amount, amount),
             )
             conn.commit()
+        self._points_changed(guild_id, discord_id)
 
-    def increment_user_points(self, discord_id: str, delta: int):
+    def increment_user_points(self, guild_id: int, discord_id: int, delta: int):
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
-            INSERT INTO members (discord_id, total_points, level, current_streak, longest_streak, last_activity_date)
-            VALUES (?, ?, 0, 0, 0, date('now', '-1 day'))
-            ON CONFLICT(discord_id) DO UPDATE SET total_points = total_points + ?
+            INSERT INTO members (guild_id, discord_id, total_points, level, current_streak, longest_streak, last_activity_date)
+            VALUES (?, ?, ?, 0, 0, 0, date('now', '-1 day'))
+            ON CONFLICT(guild_id, discord_id) DO UPDATE SET total_points = total_points + ?
             """,
-                (discord_id, delta, delta),
+                (guild_id, discord_id, delta, delta),
             )
         conn.commit()
+        self._points_changed(guild_id, discord_id)
 
-    def user_exists(self, discord_id: str) -> bool:
+    def user_exists(self, guild_id: int, discord_id: int) -> bool:
         with self._connect() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT 1 FROM members WHERE discord_id = ?", (discord_id,))
+            cur.execute(
+                "SELECT 1 FROM members WHERE guild_id = ? AND discord_id = ?",
+                (guild_id, discord_id),
+            )
             return cur.fetchone() is not None
 
-    def update_config(self, key: str, value: str) -> bool:
-        with self._connect() as conn:
-            cur = conn.cursor()
-            cur.execute("UPDATE config SET value = ? WHERE key = ?", (value, key))
-            conn.commit()
-            return cur.rowcount > 0  # True if updated, False if key didn't exist
+    def update_config(self, guild_id: int, key: str, value: str) -> bool:
+        """Override an existing config key for a guild."""
+        if key in config.GLOBAL_CONFIG_KEYS:
+            guild_id = config.GLOBAL_GUILD_ID
+        if self.get_config(guild_id, key) is None:
+            return False  # key didn't exist
+        self.set_config(guild_id, key, value)
+        return True
 
-    def get_all_configs(self) -> Dict[str, str]:
+    def get_all_configs(self, guild_id: int) -> Dict[str, str]:
+        """Get the effective config for a guild (defaults plus its overrides)."""
         with self._connect() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT key, value FROM config")
+            cur.execute(
+                """
+                SELECT key, value FROM config
+                WHERE guild_id IN (?, ?)
+                ORDER BY guild_id = ?
+                """,
+                (guild_id, config.GLOBAL_GUILD_ID, guild_id),
+            )
             return dict(cur.fetchall())
 
-    def is_bot_channel(self, channel_id: str) -> bool:
+    def is_bot_channel(self, guild_id: int, channel_id: int) -> bool:
         """Check if the given channel is the configured bot channel."""
-        bot_channel_id = self.get_config("bot_channel_id")
-        return bot_channel_id == channel_id
+        bot_channel_id = self.get_config(guild_id, "bot_channel_id")
+        return bot_channel_id == str(channel_id)
 
-    def get_daily_points(self, discord_id: str) -> int:
+    def get_daily_points(self, guild_id: int, discord_id: int) -> int:
         """Get the total points earned by a user in the last 24 hours."""
         with self._connect() as conn:
             cur = conn.cursor()
@@ -363,189 +592,191 @@ class Database:
                 """
                 SELECT COALESCE(SUM(point_value), 0)
                 FROM engagement_log
-                WHERE discord_id = ?
-                AND timestamp >= datetime('now', '-1 day')
+                WHERE guild_id = ? AND discord_id = ?
+                AND timestamp >= ?
                 """,
-                (discord_id,),
+                (guild_id, discord_id, int(time.time()) - 86400),
             )
             return cur.fetchone()[0]
 
-    def can_earn_points(self, discord_id: str, points_to_add: int) -> bool:
+    def get_activity_counts(self, guild_id: int, discord_id: int) -> Dict[str, int]:
+        """All-time activity counts per type, including rolled-up history."""
+        with self._connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                SELECT t.name, SUM(a.count) FROM (
+                    SELECT activity_type_id, COUNT(*) as count
+                    FROM engagement_log
+                    WHERE guild_id = ? AND discord_id = ?
+                    GROUP BY activity_type_id
+                    UNION ALL
+                    SELECT activity_type_id, SUM(count) as count
+                    FROM engagement_daily
+                    WHERE guild_id = ? AND discord_id = ?
+                    GROUP BY activity_type_id
+                ) a
+                JOIN activity_types t ON t.id = a.activity_type_id
+                GROUP BY t.name
+                """,
+                (guild_id, discord_id, guild_id, discord_id),
+            )
+            return dict(cur.fetchall())
+
+    def can_earn_points(
+        self, guild_id: int, discord_id: int, points_to_add: int
+    ) -> bool:
         """Check if a user can earn more points today."""
         daily_limit = int(
-            self.get_config("daily_points_limit") or config.DEFAULT_DAILY_POINTS_LIMIT
+            self.get_config(guild_id, "daily_points_limit")
+            or config.DEFAULT_DAILY_POINTS_LIMIT
         )
-        current_daily_points = self.get_daily_points(discord_id)
+        current_daily_points = self.get_daily_points(guild_id, discord_id)
         return (current_daily_points + points_to_add) <= daily_limit
 
     def get_active_milestones(
-        self,
+        self, guild_id: int
     ) -> List[Tuple[int, Optional[str], Optional[str], bool, Optional[str]]]:
         with self._connect() as conn:
             cur = conn.cursor()
-            try:
-                cur.execute(
-                    "SELECT value, message, role_name, is_level_based, reward FROM milestones WHERE status = 'active' ORDER BY value ASC"
-                )
-                return cur.fetchall()
-            except sqlite3.OperationalError:
-                # New columns don't exist yet, fall back to old format
-                cur.execute(
-                    "SELECT value, message FROM milestones WHERE status = 'active' ORDER BY value ASC"
-                )
-                # Convert to new format with None values for missing columns
-                old_results = cur.fetchall()
-                return [
-                    (value, message, None, True, None) for value, message in old_results
-                ]
+            cur.execute(
+                """
+                SELECT value, message, role_name, is_level_based, reward FROM milestones
+                WHERE guild_id = ? AND status = 'active'
+                ORDER BY value ASC
+                """,
+                (guild_id,),
+            )
+            return cur.fetchall()
 
-    def track_channel(self, channel_id: str):
+    def track_channel(self, guild_id: int, channel_id: int):
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
-                INSERT INTO tracked_channels (channel_id, status)
-                VALUES (?, 'active')
+                INSERT INTO tracked_channels (guild_id, channel_id, status)
+                VALUES (?, ?, 'active')
                 ON CONFLICT(channel_id) DO UPDATE SET status = 'active'
                 """,
-                (channel_id,),
+                (guild_id, channel_id),
             )
             conn.commit()
 
-    def untrack_channel(self, channel_id: str):
+    def untrack_channel(self, guild_id: int, channel_id: int):
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "UPDATE tracked_channels SET status = 'inactive' WHERE channel_id = ?",
-                (channel_id,),
+                "UPDATE tracked_channels SET status = 'inactive' WHERE guild_id = ? AND channel_id = ?",
+                (guild_id, channel_id),
             )
             conn.commit()
 
-    def get_tracked_channels(self) -> List[str]:
+    def get_tracked_channels(self, guild_id: int) -> List[str]:
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "SELECT channel_id FROM tracked_channels WHERE status = 'active'"
+                "SELECT channel_id FROM tracked_channels WHERE guild_id = ? AND status = 'active'",
+                (guild_id,),
             )
             return [row[0] for row in cur.fetchall()]
 
-    def get_all_admin_ids(self) -> List[str]:
+    def get_all_admin_ids(self, guild_id: int) -> List[int]:
+        """Admins of the guild, including bot-wide admins."""
         with self._connect() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT discord_id FROM admin_ids WHERE status = 'active'")
+            cur.execute(
+                """
+                SELECT DISTINCT discord_id FROM admin_ids
+                WHERE guild_id IN (?, ?) AND status = 'active'
+                """,
+                (guild_id, config.GLOBAL_GUILD_ID),
+            )
             return [row[0] for row in cur.fetchall()]
 
-    def add_admin(self, discord_id: str):
+    def add_admin(self, guild_id: int, discord_id: int):
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
-                INSERT INTO admin_ids (discord_id, status)
-                VALUES (?, 'active')
-                ON CONFLICT(discord_id) DO UPDATE SET status = 'active'
+                INSERT INTO admin_ids (guild_id, discord_id, status)
+                VALUES (?, ?, 'active')
+                ON CONFLICT(guild_id, discord_id) DO UPDATE SET status = 'active'
                 """,
-                (discord_id,),
+                (guild_id, discord_id),
             )
             conn.commit()
 
-    def remove_admin(self, discord_id: str):
+    def remove_admin(self, guild_id: int, discord_id: int) -> bool:
+        """Revoke a guild admin. Bot-wide admins are not affected."""
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "UPDATE admin_ids SET status = 'inactive' WHERE discord_id = ?",
-                (discord_id,),
+                """
+                UPDATE admin_ids SET status = 'inactive'
+                WHERE guild_id = ? AND discord_id = ? AND status = 'active'
+                """,
+                (guild_id, discord_id),
             )
             conn.commit()
+            return cur.rowcount > 0
 
-    def is_tracked_channel(self, channel_id: str) -> bool:
+    def is_tracked_channel(self, guild_id: int, channel_id: int) -> bool:
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "SELECT 1 FROM tracked_channels WHERE channel_id = ? AND status = 'active'",
-                (channel_id,),
+                "SELECT 1 FROM tracked_channels WHERE guild_id = ? AND channel_id = ? AND status = 'active'",
+                (guild_id, channel_id),
             )
             return cur.fetchone() is not None
 
-    def mark_reward_given(self, reward_code: str):
+    def mark_reward_given(self, guild_id: int, reward_code: str):
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "UPDATE milestones_log SET reward_status = 'sent' WHERE reward_code = ?",
-                (reward_code,),
+                "UPDATE milestones_log SET reward_status = 'sent' WHERE guild_id = ? AND reward_code = ?",
+                (guild_id, reward_code),
             )
             conn.commit()
             return cur.rowcount > 0
 
-    def get_unrewarded_milestones(self) -> List[Tuple[str, int, str]]:
+    def get_unrewarded_milestones(self, guild_id: int) -> List[Tuple[int, int, str]]:
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
                 SELECT discord_id, milestone, reward_code 
                 FROM milestones_log 
-                WHERE reward_status = 'pending' 
+                WHERE guild_id = ? AND reward_status = 'pending' 
                 ORDER BY reached_at ASC
-                """
+                """,
+                (guild_id,),
             )
             return cur.fetchall()
 
-    def get_milestone_message(self, milestone: int) -> Optional[str]:
-        with self._connect() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "SELECT message FROM milestones WHERE value = ? AND status = 'active'",
-                (milestone,),
-            )
-            result = cur.fetchone()
-            return result[0] if result else None
+    def get_milestone_message(self, guild_id: int, milestone: int) -> Optional[str]:
+        details = self.get_milestone_ladder(guild_id).details(milestone)
+        return details["message"] if details else None
 
-    def get_milestone_details(self, milestone: int) -> Optional[Dict]:
-        with self._connect() as conn:
-            cur = conn.cursor()
-            try:
-                cur.execute(
-                    "SELECT value, message, role_name, is_level_based, reward FROM milestones WHERE value = ? AND status = 'active'",
-                    (milestone,),
-                )
-                result = cur.fetchone()
-                if result:
-                    return {
-                        "value": result[0],
-                        "message": result[1],
-                        "role_name": result[2],
-                        "is_level_based": result[3],
-                        "reward": result[4],
-                    }
-                return None
-            except sqlite3.OperationalError:
-                # Fall back to old format if reward column doesn't exist
-                cur.execute(
-                    "SELECT value, message, role_name, is_level_based FROM milestones WHERE value = ? AND status = 'active'",
-                    (milestone,),
-                )
-                result = cur.fetchone()
-                if result:
-                    return {
-                        "value": result[0],
-                        "message": result[1],
-                        "role_name": result[2],
-                        "is_level_based": result[3],
-                        "reward": None,
-                    }
-                return None
+    def get_milestone_details(self, guild_id: int, milestone: int) -> Optional[Dict]:
+        details = self.get_milestone_ladder(guild_id).details(milestone)
+        return dict(details) if details else None
 
-    def update_milestone_message(self, milestone: int, message: str) -> bool:
+    def update_milestone_message(
+        self, guild_id: int, milestone: int, message: str
+    ) -> bool:
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "UPDATE milestones SET message = ? WHERE value = ?",
-                (message, milestone),
+                "UPDATE milestones SET message = ? WHERE guild_id = ? AND value = ?",
+                (message, guild_id, milestone),
             )
             conn.commit()
+            ladder_cache.invalidate(guild_id)
             return cur.rowcount > 0
 
     def add_milestone(
         self,
+        guild_id: int,
         value: int,
         message: Optional[str],
         role_name: Optional[str] = None,
@@ -557,75 +788,72 @@ class Database:
             try:
                 cur.execute(
                     """
-                    INSERT OR REPLACE INTO milestones (value, status, message, role_name, is_level_based, reward) 
-                    VALUES (?, 'active', ?, ?, ?, ?)
+                    INSERT OR REPLACE INTO milestones (guild_id, value, status, message, role_name, is_level_based, reward) 
+                    VALUES (?, ?, 'active', ?, ?, ?, ?)
                     """,
-                    (value, message, role_name, is_level_based, reward),
+                    (guild_id, value, message, role_name, is_level_based, reward),
                 )
                 conn.commit()
+                ladder_cache.invalidate(guild_id)
                 return True
             except sqlite3.OperationalError:
                 # Fall back to old format if reward column doesn't exist
                 cur.execute(
                     """
-                    INSERT OR REPLACE INTO milestones (value, status, message, role_name, is_level_based) 
-                    VALUES (?, 'active', ?, ?, ?)
+                    INSERT OR REPLACE INTO milestones (guild_id, value, status, message, role_name, is_level_based) 
+                    VALUES (?, ?, 'active', ?, ?, ?)
                     """,
-                    (value, message, role_name, is_level_based),
+                    (guild_id, value, message, role_name, is_level_based),
                 )
                 conn.commit()
+                ladder_cache.invalidate(guild_id)
                 return True
 
-    def update_milestone_status(self, value: int, status: str) -> bool:
+    def update_milestone_status(self, guild_id: int, value: int, status: str) -> bool:
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "UPDATE milestones SET status = ? WHERE value = ?",
-                (status, value),
+                "UPDATE milestones SET status = ? WHERE guild_id = ? AND value = ?",
+                (status, guild_id, value),
             )
             conn.commit()
+            ladder_cache.invalidate(guild_id)
             return cur.rowcount > 0
 
-    def update_milestone_role(self, value: int, role_name: str) -> bool:
+    def update_milestone_role(self, guild_id: int, value: int, role_name: str) -> bool:
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "UPDATE milestones SET role_name = ? WHERE value = ?",
-                (role_name, value),
+                "UPDATE milestones SET role_name = ? WHERE guild_id = ? AND value = ?",
+                (role_name, guild_id, value),
             )
             conn.commit()
+            ladder_cache.invalidate(guild_id)
             return cur.rowcount > 0
 
-    def update_milestone_reward(self, value: int, reward: str) -> bool:
+    def update_milestone_reward(self, guild_id: int, value: int, reward: str) -> bool:
         with self._connect() as conn:
             cur = conn.cursor()
             try:
                 cur.execute(
-                    "UPDATE milestones SET reward = ? WHERE value = ?",
-                    (reward, value),
+                    "UPDATE milestones SET reward = ? WHERE guild_id = ? AND value = ?",
+                    (reward, guild_id, value),
                 )
                 conn.commit()
+                ladder_cache.invalidate(guild_id)
                 return cur.rowcount > 0
             except sqlite3.OperationalError:
                 # Reward column doesn't exist yet
                 return False
 
-    def get_milestone_role(self, milestone: int) -> Optional[str]:
+    def get_milestone_role(self, guild_id: int, milestone: int) -> Optional[str]:
         """Get the role name for a specific milestone."""
-        with self._connect() as conn:
-            cur = conn.cursor()
-            try:
-                cur.execute(
-                    "SELECT role_name FROM milestones WHERE value = ? AND status = 'active'",
-                    (milestone,),
-                )
-                row = cur.fetchone()
-                return row[0] if row and row[0] else None
-            except sqlite3.OperationalError:
-                # role_name column doesn't exist yet (migration not complete)
-                return None
+        details = self.get_milestone_ladder(guild_id).details(milestone)
+        return details["role_name"] if details and details["role_name"] else None
 
-    def get_user_current_role_milestone(self, discord_id: str) -> Optional[int]:
+    def get_user_current_role_milestone(
+        self, guild_id: int, discord_id: int
+    ) -> Optional[int]:
         """Get the milestone value for the user's current role (if any)."""
         with self._connect() as conn:
             cur = conn.cursor()
@@ -634,13 +862,14 @@ class Database:
                     """
                     SELECT m.value 
                     FROM milestones m 
-                    WHERE m.role_name IS NOT NULL 
-                    AND m.value <= (SELECT level FROM members WHERE discord_id = ?)
+                    WHERE m.guild_id = ?
+                    AND m.role_name IS NOT NULL 
+                    AND m.value <= (SELECT level FROM members WHERE guild_id = ? AND discord_id = ?)
                     AND m.status = 'active'
                     ORDER BY m.value DESC 
                     LIMIT 1
                     """,
-                    (discord_id,),
+                    (guild_id, guild_id, discord_id),
                 )
                 row = cur.fetchone()
                 return row[0] if row else None
@@ -648,96 +877,73 @@ class Database:
                 # role_name column doesn't exist yet (migration not complete)
                 return None
 
-    def get_user_milestone_role_name(self, discord_id: str) -> Optional[str]:
+    def get_user_milestone_role_name(
+        self, guild_id: int, discord_id: int
+    ) -> Optional[str]:
         """Get the user's current milestone role name, if any."""
-        current_points = self.get_user_points(discord_id)
-
-        try:
-            with self._connect() as conn:
-                cur = conn.cursor()
-                cur.execute(
-                    """
-                    SELECT role_name 
-                    FROM milestones 
-                    WHERE status = 'active' 
-                    AND role_name IS NOT NULL 
-                    AND value <= ? 
-                    ORDER BY value DESC 
-                    LIMIT 1
-                    """,
-                    (current_points,),
-                )
-                row = cur.fetchone()
-                return row[0] if row else None
-        except sqlite3.OperationalError:
-            return None
+        current_points = self.get_user_points(guild_id, discord_id)
+        return self.get_milestone_ladder(guild_id).role_name_for(current_points)
 
-    def get_all_role_milestones(self) -> List[Tuple[int, str]]:
+    def get_all_role_milestones(self, guild_id: int) -> List[Tuple[int, str]]:
         """Get all milestones that have roles assigned."""
-        with self._connect() as conn:
-            cur = conn.cursor()
-            try:
-                cur.execute(
-                    "SELECT value, role_name FROM milestones WHERE role_name IS NOT NULL AND status = 'active' ORDER BY value ASC"
-                )
-                return cur.fetchall()
-            except sqlite3.OperationalError:
-                # role_name column doesn't exist yet (migration not complete)
-                return []
+        return self.get_milestone_ladder(guild_id).role_milestones()
 
-    def add_excluded_leaderboard_user(self, discord_id: str) -> bool:
+    def add_excluded_leaderboard_user(self, guild_id: int, discord_id: int) -> bool:
         with self._connect() as conn:
             cur = conn.cursor()
             try:
                 cur.execute(
-                    "INSERT INTO excluded_leaderboard (discord_id) VALUES (?)",
-                    (discord_id,),
+                    "INSERT INTO excluded_leaderboard (guild_id, discord_id) VALUES (?, ?)",
+                    (guild_id, discord_id),
                 )
                 conn.commit()
                 return True
             except sqlite3.IntegrityError:
                 return False  # already excluded
 
-    def remove_excluded_leaderboard_user(self, discord_id: str) -> bool:
+    def remove_excluded_leaderboard_user(self, guild_id: int, discord_id: int) -> bool:
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "DELETE FROM excluded_leaderboard WHERE discord_id = ?",
-                (discord_id,),
+                "DELETE FROM excluded_leaderboard WHERE guild_id = ? AND discord_id = ?",
+                (guild_id, discord_id),
             )
             conn.commit()
             return cur.rowcount > 0
 
-    def get_excluded_leaderboard_users(self) -> List[str]:
+    def get_excluded_leaderboard_users(self, guild_id: int) -> List[str]:
         with self._connect() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT discord_id FROM excluded_leaderboard")
+            cur.execute(
+                "SELECT discord_id FROM excluded_leaderboard WHERE guild_id = ?",
+                (guild_id,),
+            )
             return [row[0] for row in cur.fetchall()]
 
     # Streak tracking functions
-    def get_current_streak(self, discord_id: str) -> int:
+    def get_current_streak(self, guild_id: int, discord_id: int) -> int:
         """Get user's current streak."""
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "SELECT current_streak FROM members WHERE discord_id = ?",
-                (discord_id,),
+                "SELECT current_streak FROM members WHERE guild_id = ? AND discord_id = ?",
+                (guild_id, discord_id),
             )
             row = cur.fetchone()
             return row[0] if row else 0
 
-    def get_longest_streak(self, discord_id: str) -> int:
+    def get_longest_streak(self, guild_id: int, discord_id: int) -> int:
         """Get user's longest streak."""
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "SELECT longest_streak FROM members WHERE discord_id = ?",
-                (discord_id,),
+                "SELECT longest_streak FROM members WHERE guild_id = ? AND discord_id = ?",
+                (guild_id, discord_id),
             )
             row = cur.fetchone()
             return row[0] if row else 0
 
-    def update_streak(self, discord_id: str, activity_date: str = None):
+    def update_streak(self, guild_id: int, discord_id: int, activity_date: str = None):
         """
         Update user's streak based on activity.
         If activity_date is provided, use it; otherwise use current date.
@@ -752,8 +958,8 @@ class Database:
 
             # Get user's last activity date and current streak
             cur.execute(
-                "SELECT last_activity_date, current_streak, longest_streak FROM members WHERE discord_id = ?",
-                (discord_id,),
+                "SELECT last_activity_date, current_streak, longest_streak FROM members WHERE guild_id = ? AND discord_id = ?",
+                (guild_id, discord_id),
             )
             row = cur.fetchone()
 
@@ -761,10 +967,10 @@ class Database:
                 # User doesn't exist, create them with streak 1
                 cur.execute(
                     """
-                    INSERT INTO members (discord_id, last_activity_date, current_streak, longest_streak)
-                    VALUES (?, ?, 1, 1)
+                    INSERT INTO members (guild_id, discord_id, last_activity_date, current_streak, longest_streak)
+                    VALUES (?, ?, ?, 1, 1)
                     """,
-                    (discord_id, activity_date),
+                    (guild_id, discord_id, activity_date),
                 )
             else:
                 last_activity_date, current_streak, longest_streak = row
@@ -799,19 +1005,20 @@ class Database:
                     """
                     UPDATE members 
                     SET current_streak = ?, longest_streak = ?, last_activity_date = ?
-                    WHERE discord_id = ?
+                    WHERE guild_id = ? AND discord_id = ?
                     """,
-                    (new_streak, new_longest, activity_date, discord_id),
+                    (new_streak, new_longest, activity_date, guild_id, discord_id),
                 )
 
             conn.commit()
+        self._points_changed(guild_id, discord_id)
 
-    def get_streak(self, discord_id: str) -> int:
+    def get_streak(self, guild_id: int, discord_id: int) -> int:
         """Get user's current streak (alias for get_current_streak for compatibility)."""
-        return self.get_current_streak(discord_id)
+        return self.get_current_streak(guild_id, discord_id)
 
     # Voice channel display functions
-    def save_voice_channel_display(self, guild_id: str, channel_ids: list):
+    def save_voice_channel_display(self, guild_id: int, channel_ids: list):
         """Save voice channel display channel IDs for a guild."""
         with self._connect() as conn:
             cur = conn.cursor()
@@ -828,7 +1035,7 @@ class Database:
                 )
             conn.commit()
 
-    def get_voice_channel_display(self, guild_id: str) -> list:
+    def get_voice_channel_display(self, guild_id: int) -> list:
         """Get voice channel display channel IDs for a guild."""
         with self._connect() as conn:
             cur = conn.cursor()
@@ -838,7 +1045,7 @@ class Database:
             )
             return [row[0] for row in cur.fetchall()]
 
-    def delete_voice_channel_display(self, guild_id: str):
+    def delete_voice_channel_display(self, guild_id: int):
         """Delete voice channel display entries for a guild."""
         with self._connect() as conn:
             cur = conn.cursor()
@@ -850,7 +1057,8 @@ class Database:
     # Campaign channel functions
     def add_campaign_channel(
         self,
-        channel_id: str,
+        guild_id: int,
+        channel_id: int,
         campaign_name: str,
         multiplier: float,
         start_date: str,
@@ -862,38 +1070,38 @@ class Database:
             cur.execute(
                 """
                 INSERT OR REPLACE INTO campaign_channels 
-                (channel_id, campaign_name, multiplier, start_date, end_date, status)
-                VALUES (?, ?, ?, ?, ?, 'active')
+                (guild_id, channel_id, campaign_name, multiplier, start_date, end_date, status)
+                VALUES (?, ?, ?, ?, ?, ?, 'active')
                 """,
-                (channel_id, campaign_name, multiplier, start_date, end_date),
+                (guild_id, channel_id, campaign_name, multiplier, start_date, end_date),
             )
 
             # Automatically add to tracked channels
             cur.execute(
                 """
-                INSERT OR IGNORE INTO tracked_channels (channel_id, status)
-                VALUES (?, 'active')
+                INSERT OR IGNORE INTO tracked_channels (guild_id, channel_id, status)
+                VALUES (?, ?, 'active')
                 """,
-                (channel_id,),
+                (guild_id, channel_id),
             )
             conn.commit()
 
-    def get_campaign_multiplier(self, channel_id: str) -> float:
+    def get_campaign_multiplier(self, guild_id: int, channel_id: int) -> float:
         """Get the campaign multiplier for a channel if it's an active campaign."""
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
                 SELECT multiplier FROM campaign_channels 
-                WHERE channel_id = ? AND status = 'active'
+                WHERE guild_id = ? AND channel_id = ? AND status = 'active'
                 AND date('now') BETWEEN start_date AND end_date
                 """,
-                (channel_id,),
+                (guild_id, channel_id),
             )
             row = cur.fetchone()
             return row[0] if row else 1.0
 
-    def get_active_campaigns(self) -> list:
+    def get_active_campaigns(self, guild_id: int) -> list:
         """Get all active campaigns."""
         with self._connect() as conn:
             cur = conn.cursor()
@@ -901,13 +1109,15 @@ class Database:
                 """
                 SELECT channel_id, campaign_name, multiplier, start_date, end_date 
                 FROM campaign_channels 
-                WHERE status = 'active' AND date('now') BETWEEN start_date AND end_date
+                WHERE guild_id = ? AND status = 'active'
+                AND date('now') BETWEEN start_date AND end_date
                 ORDER BY start_date ASC
-                """
+                """,
+                (guild_id,),
             )
             return cur.fetchall()
 
-    def get_all_campaigns(self) -> list:
+    def get_all_campaigns(self, guild_id: int) -> list:
         """Get all campaigns (active and inactive)."""
         with self._connect() as conn:
             cur = conn.cursor()
@@ -915,42 +1125,45 @@ class Database:
                 """
                 SELECT channel_id, campaign_name, multiplier, start_date, end_date, status
                 FROM campaign_channels 
+                WHERE guild_id = ?
                 ORDER BY start_date DESC
-                """
+                """,
+                (guild_id,),
             )
             return cur.fetchall()
 
-    def update_campaign_status(self, channel_id: str, status: str):
+    def update_campaign_status(self, guild_id: int, channel_id: int, status: str):
         """Update campaign status (active/inactive)."""
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "UPDATE campaign_channels SET status = ? WHERE channel_id = ?",
-                (status, channel_id),
+                "UPDATE campaign_channels SET status = ? WHERE guild_id = ? AND channel_id = ?",
+                (status, guild_id, channel_id),
             )
             conn.commit()
 
-    def delete_campaign_channel(self, channel_id: str) -> bool:
+    def delete_campaign_channel(self, guild_id: int, channel_id: int) -> bool:
         """Delete a campaign channel."""
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "DELETE FROM campaign_channels WHERE channel_id = ?", (channel_id,)
+                "DELETE FROM campaign_channels WHERE guild_id = ? AND channel_id = ?",
+                (guild_id, channel_id),
             )
             conn.commit()
             return cur.rowcount > 0
 
-    def is_campaign_channel(self, channel_id: str) -> bool:
+    def is_campaign_channel(self, guild_id: int, channel_id: int) -> bool:
         """Check if a channel is a campaign channel."""
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "SELECT 1 FROM campaign_channels WHERE channel_id = ? AND status = 'active'",
-                (channel_id,),
+                "SELECT 1 FROM campaign_channels WHERE guild_id = ? AND channel_id = ? AND status = 'active'",
+                (guild_id, channel_id),
             )
             return cur.fetchone() is not None
 
-    def get_member_info(self, discord_id: str) -> Optional[Dict]:
+    def get_member_info(self, guild_id: int, discord_id: int) -> Optional[Dict]:
         """Get member information including all fields."""
         with self._connect() as conn:
             cur = conn.cursor()
@@ -958,9 +1171,9 @@ class Database:
                 """
                 SELECT discord_id, total_points, level, current_streak, longest_streak, last_activity_date
                 FROM members 
-                WHERE discord_id = ?
+                WHERE guild_id = ? AND discord_id = ?
                 """,
-                (discord_id,),
+                (guild_id, discord_id),
             )
             result = cur.fetchone()
             if result:
@@ -974,57 +1187,63 @@ class Database:
                 }
             return None
 
-    def add_member(self, discord_id: str, points: int = 0):
+    def add_member(self, guild_id: int, discord_id: int, points: int = 0):
         """Add a new member to the database."""
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
-                INSERT INTO members (discord_id, total_points, level, current_streak, longest_streak, last_activity_date)
-                VALUES (?, ?, 1, 0, 0, date('now', '-1 day'))
+                INSERT INTO members (guild_id, discord_id, total_points, level, current_streak, longest_streak, last_activity_date)
+                VALUES (?, ?, ?, 1, 0, 0, date('now', '-1 day'))
                 """,
-                (discord_id, points),
+                (guild_id, discord_id, points),
             )
             conn.commit()
 
-    def get_user_rank(self, discord_id: str) -> int:
-        """Get user's rank in the leaderboard."""
+    def get_user_rank(self, guild_id: int, discord_id: int) -> int:
+        """Get user's rank in the guild's leaderboard."""
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
                 SELECT COUNT(*) + 1
                 FROM members m1
-                WHERE m1.total_points > (
+                WHERE m1.guild_id = ?
+                AND m1.total_points > (
                     SELECT COALESCE(m2.total_points, 0)
                     FROM members m2
-                    WHERE m2.discord_id = ?
+                    WHERE m2.guild_id = ? AND m2.discord_id = ?
                 )
-                AND m1.discord_id NOT IN (SELECT discord_id FROM excluded_leaderboard)
+                AND m1.discord_id NOT IN (SELECT discord_id FROM excluded_leaderboard WHERE guild_id = ?)
                 """,
-                (discord_id,),
+                (guild_id, guild_id, discord_id, guild_id),
             )
             result = cur.fetchone()
             return result[0] if result else 1
 
-    def get_total_members_count(self) -> int:
-        """Get total number of members in the database."""
+    def get_total_members_count(self, guild_id: int) -> int:
+        """Get total number of members of a guild in the database."""
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
-                "SELECT COUNT(*) FROM members WHERE discord_id NOT IN (SELECT discord_id FROM excluded_leaderboard)"
+                """
+                SELECT COUNT(*) FROM members
+                WHERE guild_id = ?
+                AND discord_id NOT IN (SELECT discord_id FROM excluded_leaderboard WHERE guild_id = ?)
+                """,
+                (guild_id, guild_id),
             )
             result = cur.fetchone()
             return result[0] if result else 0
 
-    def get_previous_milestone(self, discord_id: str) -> Optional[int]:
+    def get_previous_milestone(self, guild_id: int, discord_id: int) -> Optional[int]:
         """Get the previous milestone for a user."""
         with self._connect() as conn:
             cur = conn.cursor()
             # Get user's current points
             cur.execute(
-                "SELECT total_points FROM members WHERE discord_id = ?",
-                (discord_id,),
+                "SELECT total_points FROM members WHERE guild_id = ? AND discord_id = ?",
+                (guild_id, discord_id),
             )
             result = cur.fetchone()
             if not result:
@@ -1032,15 +1251,189 @@ class Database:
 
             current_points = result[0]
 
-            # Get the highest milestone that's less than current points
+        # Get the highest milestone that's at or below current points
+        return self.get_milestone_ladder(guild_id).level_for(current_points)
+
+    # Engagement retention functions
+    def get_expired_engagement(self, retention_days: int, limit: int) -> List[Tuple]:
+        """Oldest engagement rows that are past the retention window."""
+        with self._connect() as conn:
+            cur = conn.cursor()
             cur.execute(
                 """
-                SELECT value FROM milestones 
-                WHERE value <= ? AND status = 'active'
-                ORDER BY value DESC 
-                LIMIT 1
+                SELECT id, guild_id, discord_id, activity_type_id, activity_object_id,
+                       channel_id, point_value, timestamp, campaign_multiplier
+                FROM engagement_log
+                WHERE timestamp < ?
+                ORDER BY id ASC
+                LIMIT ?
                 """,
-                (current_points,),
+                (int(time.time()) - int(retention_days) * 86400, limit),
             )
-            result = cur.fetchone()
-            return result[0] if result else 0
+            return cur.fetchall()
+
+    def compact_engagement(self, rows: List[Tuple]) -> int:
+        """Fold engagement rows into daily rollups and delete them.
+
+        Reaction and invite keys are kept in engagement_keys so the same
+        reaction or invite can't be awarded again.
+        """
+        rollups: Dict[Tuple[int, int, str, int], List[int]] = {}
+        keys = []
+        for _, guild_id, discord_id, type_id, object_id, _, points, ts, _ in rows:
+            day = time.strftime("%Y-%m-%d", time.gmtime(ts))
+            totals = rollups.setdefault((guild_id, discord_id, day, type_id), [0, 0])
+            totals[0] += 1
+            totals[1] += points or 0
+            if type_id in (REACTION, INVITE) and object_id is not None:
+                keys.append((guild_id, discord_id, type_id, object_id))
+
+        with self._connect() as conn:
+            cur = conn.cursor()
+            cur.executemany(
+                """
+                INSERT INTO engagement_daily (guild_id, discord_id, day, activity_type_id, count, points)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(guild_id, discord_id, day, activity_type_id) DO UPDATE SET
+                    count = count + excluded.count, points = points + excluded.points
+                """,
+                [key + tuple(totals) for key, totals in rollups.items()],
+            )
+            cur.executemany(
+                """
+                INSERT OR IGNORE INTO engagement_keys (guild_id, discord_id, activity_type_id, activity_object_id)
+                VALUES (?, ?, ?, ?)
+                """,
+                keys,
+            )
+            cur.executemany(
+                "DELETE FROM engagement_log WHERE id = ?", [(row[0],) for row in rows]
+            )
+            conn.commit()
+            return len(rows)
+
+    def incremental_vacuum(self, pages: int):
+        """Return up to ``pages`` free pages to the filesystem."""
+        with self._connect() as conn:
+            # Each result row is one freed page; the pragma stops if not stepped
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+
+    # Notification outbox functions
+    def get_due_notifications(self, limit: int = 50) -> List[Dict]:
+        """Get pending notifications whose next attempt is due."""
+        with self._connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                SELECT id, guild_id, kind, discord_id, milestone, message, attempts
+                FROM notification_outbox
+                WHERE status = 'pending' AND next_attempt_at <= datetime('now')
+                ORDER BY id ASC
+                LIMIT ?
+                """,
+                (limit,),
+            )
+            columns = [description[0] for description in cur.description]
+            return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    def mark_notification_sent(self, notification_id: int):
+        with self._connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "UPDATE notification_outbox SET status = 'sent', attempts = attempts + 1 WHERE id = ?",
+                (notification_id,),
+            )
+            conn.commit()
+
+    def mark_notification_failed(self, notification_id: int, error: str):
+        """Give up on a notification (permanent error or out of attempts)."""
+        with self._connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                UPDATE notification_outbox
+                SET status = 'failed', attempts = attempts + 1, last_error = ?
+                WHERE id = ?
+                """,
+                (error, notification_id),
+            )
+            conn.commit()
+
+    def reschedule_notification(
+        self,
+        notification_id: int,
+        delay_seconds: float,
+        error: str,
+        count_attempt: bool = True,
+    ):
+        """Push a notification's next attempt back by delay_seconds."""
+        with self._connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                UPDATE notification_outbox
+                SET attempts = attempts + ?, last_error = ?,
+                    next_attempt_at = datetime('now', ?)
+                WHERE id = ?
+                """,
+                (
+                    1 if count_attempt else 0,
+                    error,
+                    f"+{int(delay_seconds)} seconds",
+                    notification_id,
+                ),
+            )
+            conn.commit()
+
+    def get_pending_notifications_count(self) -> int:
+        with self._connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT COUNT(*) FROM notification_outbox WHERE status = 'pending'"
+            )
+            return cur.fetchone()[0]
+
+    def acquire_lease(self, name: str, holder: str, ttl_seconds: int) -> bool:
+        """Take or renew a named lease. Returns True if the holder now owns it."""
+        with self._connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                INSERT INTO leases (name, holder, expires_at)
+                VALUES (?, ?, datetime('now', ?))
+                ON CONFLICT(name) DO UPDATE SET
+                    holder = excluded.holder, expires_at = excluded.expires_at
+                WHERE leases.holder = excluded.holder
+                    OR leases.expires_at < datetime('now')
+                """,
+                (name, holder, f"+{int(ttl_seconds)} seconds"),
+            )
+            conn.commit()
+            return cur.rowcount > 0
+
+    def release_lease(self, name: str, holder: str):
+        """Give up a lease so another process can take it immediately."""
+        with self._connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder)
+            )
+            conn.commit()
+
+    def holds_lease(self, name: str) -> bool:
+        """True if this process should run a bot-wide job.
+
+        Always true in single-process mode; shard processes compete for the lease.
+        """
+        if not config.SHARDED:
+            return True
+        return self.acquire_lease(name, config.PROCESS_ID, config.LEASE_TTL)
+
+
+profile_methods(Database)
+
+# Per-method latency timers are only installed when metrics are served
+if config.METRICS_PORT:
+    metrics.time_methods(Database, metrics.dao_call_seconds)
+if config.TRACE_EXPORTER:
+    tracing.trace_methods(Database, "dao")
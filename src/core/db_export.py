@@ -0,0 +1,380 @@
+"""
+Database Export
+Streams database snapshots, table dumps and Parquet analytics exports into
+size-limited parts, so exports fit under Discord's attachment limit.
+Everything here is blocking and meant to run on a worker thread.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tarfile
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import src.core.config as config
+from src.core.backup_service import backup_database
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+# Column each table's date filter applies to
+DATE_COLUMNS: Dict[str, str] = {
+    "engagement_log": "timestamp",
+    "engagement_daily": "day",
+    "milestones_log": "reached_at",
+}
+# Tables whose date column holds unix epoch seconds
+EPOCH_TABLES = {"engagement_log", "milestones_log"}
+
+# Analytics export: (column, SQL expression, kind) per table, plus the column
+# whose month partitions the output (None for a single file)
+ANALYTICS_TABLES: Dict[str, Tuple[List[Tuple[str, str, str]], Optional[str]]] = {
+    "engagement_log": (
+        [
+            ("id", "id", "int"),
+            ("guild_id", "guild_id", "id"),
+            ("discord_id", "discord_id", "id"),
+            (
+                "activity_type",
+                "(SELECT name FROM activity_types WHERE id = activity_type_id)",
+                "category",
+            ),
+            ("activity_object_id", "activity_object_id", "id"),
+            ("channel_id", "channel_id", "id"),
+            ("point_value", "point_value", "int"),
+            ("timestamp", "timestamp", "timestamp"),
+        ],
+        "timestamp",
+    ),
+    "members": (
+        [
+            ("guild_id", "guild_id", "id"),
+            ("discord_id", "discord_id", "id"),
+            ("total_points", "total_points", "int"),
+            ("level", "level", "int"),
+            ("current_streak", "current_streak", "int"),
+            ("longest_streak", "longest_streak", "int"),
+            (
+                "last_activity_date",
+                "CAST(julianday(last_activity_date) - 2440587.5 AS INTEGER)",
+                "date",
+            ),
+        ],
+        None,
+    ),
+    "milestones_log": (
+        [
+            ("id", "id", "int"),
+            ("guild_id", "guild_id", "id"),
+            ("discord_id", "discord_id", "id"),
+            ("milestone", "milestone", "int"),
+            ("reached_at", "reached_at", "timestamp"),
+            ("reward_status", "reward_status", "category"),
+            ("reward_code", "reward_code", "str"),
+        ],
+        "reached_at",
+    ),
+}
+
+
+class PartWriter(io.RawIOBase):
+    """Binary sink that rolls over to a new numbered file every max_bytes.
+
+    Parts of one stream are plain byte splits; concatenating them in order
+    (``cat name.part*``) restores the original file.
+    """
+
+    def __init__(self, base_path: str, max_bytes: int):
+        self.base_path = base_path
+        self.max_bytes = max_bytes
+        self.paths: List[str] = []
+        self._file = None
+        self._written = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        view = memoryview(data)
+        while view:
+            if self._file is None or self._written >= self.max_bytes:
+                self._next_part()
+            chunk = view[: self.max_bytes - self._written]
+            self._file.write(chunk)
+            self._written += len(chunk)
+            view = view[len(chunk) :]
+        return len(data)
+
+    def _next_part(self):
+        if self._file is not None:
+            self._file.close()
+        path = f"{self.base_path}.part{len(self.paths) + 1:03d}"
+        self._file = open(path, "wb")
+        self._written = 0
+        self.paths.append(path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        super().close()
+
+    def finish(self) -> List[str]:
+        """Close the stream; a single part keeps the plain file name."""
+        self.close()
+        if len(self.paths) == 1:
+            os.replace(self.paths[0], self.base_path)
+            self.paths = [self.base_path]
+        return self.paths
+
+
+def export_snapshot(
+    out_dir: str, name: str, max_part_bytes: int = config.EXPORT_PART_BYTES
+) -> List[str]:
+    """Write a gzipped consistent snapshot of the database as one or more parts."""
+    snapshot = os.path.join(out_dir, f"{name}.snapshot")
+    backup_database(config.DATABASE_NAME, snapshot)
+    try:
+        sink = PartWriter(os.path.join(out_dir, f"{name}.db.gz"), max_part_bytes)
+        with gzip.GzipFile(filename=f"{name}.db", fileobj=sink, mode="wb") as gz:
+            with open(snapshot, "rb") as f:
+                while chunk := f.read(config.EXPORT_CHUNK_BYTES):
+                    gz.write(chunk)
+        return sink.finish()
+    finally:
+        os.remove(snapshot)
+
+
+def list_tables(conn: sqlite3.Connection) -> List[str]:
+    cur = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def export_tables(
+    out_dir: str,
+    name: str,
+    tables: Optional[List[str]] = None,
+    fmt: str = "csv",
+    guild_id: Optional[int] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    max_part_bytes: int = config.EXPORT_PART_BYTES,
+) -> List[str]:
+    """Dump tables from one consistent snapshot as gzipped CSV or JSONL.
+
+    Tables with a guild_id column are limited to ``guild_id``. ``since`` and
+    ``until`` (YYYY-MM-DD, until exclusive) filter tables in DATE_COLUMNS.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    snapshot = os.path.join(out_dir, f"{name}.snapshot")
+    backup_database(config.DATABASE_NAME, snapshot)
+    conn = sqlite3.connect(snapshot)
+    try:
+        available = list_tables(conn)
+        if tables is None:
+            tables = available
+        unknown = [table for table in tables if table not in available]
+        if unknown:
+            raise ValueError(f"Unknown table(s): {', '.join(unknown)}")
+
+        paths = []
+        for table in tables:
+            paths.extend(
+                _export_table(
+                    conn,
+                    out_dir,
+                    name,
+                    table,
+                    fmt,
+                    guild_id,
+                    since,
+                    until,
+                    max_part_bytes,
+                )
+            )
+        return paths
+    finally:
+        conn.close()
+        os.remove(snapshot)
+
+
+def _export_table(
+    conn: sqlite3.Connection,
+    out_dir: str,
+    name: str,
+    table: str,
+    fmt: str,
+    guild_id: Optional[int],
+    since: Optional[str],
+    until: Optional[str],
+    max_part_bytes: int,
+) -> List[str]:
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    conditions, params = [], []
+    if guild_id is not None and "guild_id" in columns:
+        conditions.append("guild_id = ?")
+        params.append(guild_id)
+    date_column = DATE_COLUMNS.get(table)
+    if date_column and since:
+        conditions.append(f"{date_column} >= ?")
+        params.append(_date_bound(table, since))
+    if date_column and until:
+        conditions.append(f"{date_column} < ?")
+        params.append(_date_bound(table, until))
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    cur = conn.execute(f"SELECT * FROM {table}{where}", params)
+
+    sink = PartWriter(os.path.join(out_dir, f"{name}_{table}.{fmt}.gz"), max_part_bytes)
+    with gzip.GzipFile(filename=f"{table}.{fmt}", fileobj=sink, mode="wb") as gz:
+        text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+        if fmt == "csv":
+            writer = csv.writer(text)
+            writer.writerow(columns)
+        while rows := cur.fetchmany(config.EXPORT_FETCH_ROWS):
+            if fmt == "csv":
+                writer.writerows(rows)
+            else:
+                for row in rows:
+                    text.write(json.dumps(dict(zip(columns, row))) + "\n")
+        text.flush()
+        text.detach()
+    return sink.finish()
+
+
+def export_analytics(
+    out_dir: str,
+    name: str,
+    guild_id: Optional[int] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    max_part_bytes: int = config.EXPORT_PART_BYTES,
+) -> List[str]:
+    """Write engagement history as Parquet files partitioned by month.
+
+    Produces ``<table>/month=YYYY-MM/data.parquet`` (members as a single file)
+    with int64 ids and dictionary-encoded categories, packed into a tar split
+    into parts. Rows are converted in bounded chunks. Needs pyarrow.
+    """
+    _require_pyarrow()
+    root = os.path.join(out_dir, name)
+    snapshot = os.path.join(out_dir, f"{name}.snapshot")
+    backup_database(config.DATABASE_NAME, snapshot)
+    conn = sqlite3.connect(snapshot)
+    try:
+        for table in ANALYTICS_TABLES:
+            _write_parquet(conn, root, table, guild_id, since, until)
+    finally:
+        conn.close()
+        os.remove(snapshot)
+
+    # Parquet pages are already compressed, so the tar is left uncompressed
+    sink = PartWriter(os.path.join(out_dir, f"{name}.tar"), max_part_bytes)
+    with tarfile.open(fileobj=sink, mode="w|") as tar:
+        tar.add(root, arcname=name)
+    shutil.rmtree(root)
+    return sink.finish()
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Analytics export needs pyarrow (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+
+def _date_bound(table: str, date: str):
+    """YYYY-MM-DD filter value in the representation of the table's date column."""
+    if table not in EPOCH_TABLES:
+        return date
+    day = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return int(day.timestamp())
+
+
+def _to_int(value) -> Optional[int]:
+    """Snowflake column value -> int; anything non-numeric -> None."""
+    if value is None or isinstance(value, int):
+        return value
+    return int(value) if value.isdigit() else None
+
+
+def _write_parquet(
+    conn: sqlite3.Connection,
+    root: str,
+    table: str,
+    guild_id: Optional[int],
+    since: Optional[str],
+    until: Optional[str],
+):
+    pa, pq = _require_pyarrow()
+    columns, partition_column = ANALYTICS_TABLES[table]
+    types = {
+        "id": pa.int64(),
+        "int": pa.int64(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "timestamp": pa.timestamp("s", tz="UTC"),
+        "date": pa.date32(),
+        "str": pa.string(),
+    }
+    schema = pa.schema([(column, types[kind]) for column, _, kind in columns])
+
+    select = [expr for _, expr, _ in columns]
+    select.append(
+        f"strftime('%Y-%m', {partition_column}, 'unixepoch')"
+        if partition_column
+        else "NULL"
+    )
+    conditions, params = [], []
+    if guild_id is not None:
+        conditions.append("guild_id = ?")
+        params.append(guild_id)
+    if partition_column and since:
+        conditions.append(f"{partition_column} >= ?")
+        params.append(_date_bound(table, since))
+    if partition_column and until:
+        conditions.append(f"{partition_column} < ?")
+        params.append(_date_bound(table, until))
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    cur = conn.execute(f"SELECT {', '.join(select)} FROM {table}{where}", params)
+
+    writers = {}
+    try:
+        while rows := cur.fetchmany(config.ANALYTICS_BATCH_ROWS):
+            by_month: Dict[Optional[str], List[Tuple]] = {}
+            for row in rows:
+                by_month.setdefault(row[-1], []).append(row)
+            for month, month_rows in by_month.items():
+                arrays = []
+                for i, (_, _, kind) in enumerate(columns):
+                    values = [row[i] for row in month_rows]
+                    if kind == "id":
+                        values = [_to_int(value) for value in values]
+                    if kind == "category":
+                        arrays.append(pa.array(values, pa.string()).dictionary_encode())
+                    else:
+                        arrays.append(pa.array(values, types[kind]))
+                batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+                writer = writers.get(month)
+                if writer is None:
+                    directory = os.path.join(root, table)
+                    if partition_column:
+                        directory = os.path.join(directory, f"month={month}")
+                    os.makedirs(directory, exist_ok=True)
+                    writer = writers[month] = pq.ParquetWriter(
+                        os.path.join(directory, "data.parquet"),
+                        schema,
+                        compression="zstd",
+                    )
+                writer.write_batch(batch)
+    finally:
+        for writer in writers.values():
+            writer.close()
@@ -0,0 +1,100 @@
+import time
+import discord
+import src.core.config as config
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+class DMsDisabled(Exception):
+    """Raised when a user is known to refuse DMs from the bot."""
+
+
+class DMResolver:
+    """Resolves users and DM channels from gateway caches before REST.
+
+    Opened DM channels are kept in a TTL'd LRU. Users whose DMs failed with
+    Forbidden/NotFound are negatively cached so we don't keep retrying them.
+    """
+
+    def __init__(
+        self,
+        bot,
+        max_channels: int = config.DM_CHANNEL_CACHE_SIZE,
+        channel_ttl: float = config.DM_CHANNEL_TTL,
+        blocked_ttl: float = config.DM_BLOCKED_TTL,
+    ):
+        self.bot = bot
+        self.max_channels = max_channels
+        self.channel_ttl = channel_ttl
+        self.blocked_ttl = blocked_ttl
+        self._channels: "OrderedDict[int, Tuple[discord.DMChannel, float]]" = (
+            OrderedDict()
+        )
+        self._blocked: Dict[int, float] = {}
+
+    def is_blocked(self, user_id: int) -> bool:
+        """True if the user recently refused a DM."""
+        expires = self._blocked.get(user_id)
+        if expires is None:
+            return False
+        if expires < time.monotonic():
+            del self._blocked[user_id]
+            return False
+        return True
+
+    def mark_blocked(self, user_id: int):
+        """Remember that DMs to this user fail."""
+        self._blocked[user_id] = time.monotonic() + self.blocked_ttl
+        self._channels.pop(user_id, None)
+
+    async def get_user(self, user_id: int) -> Union[discord.User, discord.Member]:
+        """Return a user from the gateway caches, falling back to REST."""
+        user = self.bot.get_user(user_id)
+        if user:
+            return user
+        for guild in self.bot.guilds:
+            member = guild.get_member(user_id)
+            if member:
+                return member
+        return await self.bot.fetch_user(user_id)
+
+    async def get_dm_channel(self, user_id: int) -> discord.DMChannel:
+        """Return an open DM channel for the user, creating one on a miss."""
+        if self.is_blocked(user_id):
+            raise DMsDisabled(user_id)
+
+        cached = self._channels.get(user_id)
+        if cached and cached[1] > time.monotonic():
+            self._channels.move_to_end(user_id)
+            return cached[0]
+
+        try:
+            user = await self.get_user(user_id)
+            channel = user.dm_channel or await user.create_dm()
+        except (discord.Forbidden, discord.NotFound):
+            self.mark_blocked(user_id)
+            raise
+
+        self._channels[user_id] = (channel, time.monotonic() + self.channel_ttl)
+        self._channels.move_to_end(user_id)
+        while len(self._channels) > self.max_channels:
+            self._channels.popitem(last=False)
+        return channel
+
+    async def send(self, user_id: int, *args, **kwargs) -> Optional[discord.Message]:
+        """DM a user, negatively caching users who have DMs disabled."""
+        channel = await self.get_dm_channel(user_id)
+        try:
+            return await channel.send(*args, **kwargs)
+        except discord.Forbidden:
+            self.mark_blocked(user_id)
+            raise
+
+
+async def setup(bot):
+    """Add the DM resolver to the bot."""
+    bot.dm_resolver = DMResolver(bot)
+    logger.info("DM resolver initialized")
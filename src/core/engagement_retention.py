@@ -0,0 +1,149 @@
+import asyncio
+import csv
+import gzip
+import os
+import time
+from discord.ext import commands, tasks
+from src.core.database import Database
+import src.core.config as config
+import logging
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+dao = Database()
+
+ARCHIVE_COLUMNS = [
+    "id",
+    "guild_id",
+    "discord_id",
+    "activity_type",
+    "activity_object_id",
+    "channel_id",
+    "point_value",
+    "timestamp",
+    "campaign_multiplier",
+]
+# Archives keep readable activity type names
+ACTIVITY_TYPE_NAMES = {type_id: name for name, type_id in config.ACTIVITY_TYPES.items()}
+
+
+class EngagementRetention(commands.Cog):
+    """Keeps engagement_log small by archiving and compacting old rows.
+
+    Rows older than the retention window are appended to monthly gzip CSV
+    archives, folded into per-user daily rollups and deleted in batches.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.compact_engagement.change_interval(
+            seconds=config.ENGAGEMENT_RETENTION_INTERVAL
+        )
+        self.compact_engagement.start()
+
+    def cog_unload(self):
+        """Clean up when cog is unloaded."""
+        self.compact_engagement.cancel()
+
+    @tasks.loop(seconds=config.ENGAGEMENT_RETENTION_INTERVAL)
+    async def compact_engagement(self):
+        """Periodically move expired engagement rows out of the hot table."""
+        try:
+            await self.run_once()
+        except Exception as e:
+            logger.error(f"Error in compact_engagement task: {e}")
+
+    @compact_engagement.before_loop
+    async def before_compact_engagement(self):
+        """Wait until bot is ready before starting the task."""
+        await self.bot.wait_until_ready()
+
+    def retention_days(self) -> int:
+        """Configured retention window in days (0 disables retention)."""
+        days = int(
+            dao.get_config(config.GLOBAL_GUILD_ID, "engagement_retention_days")
+            or config.ENGAGEMENT_RETENTION_DAYS
+        )
+        if days <= 0:
+            return 0
+        return max(days, config.ENGAGEMENT_RETENTION_MIN_DAYS)
+
+    async def run_once(self) -> int:
+        """Archive and compact every expired row, one batch at a time."""
+        # Only one shard process compacts the shared database
+        if not dao.holds_lease("engagement_retention"):
+            return 0
+
+        days = self.retention_days()
+        if not days:
+            return 0
+
+        total = 0
+        while True:
+            moved = await asyncio.to_thread(self._compact_batch, days)
+            total += moved
+            if moved < config.ENGAGEMENT_RETENTION_BATCH_SIZE:
+                break
+            # Let gateway events through between batches
+            await asyncio.sleep(0)
+
+        if total:
+            logger.info(f"[RETENTION] Archived and compacted {total} engagement rows")
+        return total
+
+    def _compact_batch(self, days: int) -> int:
+        rows = dao.get_expired_engagement(days, config.ENGAGEMENT_RETENTION_BATCH_SIZE)
+        if not rows:
+            return 0
+        # Archive first: a crash before the delete only re-archives the batch
+        self._archive(rows)
+        moved = dao.compact_engagement(rows)
+        dao.incremental_vacuum(config.ENGAGEMENT_VACUUM_PAGES)
+        return moved
+
+    def _archive(self, rows: List[Tuple]):
+        """Append rows to their month's archive file."""
+        by_month: Dict[str, List[Tuple]] = {}
+        for row in rows:
+            by_month.setdefault(time.strftime("%Y-%m", time.gmtime(row[7])), []).append(
+                row
+            )
+
+        os.makedirs(config.ENGAGEMENT_ARCHIVE_DIR, exist_ok=True)
+        for month, month_rows in by_month.items():
+            path = self._archive_path(month)
+            is_new = not os.path.exists(path)
+            # Appending adds a gzip member; readers see one continuous CSV
+            with gzip.open(path, "at", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if is_new:
+                    writer.writerow(ARCHIVE_COLUMNS)
+                writer.writerows(
+                    row[:3]
+                    + (ACTIVITY_TYPE_NAMES.get(row[3], row[3]),)
+                    + row[4:7]
+                    + (time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(row[7])),)
+                    + row[8:]
+                    for row in month_rows
+                )
+
+    @staticmethod
+    def _archive_path(month: str) -> str:
+        """The month's archive, or a numbered sibling if it has other columns."""
+        header = ",".join(ARCHIVE_COLUMNS)
+        suffix = 0
+        while True:
+            name = f"engagement_{month}" + (f".{suffix}" if suffix else "")
+            path = os.path.join(config.ENGAGEMENT_ARCHIVE_DIR, f"{name}.csv.gz")
+            if not os.path.exists(path):
+                return path
+            # Files written before a column was added keep their own header
+            with gzip.open(path, "rt", newline="", encoding="utf-8") as f:
+                if f.readline().rstrip("\r\n") == header:
+                    return path
+            suffix += 1
+
+
+async def setup(bot):
+    await bot.add_cog(EngagementRetention(bot))
+    logger.info("Engagement retention initialized")
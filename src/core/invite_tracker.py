@@ -0,0 +1,237 @@
+import asyncio
+import time
+import discord
+from discord.ext import commands, tasks
+import src.core.config as config
+from src.core import metrics
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class InviteTracker(commands.Cog):
+    """Keeps per-guild invite use counts up to date from gateway events.
+
+    The snapshot is only refreshed over REST when members join (to see which
+    invites were used) and by a slow reconciliation loop. A lone join gets its
+    own ``guild.invites()`` call; joins arriving while a call is in flight are
+    resolved together by the next one, so a burst costs one call per round trip.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        # guild_id -> {code: {"uses": int, "max_uses": int, "inviter": User}}
+        self._invites: Dict[int, Dict[str, Dict]] = {}
+        # guild_id -> {code: (state, deleted_at)}, invites may vanish when used up
+        self._recently_deleted: Dict[int, Dict[str, Tuple[Dict, float]]] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._pending_joins: Dict[int, List[Tuple[discord.Member, asyncio.Future]]] = {}
+        self._flush_tasks: Dict[int, asyncio.Task] = {}
+        # Every flush still running, including those no longer taking joins
+        self._running_flushes: Set[asyncio.Task] = set()
+        metrics.queue_depth.set_function(
+            "invite_joins",
+            function=lambda: sum(len(joins) for joins in self._pending_joins.values()),
+        )
+        self.reconcile_invites.change_interval(seconds=config.INVITE_RECONCILE_INTERVAL)
+        self.reconcile_invites.start()
+
+    def cog_unload(self):
+        """Clean up when cog is unloaded."""
+        self.reconcile_invites.cancel()
+        for task in self._running_flushes:
+            task.cancel()
+        # Queued joins are handed back unattributed instead of waiting forever
+        for joins in self._pending_joins.values():
+            for _, future in joins:
+                if not future.done():
+                    future.set_result(None)
+        self._pending_joins.clear()
+
+    @tasks.loop(seconds=config.INVITE_RECONCILE_INTERVAL)
+    async def reconcile_invites(self):
+        """Periodically resync every guild's invites in case events were missed."""
+        for guild in self.bot.guilds:
+            async with self._lock_for(guild.id):
+                await self.refresh(guild)
+
+    @reconcile_invites.before_loop
+    async def before_reconcile_invites(self):
+        """Wait until bot is ready before starting the task."""
+        await self.bot.wait_until_ready()
+
+    @commands.Cog.listener()
+    async def on_invite_create(self, invite: discord.Invite):
+        if invite.guild is None:
+            return
+        self._invites.setdefault(invite.guild.id, {})[invite.code] = self._state(invite)
+
+    @commands.Cog.listener()
+    async def on_invite_delete(self, invite: discord.Invite):
+        if invite.guild is None:
+            return
+        state = self._invites.get(invite.guild.id, {}).pop(invite.code, None)
+        if state:
+            # Kept briefly: a used-up invite is deleted just as its last member joins
+            self._recently_deleted.setdefault(invite.guild.id, {})[invite.code] = (
+                state,
+                time.monotonic(),
+            )
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        async with self._lock_for(guild.id):
+            await self.refresh(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self._invites.pop(guild.id, None)
+        self._recently_deleted.pop(guild.id, None)
+
+    def _lock_for(self, guild_id: int) -> asyncio.Lock:
+        lock = self._locks.get(guild_id)
+        if lock is None:
+            lock = self._locks[guild_id] = asyncio.Lock()
+        return lock
+
+    @staticmethod
+    def _state(invite: discord.Invite) -> Dict:
+        return {
+            "uses": invite.uses or 0,
+            "max_uses": invite.max_uses or 0,
+            "inviter": invite.inviter,
+        }
+
+    async def fetch(self, guild: discord.Guild) -> Optional[Dict[str, Dict]]:
+        """Fetch the guild's current invites as a code -> state map."""
+        try:
+            fetched = await guild.invites()
+        except Exception as e:
+            logger.info(f"Invite cache update failed for {guild.name}: {e}")
+            return None
+        return {invite.code: self._state(invite) for invite in fetched}
+
+    async def refresh(self, guild: discord.Guild):
+        """Replace the cached snapshot for a guild."""
+        current = await self.fetch(guild)
+        if current is not None:
+            self._invites[guild.id] = current
+            self._recently_deleted.pop(guild.id, None)
+
+    async def attribute_join(self, member: discord.Member):
+        """Return who invited a member, or None for vanity/unknown joins.
+
+        The join is queued and resolved together with any other joins that
+        arrive before its invite fetch starts.
+        """
+        guild = member.guild
+        future = asyncio.get_running_loop().create_future()
+        self._pending_joins.setdefault(guild.id, []).append((member, future))
+        if guild.id not in self._flush_tasks:
+            task = asyncio.create_task(self._flush_joins(guild))
+            self._flush_tasks[guild.id] = task
+            self._running_flushes.add(task)
+            task.add_done_callback(self._running_flushes.discard)
+        return await future
+
+    async def _flush_joins(self, guild: discord.Guild):
+        """Resolve every queued join for a guild with a single invite fetch."""
+        async with self._lock_for(guild.id):
+            # Joins arriving from here on start the next batch
+            self._flush_tasks.pop(guild.id, None)
+            joins = self._pending_joins.pop(guild.id, [])
+            if not joins:
+                return
+            inviters = [None] * len(joins)
+            try:
+                inviters = await self._resolve_batch(guild, len(joins))
+            except Exception as e:
+                logger.info(f"[ERROR] Invite attribution failed for {guild.name}: {e}")
+            finally:
+                # Also runs when the cog unloads mid-fetch, so no join is left waiting
+                for (member, future), inviter in zip(joins, inviters):
+                    if not future.done():
+                        future.set_result(inviter)
+
+    async def _resolve_batch(self, guild: discord.Guild, joins: int) -> List:
+        """Attribute ``joins`` members to inviters, in join order.
+
+        Uses are counted per invite, not per member, so a batch is only
+        attributed when every use gained belongs to the same inviter. Batches
+        only span one fetch round trip, so that is rare.
+        """
+        before = self._invites.get(guild.id)
+        after = await self.fetch(guild)
+        if after is None:
+            return [None] * joins
+        if before is None:
+            # No baseline to diff against yet
+            self._invites[guild.id] = after
+            return [None] * joins
+
+        # One credit per use gained since the last snapshot
+        credits: List[Tuple[str, object]] = []
+        for code, state in after.items():
+            old = before.get(code)
+            gained = state["uses"] - (old["uses"] if old else 0)
+            credits.extend([(code, state["inviter"])] * max(0, gained))
+        credits.extend(self._used_up_credits(guild.id, before, after))
+
+        inviter_ids = {getattr(inviter, "id", None) for _, inviter in credits}
+        if len(inviter_ids) > 1:
+            # Crediting by position could pair a member with someone else's
+            # inviter, and the invite dedupe would make that permanent
+            self._invites[guild.id] = after
+            logger.info(
+                f"[INVITE] {joins} join(s) in {guild.name} not attributed "
+                f"(ambiguous batch: {len(credits)} uses across {len(inviter_ids)} inviters)"
+            )
+            return [None] * joins
+
+        assigned, surplus = credits[:joins], credits[joins:]
+        # Uses whose join events haven't arrived yet stay pending for the next batch
+        for code, _ in surplus:
+            if code in after:
+                after[code]["uses"] -= 1
+        self._invites[guild.id] = after
+
+        unmatched = joins - len(assigned)
+        if unmatched:
+            source = (
+                "vanity URL or unknown invite"
+                if "VANITY_URL" in guild.features
+                else "unknown invite"
+            )
+            logger.info(
+                f"[INVITE] {unmatched} join(s) in {guild.name} not attributed ({source})"
+            )
+        return [inviter for _, inviter in assigned] + [None] * unmatched
+
+    def _used_up_credits(
+        self, guild_id: int, before: Dict[str, Dict], after: Dict[str, Dict]
+    ) -> List[Tuple[str, object]]:
+        """Credits for limited invites that disappeared by reaching max uses.
+
+        Invites also vanish when they expire or are deleted, so only one that
+        was a single use short of its limit is credited, with that one use.
+        """
+        now = time.monotonic()
+        deleted = self._recently_deleted.pop(guild_id, {})
+        gone = {code: state for code, state in before.items() if code not in after}
+        for code, (state, deleted_at) in deleted.items():
+            if now - deleted_at <= config.INVITE_DELETE_GRACE and code not in after:
+                gone.setdefault(code, state)
+
+        credits = []
+        for code, state in gone.items():
+            if state["max_uses"] and state["uses"] == state["max_uses"] - 1:
+                credits.append((code, state["inviter"]))
+        return credits
+
+
+async def setup(bot):
+    tracker = InviteTracker(bot)
+    await bot.add_cog(tracker)
+    bot.invite_tracker = tracker
+    logger.info("Invite tracker initialized")
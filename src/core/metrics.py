@@ -0,0 +1,267 @@
+"""
+Metrics
+In-process counters, gauges and histograms for the bot's internals, served
+in the Prometheus text format on a local /metrics endpoint
+(src.core.metrics_server) when METRICS_PORT is set.
+
+Updates are plain dict and list operations, so instrumented code pays next
+to nothing whether or not the endpoint is running. Gauges that need a query
+(queue depths) are computed only when /metrics is scraped. DAO latency is
+the one exception: Database methods are only wrapped with timers when the
+endpoint is enabled.
+"""
+
+import logging
+import re
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, List, Sequence, Tuple
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Seconds; DAO calls sit in the low buckets, renders in the high ones
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+# Discord ids, tokens and avatar hashes would make every URL its own route
+_ID_SEGMENT = re.compile(r"/\d{5,}")
+_TOKEN_SEGMENT = re.compile(r"/[\w-]{20,}")
+_API_PREFIX = re.compile(r"^/api/v\d+")
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """A monotonically increasing value per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = defaultdict(float)
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] += amount
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], float]]:
+        return [(self.name, labels, value) for labels, value in self._values.items()]
+
+
+class Gauge:
+    """A value per label combination, read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set_function(self, *labels: str, function: Callable[[], float]):
+        self._functions[labels] = function
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], float]]:
+        samples = []
+        for labels, function in list(self._functions.items()):
+            try:
+                samples.append((self.name, labels, float(function())))
+            except Exception as e:
+                logger.debug(f"Gauge {self.name}{labels} failed: {e}")
+        return samples
+
+
+class Histogram:
+    """Bucketed observations (seconds) per label combination."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, *labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], float]]:
+        samples = []
+        for labels, (counts, total, count) in list(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = bound if bound == "+Inf" else _format_value(bound)
+                samples.append((f"{self.name}_bucket", (*labels, le), cumulative))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def exposition(self) -> str:
+        """All metrics in the Prometheus text format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                names = metric.labelnames
+                if name.endswith("_bucket"):
+                    names = (*names, "le")
+                lines.append(
+                    f"{name}{_format_labels(names, labels)} {_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+events_processed = registry.register(
+    Counter("bot_events_total", "Gateway events handled, by event type", ["event"])
+)
+points_awarded = registry.register(
+    Counter(
+        "bot_points_awarded_total", "Points awarded, by activity type", ["activity"]
+    )
+)
+dao_call_seconds = registry.register(
+    Histogram("bot_dao_call_seconds", "Database method latency", ["method"])
+)
+render_seconds = registry.register(
+    Histogram(
+        "bot_render_seconds",
+        "Image render latency, by template",
+        ["template"],
+        buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0),
+    )
+)
+discord_requests = registry.register(
+    Counter(
+        "bot_discord_requests_total",
+        "Discord HTTP API requests, by route and status",
+        ["method", "route", "status"],
+    )
+)
+discord_rate_limited = registry.register(
+    Counter(
+        "bot_discord_rate_limited_total",
+        "Discord HTTP API responses with status 429, by route",
+        ["method", "route"],
+    )
+)
+role_changes = registry.register(
+    Counter("bot_role_changes_total", "Level roles added or removed", ["action"])
+)
+voice_renames = registry.register(
+    Counter(
+        "bot_voice_renames_total",
+        "Top users voice channel renames, done or skipped (name unchanged)",
+        ["result"],
+    )
+)
+queue_depth = registry.register(
+    Gauge("bot_queue_depth", "Items waiting in internal queues", ["queue"])
+)
+
+
+def time_methods(cls, histogram: Histogram):
+    """Wrap every public method of a class to observe its latency by name."""
+    for name, function in list(vars(cls).items()):
+        if name.startswith("_") or not callable(function):
+            continue
+
+        def timed(function=function, name=name):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started, name)
+
+            return wrapper
+
+        setattr(cls, name, timed())
+
+
+def route_template(path: str) -> str:
+    """Collapse ids and tokens in a Discord API path into placeholders."""
+    path = _API_PREFIX.sub("", path)
+    path = _ID_SEGMENT.sub("/:id", path)
+    return _TOKEN_SEGMENT.sub("/:token", path)
+
+
+def http_trace() -> aiohttp.TraceConfig:
+    """aiohttp hooks that count the bot's Discord API requests and 429s."""
+
+    async def on_request_end(session, context, params):
+        route = route_template(params.url.path)
+        status = params.response.status
+        discord_requests.inc(params.method, route, str(status))
+        if status == 429:
+            discord_rate_limited.inc(params.method, route)
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_end.append(on_request_end)
+    return trace
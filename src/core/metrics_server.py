@@ -0,0 +1,52 @@
+"""
+Metrics Server
+Serves the metrics registry (src.core.metrics) in the Prometheus text format
+at /metrics. Only loaded when METRICS_PORT is set.
+"""
+
+import logging
+from typing import Optional
+from aiohttp import web
+from discord.ext import commands
+import src.core.config as config
+from src.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsServer(commands.Cog):
+    """Serves /metrics on METRICS_HOST:METRICS_PORT."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.runner: Optional[web.AppRunner] = None
+
+    async def cog_load(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, config.METRICS_HOST, config.METRICS_PORT)
+        await site.start()
+        logger.info(
+            f"📈 Metrics at http://{config.METRICS_HOST}:{config.METRICS_PORT}/metrics"
+        )
+
+    async def cog_unload(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=registry.exposition(), content_type="text/plain", charset="utf-8"
+        )
+
+
+async def setup(bot):
+    if not config.METRICS_PORT:
+        logger.info("Metrics endpoint disabled (METRICS_PORT not set)")
+        return
+    server = MetricsServer(bot)
+    await bot.add_cog(server)
+    bot.metrics_server = server
+    logger.info("Metrics server initialized")
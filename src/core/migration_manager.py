@@ -6,17 +6,24 @@ Handles versioned migrations to ensure they only run once
 
 import sqlite3
 import os
-import shutil
 from datetime import datetime
-from typing import List, Tuple, Callable
+from typing import List, Optional, Tuple, Callable
 import src.core.config as config
+from src.core.backup_service import backup_database
+from src.core.setup_db import ADMIN_IDS
 
 
 class MigrationManager:
     """Manages database migrations with versioning."""
 
-    def __init__(self, db_path: str = config.DATABASE_NAME):
+    def __init__(
+        self,
+        db_path: str = config.DATABASE_NAME,
+        default_guild_id: Optional[int] = None,
+    ):
         self.db_path = db_path
+        # Guild that owns data created before per-guild partitioning
+        self.default_guild_id = default_guild_id or config.DEFAULT_GUILD_ID
         self.migrations: List[Tuple[str, str, Callable]] = []
         self._register_migrations()
 
@@ -34,6 +41,110 @@ class MigrationManager:
                 self._migrate_to_v3,
             )
         )
+        # Migration 4.0 - Unique reaction index
+        self.migrations.append(
+            (
+                "4.0",
+                "Add unique index on reaction engagement",
+                self._migrate_to_v4,
+            )
+        )
+        # Migration 5.0 - Unique invite index
+        self.migrations.append(
+            (
+                "5.0",
+                "Add unique index on invite engagement",
+                self._migrate_to_v5,
+            )
+        )
+        # Migration 6.0 - Milestone log lookup index
+        self.migrations.append(
+            (
+                "6.0",
+                "Add per-user milestone log index",
+                self._migrate_to_v6,
+            )
+        )
+        # Migration 7.0 - Notification outbox
+        self.migrations.append(
+            (
+                "7.0",
+                "Add notification outbox for background delivery",
+                self._migrate_to_v7,
+            )
+        )
+        # Migration 8.0 - Admin milestone digest
+        self.migrations.append(
+            (
+                "8.0",
+                "Batch admin milestone notices into a digest",
+                self._migrate_to_v8,
+            )
+        )
+        # Migration 9.0 - Leases for multi-process (sharded) deployments
+        self.migrations.append(
+            (
+                "9.0",
+                "Add leases for single-runner background jobs",
+                self._migrate_to_v9,
+            )
+        )
+        # Migration 10.0 - Per-guild data partitioning
+        self.migrations.append(
+            (
+                "10.0",
+                "Partition members, engagement, config and milestones per guild",
+                self._migrate_to_v10,
+            )
+        )
+        # Migration 11.0 - Engagement retention
+        self.migrations.append(
+            (
+                "11.0",
+                "Add engagement rollups and dedupe keys for log retention",
+                self._migrate_to_v11,
+            )
+        )
+        # Migration 12.0 - Scheduled backups
+        self.migrations.append(
+            (
+                "12.0",
+                "Add scheduled backup config",
+                self._migrate_to_v12,
+            )
+        )
+        # Migration 13.0 - INTEGER snowflake ids
+        self.migrations.append(
+            (
+                "13.0",
+                "Store Discord ids as INTEGER",
+                self._migrate_to_v13,
+            )
+        )
+        # Migration 14.0 - Activity type lookup table
+        self.migrations.append(
+            (
+                "14.0",
+                "Store engagement activity types as integer ids",
+                self._migrate_to_v14,
+            )
+        )
+        # Migration 15.0 - Epoch timestamps
+        self.migrations.append(
+            (
+                "15.0",
+                "Store log timestamps as unix epoch seconds",
+                self._migrate_to_v15,
+            )
+        )
+        # Migration 16.0 - Per-guild admins and campaigns
+        self.migrations.append(
+            (
+                "16.0",
+                "Key admins and campaign channels by guild",
+                self._migrate_to_v16,
+            )
+        )
 
     def get_current_version(self) -> str:
         """Get the current database version."""
@@ -64,7 +175,7 @@ class MigrationManager:
             backup_name = (
                 f"{self.db_path}.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             )
-            shutil.copy2(self.db_path, backup_name)
+            backup_database(self.db_path, backup_name)
             print(f"✅ Database backed up to: {backup_name}")
             return backup_name
         return None
@@ -314,6 +425,1185 @@ class MigrationManager:
             print(f"❌ Migration to version 3.0 failed: {e}")
             return False
 
+    def _migrate_to_v4(self) -> bool:
+        """Migration to version 4.0 - Add unique index on reaction engagement."""
+        print("🔄 Running migration to version 4.0...")
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+
+                # 1. Remove duplicate reactions left by past races
+                print("1️⃣ Removing duplicate reaction rows...")
+                cursor.execute(
+                    """
+                    DELETE FROM engagement_log
+                    WHERE activity_type = 'reaction'
+                    AND id NOT IN (
+                        SELECT MIN(id) FROM engagement_log
+                        WHERE activity_type = 'reaction'
+                        GROUP BY discord_id, activity_object_id
+                    )
+                """
+                )
+                print(f"   ✅ Removed {cursor.rowcount} duplicate reaction rows")
+
+                # 2. One reaction row per (user, message)
+                print("2️⃣ Creating unique reaction index...")
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_engagement_reaction_unique",
+                    "engagement_log(discord_id, activity_type, activity_object_id) "
+                    "WHERE activity_type = 'reaction'",
+                    unique=True,
+                )
+
+                # 3. Window size for the in-memory reaction index
+                cursor.execute(
+                    "INSERT OR IGNORE INTO config (key, value) VALUES (?, ?)",
+                    (
+                        "reaction_index_window_hours",
+                        str(config.DEFAULT_REACTION_INDEX_WINDOW_HOURS),
+                    ),
+                )
+
+                conn.commit()
+                print("✅ Migration to version 4.0 completed successfully!")
+                return True
+
+        except Exception as e:
+            print(f"❌ Migration to version 4.0 failed: {e}")
+            return False
+
+    def _migrate_to_v5(self) -> bool:
+        """Migration to version 5.0 - Add unique index on invite engagement."""
+        print("🔄 Running migration to version 5.0...")
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+
+                # 1. Remove duplicate invites left by past races
+                print("1️⃣ Removing duplicate invite rows...")
+                cursor.execute(
+                    """
+                    DELETE FROM engagement_log
+                    WHERE activity_type = 'invite'
+                    AND id NOT IN (
+                        SELECT MIN(id) FROM engagement_log
+                        WHERE activity_type = 'invite'
+                        GROUP BY discord_id, activity_object_id
+                    )
+                """
+                )
+                print(f"   ✅ Removed {cursor.rowcount} duplicate invite rows")
+
+                # 2. One invite row per (inviter, invitee)
+                print("2️⃣ Creating unique invite index...")
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_engagement_invite_unique",
+                    "engagement_log(discord_id, activity_type, activity_object_id) "
+                    "WHERE activity_type = 'invite'",
+                    unique=True,
+                )
+
+                conn.commit()
+                print("✅ Migration to version 5.0 completed successfully!")
+                return True
+
+        except Exception as e:
+            print(f"❌ Migration to version 5.0 failed: {e}")
+            return False
+
+    def _migrate_to_v6(self) -> bool:
+        """Migration to version 6.0 - Add per-user milestone log index."""
+        print("🔄 Running migration to version 6.0...")
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+
+                # Recorded milestones are now kept in memory and backfilled from
+                # milestones_log once per ladder build; this index serves that
+                # backfill and the user/admin notified updates
+                print("1️⃣ Creating milestone log index...")
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_milestones_log_user",
+                    "milestones_log(discord_id, milestone)",
+                )
+
+                conn.commit()
+                print("✅ Migration to version 6.0 completed successfully!")
+                return True
+
+        except Exception as e:
+            print(f"❌ Migration to version 6.0 failed: {e}")
+            return False
+
+    def _migrate_to_v7(self) -> bool:
+        """Migration to version 7.0 - Add notification outbox."""
+        print("🔄 Running migration to version 7.0...")
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+
+                # 1. Create outbox table
+                print("1️⃣ Creating notification outbox table...")
+                self._create_table_if_not_exists(
+                    cursor,
+                    "notification_outbox",
+                    """
+                    CREATE TABLE notification_outbox (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        kind TEXT NOT NULL,
+                        discord_id TEXT NOT NULL,
+                        milestone INTEGER,
+                        message TEXT NOT NULL,
+                        status TEXT DEFAULT 'pending',
+                        attempts INTEGER DEFAULT 0,
+                        next_attempt_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        last_error TEXT,
+                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                """,
+                )
+
+                # 2. Create indexes
+                print("2️⃣ Creating outbox index...")
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_outbox_due",
+                    "notification_outbox(status, next_attempt_at)",
+                )
+
+                # 3. Insert default config
+                print("3️⃣ Inserting dispatcher config...")
+                new_configs = {
+                    "notification_concurrency": str(config.NOTIFICATION_CONCURRENCY),
+                    "notification_max_attempts": str(config.NOTIFICATION_MAX_ATTEMPTS),
+                }
+                for key, value in new_configs.items():
+                    cursor.execute(
+                        "INSERT OR IGNORE INTO config (key, value) VALUES (?, ?)",
+                        (key, value),
+                    )
+
+                conn.commit()
+                print("✅ Migration to version 7.0 completed successfully!")
+                return True
+
+        except Exception as e:
+            print(f"❌ Migration to version 7.0 failed: {e}")
+            return False
+
+    def _migrate_to_v8(self) -> bool:
+        """Migration to version 8.0 - Batch admin milestone notices into a digest."""
+        print("🔄 Running migration to version 8.0...")
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+
+                # 1. Admins already heard about earlier milestones, except those
+                # whose notice is still queued; the digest reports those instead
+                print("1️⃣ Marking already reported milestones...")
+                cursor.execute(
+                    """
+                    UPDATE milestones_log SET admin_notified = 1
+                    WHERE admin_notified = 0
+                    AND NOT EXISTS (
+                        SELECT 1 FROM notification_outbox o
+                        WHERE o.kind = 'admin_notice' AND o.status = 'pending'
+                        AND o.discord_id = milestones_log.discord_id
+                        AND o.milestone = milestones_log.milestone
+                    )
+                """
+                )
+                print(f"   ✅ Marked {cursor.rowcount} milestones as reported")
+
+                # 2. Admin notices now come from milestones_log via the digest
+                print("2️⃣ Retiring queued per-milestone admin notices...")
+                cursor.execute(
+                    """
+                    UPDATE notification_outbox SET status = 'superseded'
+                    WHERE kind = 'admin_notice' AND status = 'pending'
+                """
+                )
+                print(f"   ✅ Retired {cursor.rowcount} queued admin notices")
+
+                # 3. Create indexes
+                print("3️⃣ Creating pending admin notice index...")
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_milestones_log_admin_pending",
+                    "milestones_log(id) WHERE admin_notified = 0",
+                )
+
+                # 4. Insert default config
+                cursor.execute(
+                    "INSERT OR IGNORE INTO config (key, value) VALUES (?, ?)",
+                    (
+                        "milestone_digest_window_seconds",
+                        str(config.MILESTONE_DIGEST_WINDOW),
+                    ),
+                )
+
+                conn.commit()
+                print("✅ Migration to version 8.0 completed successfully!")
+                return True
+
+        except Exception as e:
+            print(f"❌ Migration to version 8.0 failed: {e}")
+            return False
+
+    def _migrate_to_v9(self) -> bool:
+        """Migration to version 9.0 - Add leases for single-runner background jobs."""
+        print("🔄 Running migration to version 9.0...")
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+
+                # 1. Create new tables
+                print("1️⃣ Creating leases table...")
+                self._create_table_if_not_exists(
+                    cursor,
+                    "leases",
+                    """
+                    CREATE TABLE leases (
+                        name TEXT PRIMARY KEY,
+                        holder TEXT NOT NULL,
+                        expires_at TIMESTAMP NOT NULL
+                    )
+                """,
+                )
+
+                conn.commit()
+                print("✅ Migration to version 9.0 completed successfully!")
+                return True
+
+        except Exception as e:
+            print(f"❌ Migration to version 9.0 failed: {e}")
+            return False
+
+    def _migrate_to_v10(self) -> bool:
+        """Migration to version 10.0 - Partition data per guild."""
+        print("🔄 Running migration to version 10.0...")
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                guild_id = self.default_guild_id
+
+                if guild_id is None:
+                    for table in (
+                        "members",
+                        "engagement_log",
+                        "milestones_log",
+                        "tracked_channels",
+                        "excluded_leaderboard",
+                    ):
+                        cursor.execute(f"SELECT 1 FROM {table} LIMIT 1")
+                        if cursor.fetchone():
+                            print(
+                                "❌ Existing data must be assigned to a guild: set DEFAULT_GUILD_ID"
+                            )
+                            return False
+
+                # 1. Rebuild tables whose primary key gains guild_id
+                print("1️⃣ Rebuilding tables keyed by guild...")
+                self._rebuild_table(
+                    cursor,
+                    "members",
+                    """
+                    CREATE TABLE members_new (
+                        guild_id TEXT NOT NULL,
+                        discord_id TEXT NOT NULL,
+                        total_points INTEGER DEFAULT 0,
+                        level INTEGER DEFAULT 1,
+                        current_streak INTEGER DEFAULT 0,
+                        longest_streak INTEGER DEFAULT 0,
+                        last_activity_date DATE,
+                        PRIMARY KEY (guild_id, discord_id)
+                    )
+                """,
+                    """
+                    INSERT INTO members_new
+                    SELECT ?, discord_id, total_points, level, current_streak, longest_streak, last_activity_date
+                    FROM members
+                """,
+                    (guild_id,),
+                )
+                self._rebuild_table(
+                    cursor,
+                    "excluded_leaderboard",
+                    """
+                    CREATE TABLE excluded_leaderboard_new (
+                        guild_id TEXT NOT NULL,
+                        discord_id TEXT NOT NULL,
+                        PRIMARY KEY (guild_id, discord_id)
+                    )
+                """,
+                    "INSERT INTO excluded_leaderboard_new SELECT ?, discord_id FROM excluded_leaderboard",
+                    (guild_id,),
+                )
+                # Rows under the global guild are bot-wide defaults
+                self._rebuild_table(
+                    cursor,
+                    "config",
+                    f"""
+                    CREATE TABLE config_new (
+                        guild_id TEXT NOT NULL DEFAULT '{config.GLOBAL_GUILD_ID}',
+                        key TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        PRIMARY KEY (guild_id, key)
+                    )
+                """,
+                    "INSERT INTO config_new SELECT ?, key, value FROM config",
+                    (config.GLOBAL_GUILD_ID,),
+                )
+                self._rebuild_table(
+                    cursor,
+                    "milestones",
+                    f"""
+                    CREATE TABLE milestones_new (
+                        guild_id TEXT NOT NULL DEFAULT '{config.GLOBAL_GUILD_ID}',
+                        value INTEGER NOT NULL,
+                        status TEXT DEFAULT 'active',
+                        message TEXT,
+                        role_name TEXT,
+                        is_level_based BOOLEAN DEFAULT 0,
+                        reward TEXT,
+                        PRIMARY KEY (guild_id, value)
+                    )
+                """,
+                    """
+                    INSERT INTO milestones_new
+                    SELECT ?, value, status, message, role_name, is_level_based, reward
+                    FROM milestones
+                """,
+                    (config.GLOBAL_GUILD_ID,),
+                )
+
+                # 2. Add guild_id to append-heavy tables (no rebuild needed)
+                print("2️⃣ Adding guild_id to log tables...")
+                for table in (
+                    "engagement_log",
+                    "milestones_log",
+                    "tracked_channels",
+                    "notification_outbox",
+                ):
+                    self._add_column_if_not_exists(cursor, table, "guild_id", "TEXT")
+
+                # 3. Backfill the current guild
+                if guild_id is not None:
+                    print(f"3️⃣ Backfilling data for guild {guild_id}...")
+                    for table in (
+                        "engagement_log",
+                        "milestones_log",
+                        "tracked_channels",
+                        "notification_outbox",
+                    ):
+                        cursor.execute(
+                            f"UPDATE {table} SET guild_id = ? WHERE guild_id IS NULL",
+                            (guild_id,),
+                        )
+                        print(f"   ✅ Backfilled {cursor.rowcount} {table} rows")
+                    # The guild starts with the current milestones and its channel settings
+                    cursor.execute(
+                        """
+                        INSERT OR IGNORE INTO milestones (guild_id, value, status, message, role_name, is_level_based, reward)
+                        SELECT ?, value, status, message, role_name, is_level_based, reward
+                        FROM milestones WHERE guild_id = ?
+                    """,
+                        (guild_id, config.GLOBAL_GUILD_ID),
+                    )
+                    cursor.execute(
+                        """
+                        UPDATE config SET guild_id = ?
+                        WHERE guild_id = ? AND key IN ('notification_channel_id', 'bot_channel_id')
+                    """,
+                        (guild_id, config.GLOBAL_GUILD_ID),
+                    )
+
+                # 4. Create indexes leading with guild_id
+                print("4️⃣ Creating per-guild indexes...")
+                for index_name in (
+                    "idx_engagement_reaction_unique",
+                    "idx_engagement_invite_unique",
+                    "idx_milestones_log_user",
+                ):
+                    cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_engagement_reaction_unique",
+                    "engagement_log(guild_id, discord_id, activity_type, activity_object_id) WHERE activity_type = 'reaction'",
+                    unique=True,
+                )
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_engagement_invite_unique",
+                    "engagement_log(guild_id, discord_id, activity_type, activity_object_id) WHERE activity_type = 'invite'",
+                    unique=True,
+                )
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_engagement_guild_user_time",
+                    "engagement_log(guild_id, discord_id, timestamp)",
+                )
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_engagement_guild_type",
+                    "engagement_log(guild_id, activity_type, discord_id)",
+                )
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_milestones_log_user",
+                    "milestones_log(guild_id, discord_id, milestone)",
+                )
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_members_guild_points",
+                    "members(guild_id, total_points DESC)",
+                )
+                self._create_index_if_not_exists(
+                    cursor, "idx_members_level", "members(guild_id, level)"
+                )
+                self._create_index_if_not_exists(
+                    cursor, "idx_members_streak", "members(guild_id, current_streak)"
+                )
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_milestones_level",
+                    "milestones(guild_id, is_level_based, value)",
+                )
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_tracked_channels_guild",
+                    "tracked_channels(guild_id, status)",
+                )
+
+                conn.commit()
+                print("✅ Migration to version 10.0 completed successfully!")
+                return True
+
+        except Exception as e:
+            print(f"❌ Migration to version 10.0 failed: {e}")
+            return False
+
+    def _migrate_to_v11(self) -> bool:
+        """Migration to version 11.0 - Engagement rollups and retention."""
+        print("🔄 Running migration to version 11.0...")
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+
+                # 1. Create new tables
+                print("1️⃣ Creating engagement rollup and key tables...")
+                self._create_table_if_not_exists(
+                    cursor,
+                    "engagement_daily",
+                    """
+                    CREATE TABLE engagement_daily (
+                        guild_id TEXT NOT NULL,
+                        discord_id TEXT NOT NULL,
+                        day DATE NOT NULL,
+                        activity_type TEXT NOT NULL,
+                        count INTEGER DEFAULT 0,
+                        points INTEGER DEFAULT 0,
+                        PRIMARY KEY (guild_id, discord_id, day, activity_type)
+                    )
+                """,
+                )
+                self._create_table_if_not_exists(
+                    cursor,
+                    "engagement_keys",
+                    """
+                    CREATE TABLE engagement_keys (
+                        guild_id TEXT NOT NULL,
+                        discord_id TEXT NOT NULL,
+                        activity_type TEXT NOT NULL,
+                        activity_object_id TEXT NOT NULL,
+                        PRIMARY KEY (guild_id, discord_id, activity_type, activity_object_id)
+                    ) WITHOUT ROWID
+                """,
+                )
+
+                # 2. Insert default config
+                print("2️⃣ Inserting retention config...")
+                cursor.execute(
+                    "INSERT OR IGNORE INTO config (key, value) VALUES (?, ?)",
+                    (
+                        "engagement_retention_days",
+                        str(config.ENGAGEMENT_RETENTION_DAYS),
+                    ),
+                )
+                conn.commit()
+
+                # 3. Let retention hand deleted pages back in small steps
+                cursor.execute("PRAGMA auto_vacuum")
+                if cursor.fetchone()[0] != 2:
+                    print("3️⃣ Enabling incremental vacuum (one-time VACUUM)...")
+                    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                    cursor.execute("VACUUM")
+
+                print("✅ Migration to version 11.0 completed successfully!")
+                return True
+
+        except Exception as e:
+            print(f"❌ Migration to version 11.0 failed: {e}")
+            return False
+
+    def _migrate_to_v12(self) -> bool:
+        """Migration to version 12.0 - Scheduled backup config."""
+        print("🔄 Running migration to version 12.0...")
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+
+                # 1. Insert default config
+                print("1️⃣ Inserting backup config...")
+                new_configs = {
+                    "backup_interval_hours": str(config.BACKUP_INTERVAL_HOURS),
+                    "backup_retention_count": str(config.BACKUP_RETENTION_COUNT),
+                }
+                for key, value in new_configs.items():
+                    cursor.execute(
+                        "INSERT OR IGNORE INTO config (key, value) VALUES (?, ?)",
+                        (key, value),
+                    )
+
+                conn.commit()
+                print("✅ Migration to version 12.0 completed successfully!")
+                return True
+
+        except Exception as e:
+            print(f"❌ Migration to version 12.0 failed: {e}")
+            return False
+
+    def _migrate_to_v13(self) -> bool:
+        """Migration to version 13.0 - Store Discord snowflakes as INTEGER."""
+        print("🔄 Running migration to version 13.0...")
+
+        # Snowflake columns as INTEGER; anything non-numeric (e.g. 'N/A') -> NULL
+        def snowflake(column: str) -> str:
+            return (
+                f"CASE WHEN {column} GLOB '[0-9]*' THEN CAST({column} AS INTEGER) END"
+            )
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+
+                # 1. Single-id keys become rowid aliases
+                print("1️⃣ Rebuilding tables keyed by a single id...")
+                self._rebuild_table(
+                    cursor,
+                    "admin_ids",
+                    """
+                    CREATE TABLE admin_ids_new (
+                        discord_id INTEGER PRIMARY KEY,
+                        status TEXT DEFAULT 'active'
+                    )
+                """,
+                    "INSERT INTO admin_ids_new SELECT CAST(discord_id AS INTEGER), status FROM admin_ids",
+                )
+                self._rebuild_table(
+                    cursor,
+                    "campaign_channels",
+                    """
+                    CREATE TABLE campaign_channels_new (
+                        channel_id INTEGER PRIMARY KEY,
+                        multiplier DECIMAL(3,2) DEFAULT 1.0,
+                        campaign_name TEXT,
+                        start_date DATETIME,
+                        end_date DATETIME,
+                        status TEXT DEFAULT 'active'
+                    )
+                """,
+                    """
+                    INSERT INTO campaign_channels_new
+                    SELECT CAST(channel_id AS INTEGER), multiplier, campaign_name, start_date, end_date, status
+                    FROM campaign_channels
+                """,
+                )
+                self._rebuild_table(
+                    cursor,
+                    "tracked_channels",
+                    """
+                    CREATE TABLE tracked_channels_new (
+                        channel_id INTEGER PRIMARY KEY,
+                        guild_id INTEGER,
+                        status TEXT DEFAULT 'active'
+                    )
+                """,
+                    """
+                    INSERT INTO tracked_channels_new
+                    SELECT CAST(channel_id AS INTEGER), CAST(guild_id AS INTEGER), status
+                    FROM tracked_channels
+                """,
+                    keep_indexes=True,
+                )
+
+                # 2. Composite keys are stored clustered in the primary key
+                print("2️⃣ Rebuilding tables with composite keys...")
+                self._rebuild_table(
+                    cursor,
+                    "config",
+                    f"""
+                    CREATE TABLE config_new (
+                        guild_id INTEGER NOT NULL DEFAULT {config.GLOBAL_GUILD_ID},
+                        key TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        PRIMARY KEY (guild_id, key)
+                    ) WITHOUT ROWID
+                """,
+                    "INSERT INTO config_new SELECT CAST(guild_id AS INTEGER), key, value FROM config",
+                )
+                self._rebuild_table(
+                    cursor,
+                    "members",
+                    """
+                    CREATE TABLE members_new (
+                        guild_id INTEGER NOT NULL,
+                        discord_id INTEGER NOT NULL,
+                        total_points INTEGER DEFAULT 0,
+                        level INTEGER DEFAULT 1,
+                        current_streak INTEGER DEFAULT 0,
+                        longest_streak INTEGER DEFAULT 0,
+                        last_activity_date DATE,
+                        PRIMARY KEY (guild_id, discord_id)
+                    ) WITHOUT ROWID
+                """,
+                    """
+                    INSERT INTO members_new
+                    SELECT CAST(guild_id AS INTEGER), CAST(discord_id AS INTEGER), total_points,
+                           level, current_streak, longest_streak, last_activity_date
+                    FROM members
+                """,
+                    keep_indexes=True,
+                )
+                self._rebuild_table(
+                    cursor,
+                    "milestones",
+                    f"""
+                    CREATE TABLE milestones_new (
+                        guild_id INTEGER NOT NULL DEFAULT {config.GLOBAL_GUILD_ID},
+                        value INTEGER NOT NULL,
+                        status TEXT DEFAULT 'active',
+                        message TEXT,
+                        role_name TEXT,
+                        is_level_based BOOLEAN DEFAULT 0,
+                        reward TEXT,
+                        PRIMARY KEY (guild_id, value)
+                    ) WITHOUT ROWID
+                """,
+                    """
+                    INSERT INTO milestones_new
+                    SELECT CAST(guild_id AS INTEGER), value, status, message, role_name, is_level_based, reward
+                    FROM milestones
+                """,
+                    keep_indexes=True,
+                )
+                self._rebuild_table(
+                    cursor,
+                    "excluded_leaderboard",
+                    """
+                    CREATE TABLE excluded_leaderboard_new (
+                        guild_id INTEGER NOT NULL,
+                        discord_id INTEGER NOT NULL,
+                        PRIMARY KEY (guild_id, discord_id)
+                    ) WITHOUT ROWID
+                """,
+                    """
+                    INSERT INTO excluded_leaderboard_new
+                    SELECT CAST(guild_id AS INTEGER), CAST(discord_id AS INTEGER)
+                    FROM excluded_leaderboard
+                """,
+                )
+                self._rebuild_table(
+                    cursor,
+                    "voice_channel_display",
+                    """
+                    CREATE TABLE voice_channel_display_new (
+                        guild_id INTEGER NOT NULL,
+                        position INTEGER NOT NULL,
+                        channel_id INTEGER,
+                        PRIMARY KEY (guild_id, position)
+                    ) WITHOUT ROWID
+                """,
+                    f"""
+                    INSERT INTO voice_channel_display_new
+                    SELECT CAST(guild_id AS INTEGER), position, {snowflake('channel_id')}
+                    FROM voice_channel_display
+                """,
+                )
+                self._rebuild_table(
+                    cursor,
+                    "engagement_daily",
+                    """
+                    CREATE TABLE engagement_daily_new (
+                        guild_id INTEGER NOT NULL,
+                        discord_id INTEGER NOT NULL,
+                        day DATE NOT NULL,
+                        activity_type TEXT NOT NULL,
+                        count INTEGER DEFAULT 0,
+                        points INTEGER DEFAULT 0,
+                        PRIMARY KEY (guild_id, discord_id, day, activity_type)
+                    ) WITHOUT ROWID
+                """,
+                    """
+                    INSERT INTO engagement_daily_new
+                    SELECT CAST(guild_id AS INTEGER), CAST(discord_id AS INTEGER), day,
+                           activity_type, count, points
+                    FROM engagement_daily
+                """,
+                )
+                # Invite keys drop their 'invite_' prefix: the invitee id is the key
+                self._rebuild_table(
+                    cursor,
+                    "engagement_keys",
+                    """
+                    CREATE TABLE engagement_keys_new (
+                        guild_id INTEGER NOT NULL,
+                        discord_id INTEGER NOT NULL,
+                        activity_type TEXT NOT NULL,
+                        activity_object_id INTEGER NOT NULL,
+                        PRIMARY KEY (guild_id, discord_id, activity_type, activity_object_id)
+                    ) WITHOUT ROWID
+                """,
+                    """
+                    INSERT INTO engagement_keys_new
+                    SELECT CAST(guild_id AS INTEGER), CAST(discord_id AS INTEGER), activity_type,
+                           CAST(REPLACE(activity_object_id, 'invite_', '') AS INTEGER)
+                    FROM engagement_keys
+                """,
+                )
+
+                # 3. Log tables keep their AUTOINCREMENT ids
+                print("3️⃣ Rebuilding log tables...")
+                self._rebuild_table(
+                    cursor,
+                    "engagement_log",
+                    """
+                    CREATE TABLE engagement_log_new (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        guild_id INTEGER,
+                        discord_id INTEGER NOT NULL,
+                        activity_type TEXT NOT NULL,
+                        activity_object_id INTEGER,
+                        channel_id INTEGER,
+                        point_value INTEGER DEFAULT 0,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        campaign_multiplier DECIMAL(3,2) DEFAULT 1.0
+                    )
+                """,
+                    f"""
+                    INSERT INTO engagement_log_new
+                    SELECT id, CAST(guild_id AS INTEGER), CAST(discord_id AS INTEGER), activity_type,
+                           {snowflake("REPLACE(activity_object_id, 'invite_', '')")},
+                           {snowflake('channel_id')}, point_value, timestamp, campaign_multiplier
+                    FROM engagement_log
+                """,
+                    keep_indexes=True,
+                )
+                self._rebuild_table(
+                    cursor,
+                    "milestones_log",
+                    """
+                    CREATE TABLE milestones_log_new (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        guild_id INTEGER,
+                        discord_id INTEGER NOT NULL,
+                        milestone INTEGER NOT NULL,
+                        reached_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        user_notified INTEGER DEFAULT 0,
+                        admin_notified INTEGER DEFAULT 0,
+                        reward_status TEXT DEFAULT 'pending',
+                        reward_code TEXT
+                    )
+                """,
+                    """
+                    INSERT INTO milestones_log_new
+                    SELECT id, CAST(guild_id AS INTEGER), CAST(discord_id AS INTEGER), milestone,
+                           reached_at, user_notified, admin_notified, reward_status, reward_code
+                    FROM milestones_log
+                """,
+                    keep_indexes=True,
+                )
+                self._rebuild_table(
+                    cursor,
+                    "notification_outbox",
+                    """
+                    CREATE TABLE notification_outbox_new (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        guild_id INTEGER,
+                        kind TEXT NOT NULL,
+                        discord_id INTEGER NOT NULL,
+                        milestone INTEGER,
+                        message TEXT NOT NULL,
+                        status TEXT DEFAULT 'pending',
+                        attempts INTEGER DEFAULT 0,
+                        next_attempt_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        last_error TEXT,
+                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )
+                """,
+                    """
+                    INSERT INTO notification_outbox_new
+                    SELECT id, CAST(guild_id AS INTEGER), kind, CAST(discord_id AS INTEGER), milestone,
+                           message, status, attempts, next_attempt_at, last_error, created_at
+                    FROM notification_outbox
+                """,
+                    keep_indexes=True,
+                )
+
+                conn.commit()
+                print("✅ Migration to version 13.0 completed successfully!")
+                return True
+
+        except Exception as e:
+            print(f"❌ Migration to version 13.0 failed: {e}")
+            return False
+
+    def _migrate_to_v14(self) -> bool:
+        """Migration to version 14.0 - Activity type lookup table."""
+        print("🔄 Running migration to version 14.0...")
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+
+                # 1. Lookup table, with any unexpected stored types kept as extra rows
+                print("1️⃣ Creating activity types...")
+                self._create_table_if_not_exists(
+                    cursor,
+                    "activity_types",
+                    """
+                    CREATE TABLE activity_types (
+                        id INTEGER PRIMARY KEY,
+                        name TEXT NOT NULL UNIQUE
+                    )
+                """,
+                )
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO activity_types (id, name) VALUES (?, ?)",
+                    [
+                        (type_id, name)
+                        for name, type_id in config.ACTIVITY_TYPES.items()
+                    ],
+                )
+                for table in ("engagement_log", "engagement_daily", "engagement_keys"):
+                    cursor.execute(
+                        f"INSERT OR IGNORE INTO activity_types (name) SELECT DISTINCT activity_type FROM {table}"
+                    )
+
+                # 2. Replace activity_type with activity_type_id
+                print("2️⃣ Rebuilding engagement tables...")
+                self._rebuild_table(
+                    cursor,
+                    "engagement_log",
+                    """
+                    CREATE TABLE engagement_log_new (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        guild_id INTEGER,
+                        discord_id INTEGER NOT NULL,
+                        activity_type_id INTEGER NOT NULL REFERENCES activity_types(id),
+                        activity_object_id INTEGER,
+                        channel_id INTEGER,
+                        point_value INTEGER DEFAULT 0,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        campaign_multiplier DECIMAL(3,2) DEFAULT 1.0
+                    )
+                """,
+                    """
+                    INSERT INTO engagement_log_new
+                    SELECT l.id, l.guild_id, l.discord_id, t.id, l.activity_object_id,
+                           l.channel_id, l.point_value, l.timestamp, l.campaign_multiplier
+                    FROM engagement_log l
+                    JOIN activity_types t ON t.name = l.activity_type
+                """,
+                )
+                self._rebuild_table(
+                    cursor,
+                    "engagement_daily",
+                    """
+                    CREATE TABLE engagement_daily_new (
+                        guild_id INTEGER NOT NULL,
+                        discord_id INTEGER NOT NULL,
+                        day DATE NOT NULL,
+                        activity_type_id INTEGER NOT NULL,
+                        count INTEGER DEFAULT 0,
+                        points INTEGER DEFAULT 0,
+                        PRIMARY KEY (guild_id, discord_id, day, activity_type_id)
+                    ) WITHOUT ROWID
+                """,
+                    """
+                    INSERT INTO engagement_daily_new
+                    SELECT d.guild_id, d.discord_id, d.day, t.id, d.count, d.points
+                    FROM engagement_daily d
+                    JOIN activity_types t ON t.name = d.activity_type
+                """,
+                )
+                self._rebuild_table(
+                    cursor,
+                    "engagement_keys",
+                    """
+                    CREATE TABLE engagement_keys_new (
+                        guild_id INTEGER NOT NULL,
+                        discord_id INTEGER NOT NULL,
+                        activity_type_id INTEGER NOT NULL,
+                        activity_object_id INTEGER NOT NULL,
+                        PRIMARY KEY (guild_id, discord_id, activity_type_id, activity_object_id)
+                    ) WITHOUT ROWID
+                """,
+                    """
+                    INSERT INTO engagement_keys_new
+                    SELECT k.guild_id, k.discord_id, t.id, k.activity_object_id
+                    FROM engagement_keys k
+                    JOIN activity_types t ON t.name = k.activity_type
+                """,
+                )
+
+                # 3. Recreate engagement_log indexes on the id column
+                print("3️⃣ Creating engagement indexes...")
+                reaction = config.ACTIVITY_TYPES["reaction"]
+                invite = config.ACTIVITY_TYPES["invite"]
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_engagement_campaign",
+                    "engagement_log(campaign_multiplier)",
+                )
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_engagement_reaction_unique",
+                    f"engagement_log(guild_id, discord_id, activity_type_id, activity_object_id) WHERE activity_type_id = {reaction}",
+                    unique=True,
+                )
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_engagement_invite_unique",
+                    f"engagement_log(guild_id, discord_id, activity_type_id, activity_object_id) WHERE activity_type_id = {invite}",
+                    unique=True,
+                )
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_engagement_guild_user_time",
+                    "engagement_log(guild_id, discord_id, timestamp)",
+                )
+                self._create_index_if_not_exists(
+                    cursor,
+                    "idx_engagement_guild_type",
+                    "engagement_log(guild_id, activity_type_id, discord_id)",
+                )
+
+                conn.commit()
+                print("✅ Migration to version 14.0 completed successfully!")
+                return True
+
+        except Exception as e:
+            print(f"❌ Migration to version 14.0 failed: {e}")
+            return False
+
+    def _migrate_to_v15(self) -> bool:
+        """Migration to version 15.0 - Unix epoch timestamps for log tables."""
+        print("🔄 Running migration to version 15.0...")
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+
+                # 1. Convert text timestamps (UTC) to epoch seconds
+                print("1️⃣ Rebuilding log tables with epoch timestamps...")
+                self._rebuild_table(
+                    cursor,
+                    "engagement_log",
+                    """
+                    CREATE TABLE engagement_log_new (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        guild_id INTEGER,
+                        discord_id INTEGER NOT NULL,
+                        activity_type_id INTEGER NOT NULL REFERENCES activity_types(id),
+                        activity_object_id INTEGER,
+                        channel_id INTEGER,
+                        point_value INTEGER DEFAULT 0,
+                        timestamp INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+                        campaign_multiplier DECIMAL(3,2) DEFAULT 1.0
+                    )
+                """,
+                    """
+                    INSERT INTO engagement_log_new
+                    SELECT id, guild_id, discord_id, activity_type_id, activity_object_id, channel_id,
+                           point_value, CAST(strftime('%s', timestamp) AS INTEGER), campaign_multiplier
+                    FROM engagement_log
+                """,
+                    keep_indexes=True,
+                )
+                self._rebuild_table(
+                    cursor,
+                    "milestones_log",
+                    """
+                    CREATE TABLE milestones_log_new (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        guild_id INTEGER,
+                        discord_id INTEGER NOT NULL,
+                        milestone INTEGER NOT NULL,
+                        reached_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+                        user_notified INTEGER DEFAULT 0,
+                        admin_notified INTEGER DEFAULT 0,
+                        reward_status TEXT DEFAULT 'pending',
+                        reward_code TEXT
+                    )
+                """,
+                    """
+                    INSERT INTO milestones_log_new
+                    SELECT id, guild_id, discord_id, milestone, CAST(strftime('%s', reached_at) AS INTEGER),
+                           user_notified, admin_notified, reward_status, reward_code
+                    FROM milestones_log
+                """,
+                    keep_indexes=True,
+                )
+
+                # 2. Time-window scans (reaction index, retention, exports)
+                print("2️⃣ Creating timestamp index...")
+                self._create_index_if_not_exists(
+                    cursor, "idx_engagement_timestamp", "engagement_log(timestamp)"
+                )
+
+                conn.commit()
+                print("✅ Migration to version 15.0 completed successfully!")
+                return True
+
+        except Exception as e:
+            print(f"❌ Migration to version 15.0 failed: {e}")
+            return False
+
+    def _migrate_to_v16(self) -> bool:
+        """Migration to version 16.0 - Per-guild admins and campaign channels."""
+        print("🔄 Running migration to version 16.0...")
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                guild_id = self.default_guild_id
+
+                # Campaigns belong to the guild that tracks their channel
+                cursor.execute(
+                    """
+                    SELECT 1 FROM campaign_channels c
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM tracked_channels t WHERE t.channel_id = c.channel_id
+                    )
+                    LIMIT 1
+                """
+                )
+                if guild_id is None and cursor.fetchone():
+                    print(
+                        "❌ Existing campaigns must be assigned to a guild: set DEFAULT_GUILD_ID"
+                    )
+                    return False
+
+                # 1. Existing admins go to the bot's guild, or stay bot-wide when
+                # the guild isn't known
+                print("1️⃣ Rebuilding admins keyed by guild...")
+                self._rebuild_table(
+                    cursor,
+                    "admin_ids",
+                    f"""
+                    CREATE TABLE admin_ids_new (
+                        guild_id INTEGER NOT NULL DEFAULT {config.GLOBAL_GUILD_ID},
+                        discord_id INTEGER NOT NULL,
+                        status TEXT DEFAULT 'active',
+                        PRIMARY KEY (guild_id, discord_id)
+                    ) WITHOUT ROWID
+                """,
+                    "INSERT INTO admin_ids_new SELECT ?, discord_id, status FROM admin_ids",
+                    (config.GLOBAL_GUILD_ID if guild_id is None else guild_id,),
+                )
+
+                # 2. Campaign channels
+                print("2️⃣ Rebuilding campaign channels keyed by guild...")
+                self._rebuild_table(
+                    cursor,
+                    "campaign_channels",
+                    """
+                    CREATE TABLE campaign_channels_new (
+                        guild_id INTEGER NOT NULL,
+                        channel_id INTEGER NOT NULL,
+                        multiplier DECIMAL(3,2) DEFAULT 1.0,
+                        campaign_name TEXT,
+                        start_date DATETIME,
+                        end_date DATETIME,
+                        status TEXT DEFAULT 'active',
+                        PRIMARY KEY (guild_id, channel_id)
+                    ) WITHOUT ROWID
+                """,
+                    """
+                    INSERT INTO campaign_channels_new
+                    SELECT COALESCE(
+                               (SELECT MIN(t.guild_id) FROM tracked_channels t
+                                WHERE t.channel_id = c.channel_id),
+                               ?
+                           ),
+                           c.channel_id, c.multiplier, c.campaign_name, c.start_date,
+                           c.end_date, c.status
+                    FROM campaign_channels c
+                """,
+                    (guild_id,),
+                )
+
+                # 3. A new database gets the example admins, for one guild only
+                cursor.execute("SELECT 1 FROM admin_ids LIMIT 1")
+                if config.DEFAULT_GUILD_ID is not None and not cursor.fetchone():
+                    print(f"3️⃣ Adding admins for guild {config.DEFAULT_GUILD_ID}...")
+                    cursor.executemany(
+                        "INSERT INTO admin_ids (guild_id, discord_id) VALUES (?, ?)",
+                        [
+                            (config.DEFAULT_GUILD_ID, discord_id)
+                            for discord_id in ADMIN_IDS
+                        ],
+                    )
+
+                conn.commit()
+                print("✅ Migration to version 16.0 completed successfully!")
+                return True
+
+        except Exception as e:
+            print(f"❌ Migration to version 16.0 failed: {e}")
+            return False
+
+    def _rebuild_table(
+        self,
+        cursor,
+        table: str,
+        create_sql: str,
+        copy_sql: str,
+        params: tuple = (),
+        keep_indexes: bool = False,
+    ):
+        """Recreate a table with a new schema (via {table}_new) and copy its rows over.
+
+        With keep_indexes, the table's indexes are recreated on the new table.
+        """
+        cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table,),
+        )
+        index_sqls = [row[0] for row in cursor.fetchall()] if keep_indexes else []
+        cursor.execute(f"DROP TABLE IF EXISTS {table}_new")
+        cursor.execute(create_sql)
+        cursor.execute(copy_sql, params)
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        for index_sql in index_sqls:
+            cursor.execute(index_sql)
+        print(f"   ✅ Rebuilt '{table}' table")
+
     def _add_column_if_not_exists(
         self, cursor, table: str, column: str, definition: str
     ):
@@ -334,14 +1624,15 @@ class MigrationManager:
             print(f"   ✅ Created '{table}' table")
 
     def _create_index_if_not_exists(
-        self, cursor, index_name: str, index_definition: str
+        self, cursor, index_name: str, index_definition: str, unique: bool = False
     ):
         """Create an index if it doesn't exist."""
         cursor.execute(
             f"SELECT name FROM sqlite_master WHERE type='index' AND name='{index_name}'"
         )
         if not cursor.fetchone():
-            cursor.execute(f"CREATE INDEX {index_name} ON {index_definition}")
+            kind = "UNIQUE INDEX" if unique else "INDEX"
+            cursor.execute(f"CREATE {kind} {index_name} ON {index_definition}")
             print(f"   ✅ Created index {index_name}")
 
     def run_migrations(self) -> bool:
@@ -396,9 +1687,9 @@ class MigrationManager:
         return v1_parts > v2_parts
 
 
-def run_migrations():
+def run_migrations(default_guild_id: Optional[int] = None):
     """Run all pending migrations."""
-    manager = MigrationManager()
+    manager = MigrationManager(default_guild_id=default_guild_id)
     return manager.run_migrations()
 
 
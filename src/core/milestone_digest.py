@@ -0,0 +1,200 @@
+import csv
+import io
+import discord
+from discord.ext import commands, tasks
+from src.core.database import Database
+import src.core.config as config
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+dao = Database()
+
+EMBED_DESCRIPTION_LIMIT = 4000
+
+
+class MilestoneDigest(commands.Cog):
+    """Batches milestone events into one admin digest per window."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        window = int(
+            dao.get_config(config.GLOBAL_GUILD_ID, "milestone_digest_window_seconds")
+            or config.MILESTONE_DIGEST_WINDOW
+        )
+        self.send_digest.change_interval(seconds=max(30, window))
+        self.send_digest.start()
+
+    def cog_unload(self):
+        """Clean up when cog is unloaded."""
+        self.send_digest.cancel()
+
+    @tasks.loop(seconds=config.MILESTONE_DIGEST_WINDOW)
+    async def send_digest(self):
+        """Periodically report newly reached milestones to admins."""
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Error in send_digest task: {e}")
+
+    @send_digest.before_loop
+    async def before_send_digest(self):
+        """Wait until bot is ready before starting the task."""
+        await self.bot.wait_until_ready()
+
+    async def flush(self) -> int:
+        """Send one digest per guild covering every milestone admins haven't seen.
+
+        Each shard process reports the guilds it serves, where it can see the
+        admin channel and the guild's members. Returns how many milestones
+        were reported.
+        """
+        # Each guild's admins only hear about their own members
+        by_guild: Dict[int, List[Dict]] = {}
+        for row in dao.get_admin_pending_milestones():
+            if self.bot.get_guild(row["guild_id"]) is not None:
+                by_guild.setdefault(row["guild_id"], []).append(row)
+
+        reported = 0
+        for guild_id, rows in by_guild.items():
+            try:
+                reported += await self._flush_guild(guild_id, rows)
+            except Exception as e:
+                logger.error(f"[MILESTONE DIGEST] Failed for guild {guild_id}: {e}")
+
+        if reported:
+            logger.info(f"[MILESTONE DIGEST] Reported {reported} milestones to admins")
+        return reported
+
+    async def _flush_guild(self, guild_id: int, pending: List[Dict]) -> int:
+        """Send one guild's digest. Returns how many milestones were reported."""
+        reported = 0
+        if len(pending) <= config.MILESTONE_DIGEST_MAX_EMBED_ROWS:
+            pages = self._paginate(pending)
+            for i, rows in enumerate(pages, 1):
+                title = "📢 Milestones Reached"
+                if len(pages) > 1:
+                    title += f" ({i}/{len(pages)})"
+                embed = discord.Embed(
+                    title=title,
+                    description="\n".join(self._format_row(row) for row in rows),
+                    color=discord.Color.gold(),
+                )
+                if not await self._send(guild_id, embed=embed):
+                    return reported
+                dao.mark_milestones_admin_notified_by_ids([row["id"] for row in rows])
+                reported += len(rows)
+            return reported
+        else:
+            # Too many for a few embeds, attach everything as CSV
+            summary = discord.Embed(
+                title="📢 Milestones Reached",
+                description=f"**{len(pending):,}** milestones reached since the last digest. Full list attached.",
+                color=discord.Color.gold(),
+            )
+            if not await self._send(
+                guild_id, embed=summary, file=self._build_csv(pending)
+            ):
+                return 0
+            dao.mark_milestones_admin_notified_by_ids([row["id"] for row in pending])
+            return len(pending)
+
+    def _format_row(self, row: Dict) -> str:
+        """One digest line per milestone."""
+        details = dao.get_milestone_details(row["guild_id"], row["milestone"])
+        role_info = (
+            f" (Role: {details['role_name']})"
+            if details and details.get("role_name")
+            else ""
+        )
+        return f"• <@{row['discord_id']}> reached **{row['milestone']:,}**{role_info} — Reward Code: `{row['reward_code']}`"
+
+    def _paginate(self, pending: List[Dict]) -> List[List[Dict]]:
+        """Split rows into pages whose lines fit in one embed description."""
+        pages: List[List[Dict]] = [[]]
+        size = 0
+        for row in pending:
+            length = len(self._format_row(row)) + 1
+            if pages[-1] and size + length > EMBED_DESCRIPTION_LIMIT:
+                pages.append([])
+                size = 0
+            pages[-1].append(row)
+            size += length
+        return pages
+
+    def _build_csv(self, pending: List[Dict]) -> discord.File:
+        """Build a CSV attachment of the pending milestones."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(
+            ["discord_id", "milestone", "role_name", "reward_code", "reached_at"]
+        )
+        for row in pending:
+            details = dao.get_milestone_details(row["guild_id"], row["milestone"])
+            writer.writerow(
+                [
+                    row["discord_id"],
+                    row["milestone"],
+                    (details or {}).get("role_name") or "",
+                    row["reward_code"],
+                    datetime.fromtimestamp(row["reached_at"], timezone.utc).strftime(
+                        "%Y-%m-%d %H:%M:%S"
+                    ),
+                ]
+            )
+        filename = f"milestones_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        return discord.File(io.BytesIO(buffer.getvalue().encode("utf-8")), filename)
+
+    def _guild_admin_id(self, guild_id: int):
+        """An admin who is a member of the guild, if there is one."""
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return None
+        for admin_id in dao.get_all_admin_ids(guild_id):
+            if guild.get_member(admin_id):
+                return admin_id
+        return None
+
+    async def _send(self, guild_id: int, **kwargs) -> bool:
+        """Send to the guild's admin channel, falling back to DMing one of its admins.
+
+        Returns False when there is nobody in the guild to send to, so the
+        milestones stay unreported for the next digest.
+        """
+        channel_id = dao.get_config(guild_id, "notification_channel_id")
+        admin_channel = None
+        if channel_id and channel_id.isdigit():
+            admin_channel = self.bot.get_channel(int(channel_id))
+
+        if admin_channel:
+            await admin_channel.send(**kwargs)
+            return True
+
+        logger.warning(
+            f"[ADMIN CHANNEL ERROR] Admin channel {channel_id} not found or inaccessible"
+        )
+
+        # Fallback: DM an admin of this guild; reward codes must not leave it
+        admin_id = self._guild_admin_id(guild_id)
+        if admin_id is None:
+            logger.warning(
+                f"[MILESTONE DIGEST] No admin channel or admin member in guild {guild_id}, "
+                "milestones left unreported"
+            )
+            return False
+
+        await self.bot.dm_resolver.send(
+            admin_id,
+            "⚠️ **No Admin Channel Configured**\n"
+            "Please set one using `/ttp-setconfig notification_channel_id <channel_id>`",
+            **kwargs,
+        )
+        return True
+
+
+async def setup(bot):
+    digest = MilestoneDigest(bot)
+    await bot.add_cog(digest)
+    bot.milestone_digest = digest
+    logger.info("Milestone digest initialized")
@@ -0,0 +1,133 @@
+"""
+Milestone Ladder
+Active milestones held in memory as a sorted array, answering level, next,
+previous and count queries with bisect instead of SQL. Also tracks which
+milestones each user already has recorded, as a bitmask over the ladder.
+"""
+
+import time
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+import src.core.config as config
+
+
+class MilestoneLadder:
+    """Sorted snapshot of the active milestones."""
+
+    def __init__(
+        self,
+        rows: List[Tuple[int, Optional[str], Optional[str], bool, Optional[str]]],
+    ):
+        # rows come from Database.get_active_milestones (ordered by value)
+        rows = sorted(rows, key=lambda row: row[0])
+        self.values: List[int] = [row[0] for row in rows]
+        self.milestones: List[Dict] = [
+            {
+                "value": value,
+                "message": message,
+                "role_name": role_name,
+                "is_level_based": is_level_based,
+                "reward": reward,
+            }
+            for value, message, role_name, is_level_based, reward in rows
+        ]
+        self._positions = {value: i for i, value in enumerate(self.values)}
+        # discord_id -> bitmask of recorded milestones (bit i = values[i])
+        self._achieved: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def count_reached(self, points: int) -> int:
+        """Number of milestones at or below the given points (sequential level)."""
+        return bisect_right(self.values, points)
+
+    def level_for(self, points: int) -> int:
+        """Highest milestone value at or below the given points, or 0."""
+        i = bisect_right(self.values, points)
+        return self.values[i - 1] if i else 0
+
+    def next_after(self, points: int) -> Optional[Dict]:
+        """The first milestone strictly above the given points, if any."""
+        i = bisect_right(self.values, points)
+        return self.milestones[i] if i < len(self.values) else None
+
+    def position(self, value: int) -> Optional[int]:
+        """Index of a milestone value in the ladder, if it is active."""
+        return self._positions.get(value)
+
+    def details(self, value: int) -> Optional[Dict]:
+        """All attributes of an active milestone."""
+        i = self._positions.get(value)
+        return self.milestones[i] if i is not None else None
+
+    def role_milestones(self) -> List[Tuple[int, str]]:
+        """(value, role_name) for active milestones that assign a role."""
+        return [(m["value"], m["role_name"]) for m in self.milestones if m["role_name"]]
+
+    def role_name_for(self, points: int) -> Optional[str]:
+        """Role of the highest role-bearing milestone at or below the given points."""
+        for m in reversed(self.milestones[: bisect_right(self.values, points)]):
+            if m["role_name"]:
+                return m["role_name"]
+        return None
+
+    def load_achieved(self, rows: List[Tuple[int, int]]):
+        """Backfill recorded milestones from (discord_id, milestone) rows."""
+        self._achieved = {}
+        for discord_id, milestone in rows:
+            self.mark_achieved(discord_id, milestone)
+
+    def mark_achieved(self, discord_id: int, milestone: int):
+        """Record that a user reached a milestone."""
+        i = self._positions.get(milestone)
+        if i is not None:
+            self._achieved[discord_id] = self._achieved.get(discord_id, 0) | (1 << i)
+
+    def clear_achieved(self):
+        """Forget all recorded milestones (after a global reset)."""
+        self._achieved = {}
+
+    def first_unrecorded(self, discord_id: int, points: int) -> Optional[int]:
+        """Lowest milestone the user qualifies for but has not had recorded."""
+        reached = (1 << self.count_reached(points)) - 1
+        pending = reached & ~self._achieved.get(discord_id, 0)
+        if not pending:
+            return None
+        return self.values[(pending & -pending).bit_length() - 1]
+
+
+class LadderCache:
+    """Holds each guild's ladder; rebuilt lazily after its milestones change.
+
+    With ``max_age`` set (sharded mode) ladders are also rebuilt periodically,
+    since milestone edits made in another process can't invalidate them.
+    """
+
+    def __init__(self, max_age: Optional[float] = None):
+        self.max_age = max_age
+        # guild_id -> (ladder, built_at)
+        self._ladders: Dict[int, Tuple[MilestoneLadder, float]] = {}
+
+    def get(self, guild_id: int) -> Optional[MilestoneLadder]:
+        cached = self._ladders.get(guild_id)
+        if cached is None:
+            return None
+        if self.max_age and time.monotonic() - cached[1] > self.max_age:
+            del self._ladders[guild_id]
+            return None
+        return cached[0]
+
+    def set(self, guild_id: int, ladder: MilestoneLadder):
+        self._ladders[guild_id] = (ladder, time.monotonic())
+
+    def invalidate(self, guild_id: Optional[int] = None):
+        """Drop one guild's ladder, or every ladder if no guild is given."""
+        if guild_id is None:
+            self._ladders.clear()
+        else:
+            self._ladders.pop(guild_id, None)
+
+
+# Shared by every Database instance so admin edits are seen everywhere
+ladder_cache = LadderCache(config.SHARDED_CACHE_TTL if config.SHARDED else None)
@@ -0,0 +1,165 @@
+import asyncio
+import time
+import discord
+from discord.ext import commands, tasks
+from src.core import metrics
+from src.core.database import Database
+from src.core.dm_resolver import DMsDisabled
+import src.core.config as config
+import logging
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+dao = Database()
+
+
+class NotificationDispatcher(commands.Cog):
+    """Delivers queued milestone notifications in the background."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._paused_until = 0.0  # monotonic time until which Discord asked us to wait
+        metrics.queue_depth.set_function(
+            "notification_outbox", function=dao.get_pending_notifications_count
+        )
+        self.dispatch_notifications.start()
+
+    def cog_unload(self):
+        """Clean up when cog is unloaded."""
+        self.dispatch_notifications.cancel()
+
+    @tasks.loop(seconds=config.NOTIFICATION_DISPATCH_INTERVAL)
+    async def dispatch_notifications(self):
+        """Periodically deliver due notifications from the outbox."""
+        try:
+            await self.dispatch_due()
+        except Exception as e:
+            logger.error(f"Error in dispatch_notifications task: {e}")
+
+    @dispatch_notifications.before_loop
+    async def before_dispatch_notifications(self):
+        """Wait until bot is ready before starting the task."""
+        await self.bot.wait_until_ready()
+
+    async def dispatch_due(self) -> int:
+        """Deliver one batch of due notifications with bounded concurrency."""
+        if self._is_paused():
+            return 0
+        # Only one shard process delivers the outbox
+        if not dao.holds_lease("notification_dispatcher"):
+            return 0
+
+        due = dao.get_due_notifications(config.NOTIFICATION_BATCH_SIZE)
+        if not due:
+            return 0
+
+        concurrency = int(
+            dao.get_config(config.GLOBAL_GUILD_ID, "notification_concurrency")
+            or config.NOTIFICATION_CONCURRENCY
+        )
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def deliver(notification: Dict):
+            async with semaphore:
+                # A rate limit hit mid-batch leaves the rest pending
+                if not self._is_paused():
+                    await self._deliver(notification)
+
+        await asyncio.gather(*(deliver(n) for n in due))
+        return len(due)
+
+    async def _deliver(self, notification: Dict):
+        """Send a single notification and record the outcome."""
+        notification_id = notification["id"]
+        discord_id = notification["discord_id"]
+
+        try:
+            if notification["kind"] == "user_dm":
+                await self._send_user_dm(notification)
+            else:
+                dao.mark_notification_failed(
+                    notification_id, f"Unknown kind {notification['kind']}"
+                )
+                return
+            dao.mark_notification_sent(notification_id)
+
+        except (discord.Forbidden, DMsDisabled):
+            # Retrying won't help (DMs disabled / missing permissions)
+            logger.info(f"[DM ERROR] Couldn't DM {discord_id} - DMs disabled")
+            dao.mark_notification_failed(notification_id, "Forbidden")
+
+        except discord.NotFound as e:
+            logger.info(f"[DM ERROR] Couldn't notify {discord_id}: {e}")
+            dao.mark_notification_failed(notification_id, str(e))
+
+        except discord.RateLimited as e:
+            self._pause(e.retry_after)
+            dao.reschedule_notification(
+                notification_id, e.retry_after, str(e), count_attempt=False
+            )
+
+        except discord.HTTPException as e:
+            if e.status == 429:
+                retry_after = float(
+                    e.response.headers.get(
+                        "Retry-After", config.NOTIFICATION_BACKOFF_BASE
+                    )
+                )
+                self._pause(retry_after)
+                dao.reschedule_notification(
+                    notification_id, retry_after, str(e), count_attempt=False
+                )
+            else:
+                self._retry_later(notification, e)
+
+        except Exception as e:
+            self._retry_later(notification, e)
+
+    async def _send_user_dm(self, notification: Dict):
+        """DM the user who reached the milestone."""
+        discord_id = notification["discord_id"]
+        await self.bot.dm_resolver.send(discord_id, notification["message"])
+        dao.mark_milestone_user_notified(
+            notification["guild_id"], discord_id, notification["milestone"]
+        )
+        logger.info(
+            f"[MILESTONE] {discord_id} reached {notification['milestone']} points and was notified."
+        )
+
+    def _retry_later(self, notification: Dict, error: Exception):
+        """Reschedule with exponential backoff, or give up after max attempts."""
+        attempts = notification["attempts"] + 1
+        max_attempts = int(
+            dao.get_config(config.GLOBAL_GUILD_ID, "notification_max_attempts")
+            or config.NOTIFICATION_MAX_ATTEMPTS
+        )
+        if attempts >= max_attempts:
+            logger.warning(
+                f"[NOTIFY ERROR] Giving up on notification {notification['id']} after {attempts} attempts: {error}"
+            )
+            dao.mark_notification_failed(notification["id"], str(error))
+            return
+
+        delay = min(
+            config.NOTIFICATION_BACKOFF_BASE * 2 ** (attempts - 1),
+            config.NOTIFICATION_BACKOFF_MAX,
+        )
+        logger.info(
+            f"[NOTIFY RETRY] Notification {notification['id']} failed ({error}), retrying in {delay}s"
+        )
+        dao.reschedule_notification(notification["id"], delay, str(error))
+
+    def _pause(self, retry_after: float):
+        """Stop sending until Discord's rate limit window has passed."""
+        self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        logger.warning(f"[RATE LIMIT] Pausing notifications for {retry_after:.1f}s")
+
+    def _is_paused(self) -> bool:
+        return time.monotonic() < self._paused_until
+
+
+async def setup(bot):
+    dispatcher = NotificationDispatcher(bot)
+    await bot.add_cog(dispatcher)
+    bot.notification_dispatcher = dispatcher
+    logger.info("Notification dispatcher initialized")
@@ -0,0 +1,353 @@
+"""
+Query Profiler
+Samples Database calls while enabled: wall time per method, and SQL text,
+wall time and rows per statement. Statements slower than the threshold are
+logged with their EXPLAIN QUERY PLAN. Toggled at runtime with
+/ttp-queryprofile and reported with /ttp-querystats.
+
+Database methods are always wrapped, but while profiling is off the wrapper
+is a single attribute check and connections are plain sqlite3 connections.
+Only calls picked by the sample rate get profiling connections.
+"""
+
+import logging
+import random
+import re
+import sqlite3
+import threading
+import time
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+import src.core.config as config
+
+logger = logging.getLogger(__name__)
+
+_COMMENT = re.compile(r"--[^\n]*")
+_WHITESPACE = re.compile(r"\s+")
+# "IN (?, ?, ?)" lists vary in length with their arguments
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def normalize_sql(sql: str) -> str:
+    """Strip comments and collapse whitespace and placeholder lists."""
+    sql = _WHITESPACE.sub(" ", _COMMENT.sub("", sql)).strip()
+    return _PLACEHOLDER_LIST.sub("(?, ...)", sql)
+
+
+class _Stats:
+    __slots__ = ("calls", "total", "max", "rows", "method")
+
+    def __init__(self, method: Optional[str] = None):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.method = method
+
+    def add(self, elapsed: float, rows: int = 0):
+        self.calls += 1
+        self.total += elapsed
+        self.rows += rows
+        if elapsed > self.max:
+            self.max = elapsed
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Times each statement from execute until its last fetch.
+
+    A statement is recorded when the cursor runs the next one, runs out of
+    rows, or is closed, or when its connection's block exits.
+    """
+
+    _pending: Optional[list] = None
+
+    def execute(self, sql, parameters=()):
+        self.finish()
+        started = time.perf_counter()
+        super().execute(sql, parameters)
+        # [sql, parameters, seconds, rows]
+        self._pending = [sql, parameters, time.perf_counter() - started, 0]
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self.finish()
+        started = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._pending = [sql, None, time.perf_counter() - started, 0]
+        return self
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, 0 if row is None else 1, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(started, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0, True)
+            raise
+        self._fetched(started, 1, False)
+        return row
+
+    def close(self):
+        self.finish()
+        super().close()
+
+    def _fetched(self, started: float, rows: int, done: bool):
+        pending = self._pending
+        if pending is None:
+            return
+        pending[2] += time.perf_counter() - started
+        pending[3] += rows
+        if done:
+            self.finish()
+
+    def finish(self):
+        """Record the statement in flight, if any."""
+        pending = self._pending
+        if pending is None:
+            return
+        self._pending = None
+        sql, parameters, elapsed, rows = pending
+        if not rows and self.rowcount > 0:
+            # Writes report the rows they changed
+            rows = self.rowcount
+        query_profiler.record_statement(sql, parameters, elapsed, rows, self.connection)
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """A connection whose cursors report to the query profiler."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cursors: List[ProfilingCursor] = []
+
+    def cursor(self, factory=ProfilingCursor):
+        cursor = super().cursor(factory)
+        self._cursors.append(cursor)
+        return cursor
+
+    # The base class shortcuts would bypass cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def finish(self):
+        for cursor in self._cursors:
+            cursor.finish()
+        self._cursors = []
+
+    def __exit__(self, *exc_info):
+        self.finish()
+        return super().__exit__(*exc_info)
+
+    def close(self):
+        self.finish()
+        super().close()
+
+
+def explain(connection: sqlite3.Connection, sql: str, parameters) -> str:
+    """EXPLAIN QUERY PLAN of a statement, as an indented tree."""
+    if not sql.lstrip().upper().startswith(_EXPLAINABLE) or parameters is None:
+        return ""
+    try:
+        # A plain cursor, so the plan query is not itself profiled
+        rows = sqlite3.Cursor(connection).execute(
+            f"EXPLAIN QUERY PLAN {sql}", parameters
+        )
+        depths = {0: 0}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depths[node_id] = depths.get(parent, 0) + 1
+            lines.append("  " * depths[node_id] + detail)
+        return "\n".join(lines)
+    except sqlite3.Error as e:
+        return f"  (no plan: {e})"
+
+
+class QueryProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.slow_query_ms = config.DEFAULT_SLOW_QUERY_MS
+        self.sample_rate = 1.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def configure(
+        self,
+        enabled: Optional[bool] = None,
+        slow_query_ms: Optional[float] = None,
+        sample_rate: Optional[float] = None,
+    ):
+        if slow_query_ms is not None:
+            self.slow_query_ms = slow_query_ms
+        if sample_rate is not None:
+            self.sample_rate = min(1.0, max(0.0, sample_rate))
+        if enabled is not None and enabled != self.enabled:
+            self.enabled = enabled
+            logger.info(
+                f"Query profiling {'enabled' if enabled else 'disabled'} "
+                f"(sample rate {self.sample_rate:g}, slow >= {self.slow_query_ms:g} ms)"
+            )
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.methods: Dict[str, _Stats] = {}
+            self.statements: Dict[str, _Stats] = {}
+            self.dropped = 0
+
+    def active(self) -> bool:
+        """True while the current thread is inside a sampled Database call."""
+        return self.enabled and getattr(self._local, "method", None) is not None
+
+    def connect(self, db_path: str, timeout: float) -> sqlite3.Connection:
+        return sqlite3.connect(db_path, timeout=timeout, factory=ProfilingConnection)
+
+    def record_method(self, method: str, elapsed: float):
+        with self._lock:
+            stats = self.methods.get(method)
+            if stats is None:
+                stats = self.methods[method] = _Stats(method)
+            stats.calls += 1
+            stats.total += elapsed
+            if elapsed > stats.max:
+                stats.max = elapsed
+
+    def record_statement(
+        self,
+        sql: str,
+        parameters,
+        elapsed: float,
+        rows: int,
+        connection: sqlite3.Connection,
+    ):
+        method = getattr(self._local, "method", None) or "?"
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                if len(self.statements) >= config.QUERY_PROFILE_MAX_STATEMENTS:
+                    self.dropped += 1
+                else:
+                    stats = self.statements[key] = _Stats(method)
+            if stats is not None:
+                stats.add(elapsed, rows)
+            method_stats = self.methods.get(method)
+            if method_stats is None:
+                method_stats = self.methods[method] = _Stats(method)
+            method_stats.rows += rows
+
+        elapsed_ms = elapsed * 1000
+        if elapsed_ms >= self.slow_query_ms:
+            plan = explain(connection, sql, parameters)
+            logger.warning(
+                f"🐢 Slow query in {method}: {elapsed_ms:.1f} ms, {rows} rows\n"
+                f"  {key}" + (f"\n{plan}" if plan else "")
+            )
+
+    def top_statements(self, limit: int, by: str) -> List[Tuple[str, _Stats]]:
+        with self._lock:
+            items = list(self.statements.items())
+        items.sort(key=lambda item: getattr(item[1], by), reverse=True)
+        return items[:limit]
+
+    def top_methods(self, limit: int) -> List[_Stats]:
+        with self._lock:
+            methods = [stats for stats in self.methods.values() if stats.calls]
+        methods.sort(key=lambda stats: stats.total, reverse=True)
+        return methods[:limit]
+
+    def report(self, limit: int = 10) -> str:
+        """Slowest and most frequent statements and methods, as plain text."""
+        started = time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime(self.started_at))
+        lines = [
+            f"Query profile since {started} "
+            f"({'on' if self.enabled else 'off'}, sample rate {self.sample_rate:g}, "
+            f"slow >= {self.slow_query_ms:g} ms)"
+        ]
+        if self.dropped:
+            lines.append(
+                f"{self.dropped} statements not tracked "
+                f"(over {config.QUERY_PROFILE_MAX_STATEMENTS} distinct)"
+            )
+
+        lines.append("\nSlowest statements (max / mean ms, calls, rows, method):")
+        for i, (sql, stats) in enumerate(self.top_statements(limit, "max"), 1):
+            lines.append(
+                f"{i:>3}. {stats.max * 1000:.1f} / {stats.mean * 1000:.2f} ms  "
+                f"x{stats.calls}  {stats.rows} rows  {stats.method}"
+            )
+            lines.append(f"     {sql}")
+
+        lines.append("\nMost frequent statements (calls, mean / total ms, method):")
+        for i, (sql, stats) in enumerate(self.top_statements(limit, "calls"), 1):
+            lines.append(
+                f"{i:>3}. x{stats.calls}  {stats.mean * 1000:.2f} / "
+                f"{stats.total * 1000:.1f} ms  {stats.method}"
+            )
+            lines.append(f"     {sql}")
+
+        lines.append("\nMethods by total time (calls, total / mean / max ms, rows):")
+        for stats in self.top_methods(limit):
+            lines.append(
+                f"  {stats.method}: x{stats.calls}  {stats.total * 1000:.1f} / "
+                f"{stats.mean * 1000:.2f} / {stats.max * 1000:.1f} ms  {stats.rows} rows"
+            )
+        return "\n".join(lines)
+
+
+query_profiler = QueryProfiler()
+
+
+def profile_methods(cls, profiler: QueryProfiler = query_profiler):
+    """Wrap every public method of a class so sampled calls are profiled."""
+    local = profiler._local
+    for name, function in list(vars(cls).items()):
+        if name.startswith("_") or not callable(function):
+            continue
+
+        def profiled(function=function, name=name):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not profiler.enabled:
+                    return function(*args, **kwargs)
+                outer = getattr(local, "method", None)
+                # Calls made from a sampled call are always profiled
+                if outer is None and random.random() >= profiler.sample_rate:
+                    return function(*args, **kwargs)
+                local.method = name
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    local.method = outer
+                    profiler.record_method(name, time.perf_counter() - started)
+
+            return wrapper
+
+        setattr(cls, name, profiled())
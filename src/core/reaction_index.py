@@ -0,0 +1,102 @@
+"""
+Reaction Seen Index
+In-memory record of recent (user, message) reaction pairs, so the common
+"already reacted" and "never reacted" answers need no SQL.
+"""
+
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+import src.core.config as config
+
+DISCORD_EPOCH_MS = 1420070400000
+BUCKET_SECONDS = 3600
+MASK64 = (1 << 64) - 1
+
+
+def snowflake_to_unix(snowflake: int) -> float:
+    """Return the creation time (unix seconds) encoded in a Discord snowflake."""
+    return ((snowflake >> 22) + DISCORD_EPOCH_MS) / 1000
+
+
+def pair_key(user_id: int, message_id: int) -> int:
+    """Mix a (user, message) pair into a single 64-bit key (splitmix64 finalizer)."""
+    x = ((user_id * 0x9E3779B97F4A7C15) ^ message_id) & MASK64
+    x ^= x >> 30
+    x = (x * 0xBF58476D1CE4E5B9) & MASK64
+    x ^= x >> 27
+    x = (x * 0x94D049BB133111EB) & MASK64
+    x ^= x >> 31
+    return x
+
+
+class ReactionIndex:
+    """Hashed (user, message) pairs for messages created inside a recent window.
+
+    Pairs are bucketed by the hour the message was created, so whole buckets
+    can be dropped once they fall out of the window. Messages older than the
+    window are not covered and callers fall back to the database.
+    """
+
+    def __init__(
+        self, window_hours: int = config.DEFAULT_REACTION_INDEX_WINDOW_HOURS
+    ):
+        self.window_hours = window_hours
+        self.loaded = False
+        self._buckets: Dict[int, Set[int]] = {}
+
+    @property
+    def window_start(self) -> float:
+        return time.time() - self.window_hours * 3600
+
+    def load(self, window_hours: int, pairs: Iterable[Tuple[int, int]]):
+        """Bulk load (discord_id, message_id) pairs logged inside the window."""
+        self.window_hours = window_hours
+        self._buckets = {}
+        self.loaded = True
+        for discord_id, message_id in pairs:
+            self.add(discord_id, message_id)
+
+    def covers(self, message_id) -> bool:
+        """True if reactions to this message are fully tracked in memory."""
+        try:
+            created_at = snowflake_to_unix(int(message_id))
+        except (TypeError, ValueError):
+            return False
+        return self.loaded and created_at >= self.window_start
+
+    def lookup(self, discord_id, message_id) -> Optional[bool]:
+        """Return whether the pair was seen, or None if outside the window."""
+        if not self.covers(message_id):
+            return None
+        message_id = int(message_id)
+        bucket = self._buckets.get(self._bucket_for(message_id))
+        return bucket is not None and pair_key(int(discord_id), message_id) in bucket
+
+    def add(self, discord_id, message_id):
+        """Record a reaction pair (ignored if the message is outside the window)."""
+        if not self.covers(message_id):
+            return
+        message_id = int(message_id)
+        bucket_id = self._bucket_for(message_id)
+        bucket = self._buckets.get(bucket_id)
+        if bucket is None:
+            # New hour bucket, good moment to drop expired ones
+            self._evict()
+            bucket = self._buckets[bucket_id] = set()
+        bucket.add(pair_key(int(discord_id), message_id))
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._buckets.values())
+
+    def _bucket_for(self, message_id: int) -> int:
+        return int(snowflake_to_unix(message_id) // BUCKET_SECONDS)
+
+    def _evict(self):
+        """Drop buckets for messages that are now older than the window."""
+        oldest = int(self.window_start // BUCKET_SECONDS)
+        for bucket_id in [b for b in self._buckets if b < oldest]:
+            del self._buckets[bucket_id]
+
+
+# Shared by every Database instance
+reaction_index = ReactionIndex()
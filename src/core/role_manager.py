@@ -1,5 +1,6 @@
 import discord
 from discord.ext import commands
+from src.core import metrics, tracing
 from src.core.database import Database
 import logging
 from typing import List, Optional
@@ -19,7 +20,7 @@ class RoleManager:
     ) -> List[discord.Role]:
         """Remove all level-based roles from a member. Returns list of removed roles."""
         removed_roles = []
-        all_role_milestones = dao.get_all_role_milestones()
+        all_role_milestones = dao.get_all_role_milestones(guild.id)
 
         logger.info(f"Checking for level roles to remove from {member.display_name}")
         logger.info(f"Available role milestones: {all_role_milestones}")
@@ -40,6 +41,7 @@ class RoleManager:
                 await member.remove_roles(
                     *removed_roles, reason="Level-based role cleanup"
                 )
+                metrics.role_changes.inc("remove", amount=len(removed_roles))
                 logger.info(
                     f"Removed roles {[r.name for r in removed_roles]} from {member.display_name}"
                 )
@@ -59,7 +61,7 @@ class RoleManager:
     ) -> Optional[discord.Role]:
         """Get the role that should be assigned for the current level."""
         # Get all role milestones in descending order to find highest qualifying
-        all_role_milestones = dao.get_all_role_milestones()
+        all_role_milestones = dao.get_all_role_milestones(guild.id)
         all_role_milestones.sort(
             key=lambda x: x[0], reverse=True
         )  # Sort by milestone value descending
@@ -83,6 +85,7 @@ class RoleManager:
                 await member.add_roles(
                     target_role, reason="Level-based role assignment"
                 )
+                metrics.role_changes.inc("add")
                 logger.info(f"Added role {target_role.name} to {member.display_name}")
             except discord.Forbidden:
                 logger.error(
@@ -93,8 +96,9 @@ class RoleManager:
 
         return added_roles
 
+    @tracing.traced("check_and_assign_roles")
     async def check_and_assign_roles(
-        self, discord_id: str, guild: discord.Guild
+        self, discord_id: int, guild: discord.Guild
     ) -> bool:
         """
         Check if user's level has changed and assign/remove roles accordingly.
@@ -102,20 +106,20 @@ class RoleManager:
         """
         try:
             # Get user's current level
-            current_level = dao.get_user_level(discord_id)
+            current_level = dao.get_user_level(guild.id, discord_id)
             logger.info(f"Checking roles for user {discord_id}, level: {current_level}")
 
             if current_level == 0:
                 logger.info(f"User {discord_id} has level 0, removing all level roles")
                 # Even with level 0, we should remove any existing level roles
-                member = guild.get_member(int(discord_id))
+                member = guild.get_member(discord_id)
                 if member:
                     removed_roles = await self._remove_all_level_roles(member, guild)
                     return len(removed_roles) > 0
                 return False
 
             # Get the member object
-            member = guild.get_member(int(discord_id))
+            member = guild.get_member(discord_id)
             if not member:
                 logger.warning(f"Member {discord_id} not found in guild {guild.id}")
                 return False
@@ -124,7 +128,7 @@ class RoleManager:
             target_role = await self._get_target_role_for_level(current_level, guild)
 
             # Get all level-based roles the user currently has
-            all_role_milestones = dao.get_all_role_milestones()
+            all_role_milestones = dao.get_all_role_milestones(guild.id)
             current_level_roles = []
             for milestone, role_name in all_role_milestones:
                 if role_name:
@@ -152,6 +156,7 @@ class RoleManager:
                         await member.remove_roles(
                             *roles_to_remove, reason="Level-based role cleanup"
                         )
+                        metrics.role_changes.inc("remove", amount=len(roles_to_remove))
                         logger.info(
                             f"Removed roles {[r.name for r in roles_to_remove]} from {member.display_name}"
                         )
@@ -160,6 +165,7 @@ class RoleManager:
                         await member.add_roles(
                             *roles_to_add, reason="Level-based role assignment"
                         )
+                        metrics.role_changes.inc("add", amount=len(roles_to_add))
                         logger.info(
                             f"Added roles {[r.name for r in roles_to_add]} to {member.display_name}"
                         )
@@ -197,7 +203,10 @@ class RoleManager:
             # Get all members from database (including those with level 0 who might have roles to remove)
             with dao._connect() as conn:
                 cur = conn.cursor()
-                cur.execute("SELECT discord_id FROM members")
+                cur.execute(
+                    "SELECT discord_id FROM members WHERE guild_id = ?",
+                    (guild.id,),
+                )
                 member_ids = [row[0] for row in cur.fetchall()]
 
             logger.info(
@@ -207,9 +216,9 @@ class RoleManager:
             for discord_id in member_ids:
                 summary["total_checked"] += 1
                 try:
-                    member = guild.get_member(int(discord_id))
+                    member = guild.get_member(discord_id)
                     if member:
-                        current_level = dao.get_user_level(discord_id)
+                        current_level = dao.get_user_level(guild.id, discord_id)
                         logger.info(
                             f"Processing member {member.display_name} (ID: {discord_id}) - Level: {current_level}"
                         )
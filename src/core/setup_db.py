@@ -1,6 +1,10 @@
 import sqlite3
 import src.core.config as config
 
+# Example admin IDs (replace with real admin Discord IDs). Migration 16.0 makes
+# them admins of DEFAULT_GUILD_ID, once, on a database without admins.
+ADMIN_IDS = [1301517023846858784, 588443056529866818]
+
 
 # Create tables
 def setup(logger):
@@ -8,6 +12,12 @@ def setup(logger):
     conn = sqlite3.connect(config.DATABASE_NAME)
     cursor = conn.cursor()
 
+    # Only takes effect on a new file; migration 11.0 converts existing ones
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+    # WAL lets shard processes read while another one writes (persists in the file)
+    cursor.execute("PRAGMA journal_mode=WAL")
+
     cursor.execute(
         """
     CREATE TABLE IF NOT EXISTS members (
@@ -122,18 +132,10 @@ def setup(logger):
             (value, status, message),
         )
 
-    # Example admin ID (replace with real admin Discord IDs)
-    admin_ids = ["1301517023846858784", "588443056529866818"]
-    for admin in admin_ids:
-        cursor.execute(
-            "INSERT OR IGNORE INTO admin_ids (discord_id, status) VALUES (?, 'active')",
-            (admin,),
-        )
-
     # Finalize
     conn.commit()
     conn.close()
 
     logger.info(
-        "✅ Database initialized successfully with config, milestones, admins, and tracked channels."
+        "✅ Database initialized successfully with config, milestones, and tracked channels."
     )
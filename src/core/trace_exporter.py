@@ -0,0 +1,170 @@
+"""
+Trace Exporter
+Writes the spans kept by the tracer (src.core.tracing) every
+TRACE_EXPORT_INTERVAL seconds, to a JSONL file or an OTLP/HTTP collector in
+the JSON encoding. Only loaded when TRACE_EXPORTER is set.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+import aiohttp
+from discord.ext import commands, tasks
+import src.core.config as config
+from src.core.tracing import Span, tracer
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "discord-gamification-bot"
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_payload(spans: List[Span]) -> Dict:
+    """An OTLP/HTTP JSON ExportTraceServiceRequest."""
+    otlp_spans = []
+    for span in spans:
+        otlp_span = {
+            "traceId": span.trace.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in span.attributes.items()
+            ],
+            "status": (
+                {"code": 2, "message": span.error} if span.error else {"code": 1}
+            ),
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        otlp_spans.append(otlp_span)
+    resource = {"service.name": SERVICE_NAME, "process.id": config.PROCESS_ID}
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": key, "value": _otlp_value(value)}
+                        for key, value in resource.items()
+                    ]
+                },
+                "scopeSpans": [
+                    {"scope": {"name": "src.core.tracing"}, "spans": otlp_spans}
+                ],
+            }
+        ]
+    }
+
+
+class JsonlExporter:
+    """Appends one JSON object per span to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def _write(self, data: bytes):
+        # One unbuffered append per batch, so shard processes can share the file
+        with open(self.path, "ab", buffering=0) as f:
+            f.write(data)
+
+    async def export(self, spans: List[Span]):
+        data = "".join(json.dumps(span.to_dict()) + "\n" for span in spans)
+        await asyncio.to_thread(self._write, data.encode("utf-8"))
+
+    async def close(self):
+        pass
+
+
+class OtlpExporter:
+    """Posts spans to an OTLP/HTTP collector in the JSON encoding."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def export(self, spans: List[Span]):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        async with self.session.post(
+            self.endpoint, json=otlp_payload(spans)
+        ) as response:
+            if response.status >= 300:
+                raise RuntimeError(
+                    f"collector returned {response.status}: {await response.text()}"
+                )
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+
+
+class TraceExporter(commands.Cog):
+    """Exports finished traces every TRACE_EXPORT_INTERVAL seconds."""
+
+    def __init__(self, bot, exporter):
+        self.bot = bot
+        self.exporter = exporter
+        tracer.enabled = True
+        self.export_spans.start()
+
+    async def cog_unload(self):
+        """Clean up when cog is unloaded."""
+        tracer.enabled = False
+        self.export_spans.cancel()
+        await self.flush()
+        await self.exporter.close()
+
+    @tasks.loop(seconds=config.TRACE_EXPORT_INTERVAL)
+    async def export_spans(self):
+        await self.flush()
+
+    async def flush(self):
+        spans = tracer.drain()
+        if not spans:
+            return
+        try:
+            await self.exporter.export(spans)
+        except Exception as e:
+            # Dropped rather than retried so a dead collector can't grow memory
+            logger.error(f"Error exporting {len(spans)} spans: {e}")
+
+
+async def setup(bot):
+    if config.TRACE_EXPORTER == "jsonl":
+        exporter = JsonlExporter(config.TRACE_FILE)
+        target = config.TRACE_FILE
+    elif config.TRACE_EXPORTER == "otlp":
+        exporter = OtlpExporter(config.TRACE_OTLP_ENDPOINT)
+        target = config.TRACE_OTLP_ENDPOINT
+    else:
+        if config.TRACE_EXPORTER:
+            logger.error(
+                f"Unknown TRACE_EXPORTER {config.TRACE_EXPORTER!r} (use jsonl or otlp)"
+            )
+        logger.info("Tracing disabled (TRACE_EXPORTER not set)")
+        return
+    trace_exporter = TraceExporter(bot, exporter)
+    await bot.add_cog(trace_exporter)
+    bot.trace_exporter = trace_exporter
+    logger.info(
+        f"🔎 Tracing to {target} (sample rate {tracer.sample_rate:g}, "
+        f"slow >= {tracer.slow_ms:g} ms)"
+    )
@@ -0,0 +1,278 @@
+"""
+Tracing
+Structured spans for the event scoring pipeline: a root span per gateway
+event with child spans for Database calls, milestone checks, role updates,
+voice channel renames and Discord HTTP requests. Finished traces that are
+kept wait in a buffer for the trace exporter (src.core.trace_exporter).
+
+Set TRACE_EXPORTER to "jsonl" or "otlp" to turn tracing on. A share of
+events (TRACE_SAMPLE_RATE) is kept, plus every event slower than
+TRACE_SLOW_MS, so the slow outliers are never sampled away. With tracing off,
+instrumented code pays one context variable lookup.
+"""
+
+import contextvars
+import os
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List, Optional
+import aiohttp
+import src.core.config as config
+from src.core.metrics import route_template
+
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class Trace:
+    __slots__ = ("trace_id", "sampled", "spans", "finished", "dropped")
+
+    def __init__(self, sampled: bool):
+        self.trace_id = os.urandom(16).hex()
+        self.sampled = sampled
+        self.spans: List[Span] = []
+        self.finished = False
+        self.dropped = 0
+
+
+class Span:
+    __slots__ = (
+        "trace",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "error",
+        "_started",
+    )
+
+    def __init__(
+        self,
+        trace: Trace,
+        parent_id: Optional[str],
+        name: str,
+        kind: int,
+        attributes: Dict,
+    ):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+        self._started = time.perf_counter_ns()
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = self.start_ns + time.perf_counter_ns() - self._started
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or self.start_ns) - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "status": "error" if self.error else "ok",
+            **({"error": self.error} if self.error else {}),
+            "process_id": config.PROCESS_ID,
+        }
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = config.TRACE_SAMPLE_RATE
+        self.slow_ms = config.TRACE_SLOW_MS
+        self.dropped_spans = 0
+        self._finished: deque = deque()
+
+    @contextmanager
+    def trace(self, name: str, **attributes):
+        """Root span for one event; a child span if a trace is already running."""
+        if not self.enabled or _current_span.get() is not None:
+            with self.span(name, **attributes) as span:
+                yield span
+            return
+        sampled = random.random() < self.sample_rate
+        if not sampled and self.slow_ms <= 0:
+            yield None
+            return
+
+        trace = Trace(sampled)
+        root = Span(trace, None, name, KIND_SERVER, attributes)
+        trace.spans.append(root)
+        token = _current_span.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            root.end()
+            self._finish(trace, root)
+
+    def start_span(
+        self, name: str, kind: int = KIND_INTERNAL, **attributes
+    ) -> Optional[Span]:
+        """Open a child of the current span, if the current event is traced."""
+        parent = _current_span.get()
+        if parent is None or parent.trace.finished:
+            return None
+        trace = parent.trace
+        if len(trace.spans) >= config.TRACE_MAX_SPANS_PER_TRACE:
+            trace.dropped += 1
+            return None
+        span = Span(trace, parent.span_id, name, kind, attributes)
+        trace.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        span = self.start_span(name, **attributes)
+        if span is None:
+            yield None
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def annotate(self, **attributes):
+        """Add attributes to the current span."""
+        span = _current_span.get()
+        if span is not None:
+            span.attributes.update(attributes)
+
+    def _finish(self, trace: Trace, root: Span):
+        trace.finished = True
+        slow = self.slow_ms > 0 and root.duration_ms >= self.slow_ms
+        if not (trace.sampled or slow):
+            return
+        root.attributes["sampled_by"] = "rate" if trace.sampled else "slow"
+        if trace.dropped:
+            root.attributes["dropped_spans"] = trace.dropped
+        # Spans still open belong to work the event left running in the background
+        spans = [span for span in trace.spans if span.end_ns is not None]
+        room = config.TRACE_BUFFER_MAX_SPANS - len(self._finished)
+        if len(spans) > room:
+            self.dropped_spans += len(spans)
+            return
+        self._finished.extend(spans)
+
+    def drain(self) -> List[Span]:
+        spans = list(self._finished)
+        self._finished.clear()
+        return spans
+
+
+tracer = Tracer()
+
+
+def traced(name: str):
+    """Run an async function in a child span of the current event."""
+
+    def decorator(function):
+        @wraps(function)
+        async def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return await function(*args, **kwargs)
+            with tracer.span(name):
+                return await function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def traced_event(name: str):
+    """Run an event handler in a root span."""
+
+    def decorator(function):
+        @wraps(function)
+        async def wrapper(*args, **kwargs):
+            with tracer.trace(name):
+                return await function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def trace_methods(cls, prefix: str):
+    """Wrap every public method of a class in a child span named by method."""
+    for name, function in list(vars(cls).items()):
+        if name.startswith("_") or not callable(function):
+            continue
+
+        def spanned(function=function, name=f"{prefix}.{name}"):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return function(*args, **kwargs)
+                with tracer.span(name):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        setattr(cls, name, spanned())
+
+
+def http_trace(trace: Optional[aiohttp.TraceConfig] = None) -> aiohttp.TraceConfig:
+    """aiohttp hooks that add a client span per Discord API request."""
+
+    async def on_request_start(session, context, params):
+        route = route_template(params.url.path)
+        context.span = tracer.start_span(
+            f"http {params.method} {route}",
+            KIND_CLIENT,
+            **{"http.method": params.method, "http.route": route},
+        )
+
+    async def on_request_end(session, context, params):
+        span = getattr(context, "span", None)
+        if span is not None:
+            span.attributes["http.status_code"] = params.response.status
+            if params.response.status >= 400:
+                span.error = f"HTTP {params.response.status}"
+            span.end()
+
+    async def on_request_exception(session, context, params):
+        span = getattr(context, "span", None)
+        if span is not None:
+            span.error = f"{type(params.exception).__name__}: {params.exception}"
+            span.end()
+
+    trace = trace or aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_exception)
+    return trace
@@ -1,6 +1,8 @@
 import discord
 from discord.ext import commands, tasks
+from src.core import metrics, tracing
 from src.core.database import Database
+import src.core.config as config
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,7 +25,7 @@ class VoiceChannelDisplay(commands.Cog):
     async def get_or_create_display_channels(self, guild: discord.Guild) -> list:
         """Get or create the voice channels for displaying top users."""
         channels = []
-        guild_id = str(guild.id)
+        guild_id = guild.id
         category_name = "═════Top Members═════"
 
         # Try to get existing channels from database
@@ -32,7 +34,7 @@ class VoiceChannelDisplay(commands.Cog):
         if saved_channel_ids:
             # Use saved channels if they exist
             for channel_id in saved_channel_ids:
-                channel = guild.get_channel(int(channel_id))
+                channel = guild.get_channel(channel_id)
                 if channel:
                     channels.append(channel)
 
@@ -126,16 +128,16 @@ class VoiceChannelDisplay(commands.Cog):
 
         # Save the channel IDs to database
         if channels:
-            channel_ids = [str(channel.id) for channel in channels]
+            channel_ids = [channel.id for channel in channels]
             dao.save_voice_channel_display(guild_id, channel_ids)
 
         return channels
 
-    def get_top_users_display(self) -> list:
-        """Get the top 3 users formatted for display with points."""
+    def get_top_users_display(self, guild_id: int) -> list:
+        """Get the guild's top 3 users formatted for display with points."""
         try:
             # Get top 3 users from leaderboard
-            top_users = dao.get_leaderboard(3)
+            top_users = dao.get_leaderboard(guild_id, 3)
 
             if not top_users:
                 return ["🥇 1st Place", "🥈 2nd Place", "🥉 3rd Place"]
@@ -146,7 +148,7 @@ class VoiceChannelDisplay(commands.Cog):
 
             for i, (discord_id, points) in enumerate(top_users):
                 # Get user object to get display name
-                user = self.bot.get_user(int(discord_id))
+                user = self.bot.get_user(discord_id)
                 username = user.display_name if user else f"User{discord_id}"
 
                 # Format: medal + username + points
@@ -177,11 +179,12 @@ class VoiceChannelDisplay(commands.Cog):
             logger.error(f"Error getting top users display: {e}")
             return ["🥇 1st Place", "🥈 2nd Place", "🥉 3rd Place"]
 
+    @tracing.traced("update_channel_name")
     async def update_channel_name(self, guild: discord.Guild):
         """Update the voice channel names with current top 3 users."""
         try:
             # Check if voice channel display is enabled
-            if dao.get_config("voice_channel_display_enabled") != "true":
+            if dao.get_config(guild.id, "voice_channel_display_enabled") != "true":
                 return
 
             # Get or create the display channels
@@ -190,7 +193,7 @@ class VoiceChannelDisplay(commands.Cog):
                 return
 
             # Get new display names
-            new_names = self.get_top_users_display()
+            new_names = self.get_top_users_display(guild.id)
 
             # Update each channel
             for i, channel in enumerate(channels):
@@ -201,6 +204,7 @@ class VoiceChannelDisplay(commands.Cog):
                     if channel.name != new_name:
                         try:
                             await channel.edit(name=new_name, reason="Top users update")
+                            metrics.voice_renames.inc("done")
                             logger.info(
                                 f"Updated voice channel name in {guild.name}: {new_name}"
                             )
@@ -212,6 +216,8 @@ class VoiceChannelDisplay(commands.Cog):
                             logger.error(
                                 f"Error updating voice channel name in {guild.name}: {e}"
                             )
+                    else:
+                        metrics.voice_renames.inc("skipped")
 
         except Exception as e:
             logger.error(f"Error in update_channel_name for {guild.name}: {e}")
@@ -231,26 +237,30 @@ class VoiceChannelDisplay(commands.Cog):
         await self.bot.wait_until_ready()
 
     @commands.command()
-    @commands.check(lambda ctx: dao.is_admin(str(ctx.author.id)))
+    @commands.guild_only()
+    @commands.check(lambda ctx: dao.is_admin(ctx.guild.id, ctx.author.id))
     async def togglevoicedisplay(self, ctx):
         """Toggle voice channel display on/off."""
-        current_setting = dao.get_config("voice_channel_display_enabled")
+        guild_id = ctx.guild.id
+        current_setting = dao.get_config(guild_id, "voice_channel_display_enabled")
         new_setting = "false" if current_setting == "true" else "true"
 
-        dao.update_config("voice_channel_display_enabled", new_setting)
+        dao.update_config(guild_id, "voice_channel_display_enabled", new_setting)
 
         status = "enabled" if new_setting == "true" else "disabled"
         await ctx.send(f"✅ Voice channel display {status}.")
 
     @commands.command()
-    @commands.check(lambda ctx: dao.is_admin(str(ctx.author.id)))
+    @commands.guild_only()
+    @commands.check(lambda ctx: dao.is_admin(ctx.guild.id, ctx.author.id))
     async def updatevoicedisplay(self, ctx):
         """Manually update the voice channel display."""
         await self.update_channel_name(ctx.guild)
         await ctx.send("✅ Voice channel display updated with points.")
 
     @commands.command()
-    @commands.check(lambda ctx: dao.is_admin(str(ctx.author.id)))
+    @commands.guild_only()
+    @commands.check(lambda ctx: dao.is_global_admin(ctx.author.id))
     async def setvoiceinterval(self, ctx, seconds: str = None):
         """Set the update interval for voice channel display (in seconds)."""
         if not seconds or not seconds.isdigit():
@@ -264,7 +274,9 @@ class VoiceChannelDisplay(commands.Cog):
 
         # Update the interval
         self.update_interval = seconds
-        dao.update_config("voice_channel_update_interval", str(seconds))
+        dao.update_config(
+            config.GLOBAL_GUILD_ID, "voice_channel_update_interval", str(seconds)
+        )
 
         # Restart the task with new interval
         self.update_voice_channel.cancel()